@@ -0,0 +1,199 @@
+from __future__ import annotations
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+try:
+    import yaml  # the scratch pipeline reads its allow-lists from config.yaml
+    YAML_AVAILABLE = True
+except Exception:
+    YAML_AVAILABLE = False
+
+from sdg_ea_pipeline.benchmarks.synthetic import PanelSpec, governance_config, write_panel
+
+PACKAGE_DIR = ROOT / "sdg_ea_pipeline"
+RESULTS_FILE = PACKAGE_DIR / "logs" / "benchmarks" / "results.ndjson"
+# Scale points: countries x indicators x years. "un" is full UN coverage: 193 member states
+# and the 231 unique indicators of the global SDG framework over 25 years (~1.1M cells).
+SCALES: Dict[str, PanelSpec] = {
+    "smoke": PanelSpec(countries=8, indicators=3, years=10),
+    "regional": PanelSpec(countries=54, indicators=60, years=25),
+    "un": PanelSpec(countries=193, indicators=231, years=25),
+}
+DEFAULT_SCALES = ("smoke", "regional")
+# Generated state and artifacts that are never copied into the scratch tree
+SKIP_TOP_LEVEL = {"data", "models", "logs", "benchmarks"}
+STAGE_METRICS = ("wall_s", "cpu_s", "peak_rss_bytes", "rows_in", "rows_out", "bytes_in", "bytes_out")
+
+# Each scale point runs the real pipeline (run_pipeline.py, no stage cache, one worker so peak
+# RSS is attributable to one stage) on a scratch copy of the code with a synthetic placeholder
+# and matching allow-lists. Per-stage metrics come from the run trace and are appended to
+# logs/benchmarks/results.ndjson keyed by commit, so runs on different commits can be compared.
+
+
+def git_revision() -> dict:
+    def git(*args) -> str:
+        out = subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() if out.returncode == 0 else ""
+    return {"commit": git("rev-parse", "--short", "HEAD") or "unknown", "dirty": bool(git("status", "--porcelain", "--", "sdg_ea_pipeline"))}
+
+
+def _ignore(src: str, names: List[str]) -> set:
+    skipped = {"__pycache__"}
+    if Path(src).resolve() == PACKAGE_DIR.resolve():
+        skipped |= SKIP_TOP_LEVEL
+    return {n for n in names if n in skipped}
+
+
+def prepare_workspace(spec: PanelSpec, workdir: Path) -> Path:
+    # Code only, plus the synthetic placeholder and a config admitting its codes
+    if not YAML_AVAILABLE:
+        raise RuntimeError("Benchmarks need PyYAML to write the scratch governance config.")
+    package = workdir / "sdg_ea_pipeline"
+    shutil.copytree(PACKAGE_DIR, package, ignore=_ignore)
+    with open(package / "config" / "config.yaml", "w", encoding="utf-8") as f:
+        yaml.safe_dump(governance_config(spec), f, sort_keys=False)
+    # Named like ingestion's example file so it does not add its 5 rows next to the panel
+    write_panel(spec, package / "data" / "raw" / "placeholders" / "dummy_sdg.csv")
+    return package
+
+
+def run_scale(name: str, spec: PanelSpec, keep: bool = False) -> List[dict]:
+    workdir = Path(tempfile.mkdtemp(prefix=f"sdg_bench_{name}_"))
+    try:
+        t0 = time.perf_counter()
+        package = prepare_workspace(spec, workdir)
+        generate_s = time.perf_counter() - t0
+        trace_path = workdir / "trace.ndjson"
+        proc = subprocess.run(
+            [sys.executable, str(package / "run_pipeline.py"), "--no-cache", "--workers", "1", "--trace", str(trace_path)],
+            cwd=workdir, capture_output=True, text=True,
+        )
+        if proc.returncode != 0 or not trace_path.exists():
+            raise RuntimeError(f"Pipeline failed at scale '{name}':\n{proc.stdout[-2000:]}\n{proc.stderr[-2000:]}")
+        with open(trace_path, "r", encoding="utf-8") as f:
+            events = [json.loads(line) for line in f if line.strip()]
+    finally:
+        if keep:
+            print(f"Kept benchmark workspace {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    base = {
+        **git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "scale": name,
+        "cells": spec.cells,
+        "spec": asdict(spec),
+        "python": sys.version.split()[0],
+    }
+    results = [{**base, "stage": "generate", "wall_s": round(generate_s, 6)}]
+    for e in events:
+        stage = e["stage"] if e["event"] == "stage" else "total"
+        results.append({**base, "stage": stage, "status": e["status"], **{k: e.get(k) for k in STAGE_METRICS}})
+    return results
+
+
+def save_results(results: List[dict], path: Path = RESULTS_FILE) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for r in results:
+            f.write(json.dumps(r) + "\n")
+
+
+def load_results(path: Path = RESULTS_FILE) -> List[dict]:
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _format_row(cells: list, widths: list) -> str:
+    return "  ".join(str(c).ljust(w) for c, w in zip(cells, widths))
+
+
+def print_results(results: List[dict]) -> None:
+    rows = [[r["scale"], r["stage"], f"{r['wall_s']:.3f}", f"{(r.get('cpu_s') or 0):.3f}",
+             f"{(r.get('peak_rss_bytes') or 0) / 2**20:.0f}", r.get("rows_out") if r.get("rows_out") is not None else ""]
+            for r in results]
+    header = ["scale", "stage", "wall_s", "cpu_s", "peak_MiB", "rows_out"]
+    widths = [max(len(str(x)) for x in col) for col in zip(header, *rows)]
+    print(_format_row(header, widths))
+    for row in rows:
+        print(_format_row(row, widths))
+
+
+def compare(base: str, head: Optional[str] = None, path: Path = RESULTS_FILE) -> List[dict]:
+    # Latest result per (scale, stage) for each commit, with the wall-time ratio head / base
+    latest: Dict[tuple, dict] = {}
+    results = load_results(path)
+    head = head or (results[-1]["commit"] if results else None)
+    for r in results:
+        if r["commit"] in (base, head):
+            latest[(r["commit"], r["scale"], r["stage"])] = r
+    rows = []
+    for (commit, scale, stage), r in latest.items():
+        if commit != base or (head, scale, stage) not in latest:
+            continue
+        new = latest[(head, scale, stage)]
+        ratio = new["wall_s"] / r["wall_s"] if r["wall_s"] else None
+        rows.append({"scale": scale, "stage": stage, "base_wall_s": r["wall_s"], "head_wall_s": new["wall_s"],
+                     "ratio": None if ratio is None else round(ratio, 3),
+                     "base_peak_rss_bytes": r.get("peak_rss_bytes"), "head_peak_rss_bytes": new.get("peak_rss_bytes")})
+    header = ["scale", "stage", f"{base} s", f"{head} s", "ratio"]
+    table = [[r["scale"], r["stage"], f"{r['base_wall_s']:.3f}", f"{r['head_wall_s']:.3f}",
+              "" if r["ratio"] is None else f"{r['ratio']:.2f}x"] for r in rows]
+    widths = [max(len(str(x)) for x in col) for col in zip(header, *table)]
+    print(_format_row(header, widths))
+    for row in table:
+        print(_format_row(row, widths))
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark each pipeline stage on synthetic panels.")
+    sub = parser.add_subparsers(dest="command")
+    run = sub.add_parser("run", help="Run scale points and append results (default command).")
+    run.add_argument("--scales", nargs="+", choices=sorted(SCALES), default=list(DEFAULT_SCALES))
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--keep", action="store_true", help="Keep the scratch workspaces for inspection.")
+    run.add_argument("--no-save", action="store_true", help="Print results without appending them.")
+    cmp_ = sub.add_parser("compare", help="Compare stored results of two commits.")
+    cmp_.add_argument("base")
+    cmp_.add_argument("head", nargs="?", default=None, help="Defaults to the most recently benchmarked commit.")
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in ("run", "compare", "-h", "--help"):
+        argv = ["run", *argv]
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "compare":
+        return compare(args.base, args.head)
+    results = []
+    for name in args.scales:
+        spec = replace(SCALES[name], seed=args.seed)
+        print(f"[BENCH] {name}: {spec.countries} countries x {spec.indicators} indicators x {spec.years} years")
+        results += run_scale(name, spec, keep=args.keep)
+    print_results(results)
+    if not args.no_save:
+        save_results(results)
+        print(f"Results appended to {RESULTS_FILE}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+import argparse
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sdg_ea_pipeline.config.defaults import CONFIG as DEFAULT_CONFIG
+
+# Deterministic synthetic SDG panels in the placeholder schema STEP 3 ingests
+# (source, year, country, indicator_code, value, reliability). The configured East Africa
+# countries / indicators come first, padded with generated codes up to the requested size.
+SOURCE = "SYNTHETIC_panel"
+RELIABILITY_LEVELS = ("verified", "estimated", "provisional")
+RELIABILITY_WEIGHTS = (0.7, 0.25, 0.05)
+SDG_GOALS = 17
+
+
+@dataclass(frozen=True)
+class PanelSpec:
+    countries: int = 8
+    indicators: int = 3
+    years: int = 24
+    start_year: int = 2000
+    # Share of observations with a blank value, and of observations absent from the file
+    missing_rate: float = 0.05
+    gap_rate: float = 0.05
+    # Share of rows re-emitted with a revised value (same key; cleaning keeps the last one)
+    duplicate_rate: float = 0.01
+    seed: int = 0
+
+    @property
+    def cells(self) -> int:
+        return self.countries * self.indicators * self.years
+
+
+def country_codes(n: int) -> list:
+    base = [str(c) for c in DEFAULT_CONFIG.get("countries", [])][:n]
+    return base + [f"C{i:03d}" for i in range(n - len(base))]
+
+
+def indicator_codes(n: int) -> list:
+    base = [str(i["code"]) for i in DEFAULT_CONFIG.get("indicators", []) if isinstance(i, dict)][:n]
+    return base + [f"X{i:03d}" for i in range(n - len(base))]
+
+
+def governance_config(spec: PanelSpec) -> dict:
+    # A config whose allow-lists admit every generated code, for running the pipeline on the panel
+    cfg = dict(DEFAULT_CONFIG)
+    cfg["countries"] = country_codes(spec.countries)
+    cfg["indicators"] = [
+        {"sdg": 1 + i % SDG_GOALS, "code": code, "name": f"Synthetic indicator {code}"}
+        for i, code in enumerate(indicator_codes(spec.indicators))
+    ]
+    cfg["sdgs"] = [f"SDG{g}" for g in range(1, min(SDG_GOALS, spec.indicators) + 1)]
+    cfg["years"] = list(range(spec.start_year, spec.start_year + spec.years))
+    return cfg
+
+
+def generate_panel(spec: PanelSpec) -> pd.DataFrame:
+    # Vectorized: every series is a noisy geometric trend around its own level; no Python loop
+    # over series or rows, so full UN scale (~1M cells) takes well under a second
+    rng = np.random.default_rng(spec.seed)
+    n_series = spec.countries * spec.indicators
+    level = rng.lognormal(mean=4.0, sigma=2.0, size=n_series)
+    growth = rng.normal(0.01, 0.03, size=n_series)
+    steps = rng.normal(0.0, 0.02, size=(n_series, spec.years)) + growth[:, None]
+    values = (level[:, None] * np.exp(np.cumsum(steps, axis=1))).ravel()
+
+    series = np.repeat(np.arange(n_series), spec.years)
+    countries = np.asarray(country_codes(spec.countries), dtype=object)
+    indicators = np.asarray(indicator_codes(spec.indicators), dtype=object)
+    df = pd.DataFrame({
+        "source": SOURCE,
+        "year": np.tile(np.arange(spec.start_year, spec.start_year + spec.years), n_series),
+        "country": countries[series // spec.indicators],
+        "indicator_code": indicators[series % spec.indicators],
+        "value": values,
+        "reliability": np.asarray(RELIABILITY_LEVELS, dtype=object)[
+            rng.choice(len(RELIABILITY_LEVELS), size=len(values), p=RELIABILITY_WEIGHTS)],
+    })
+    df.loc[rng.random(len(df)) < spec.missing_rate, "value"] = np.nan
+    df = df[rng.random(len(df)) >= spec.gap_rate]
+    if spec.duplicate_rate > 0 and len(df):
+        dups = df.sample(frac=spec.duplicate_rate, random_state=spec.seed)
+        dups = dups.assign(value=dups["value"] * rng.normal(1.0, 0.01, size=len(dups)))
+        df = pd.concat([df, dups], ignore_index=True)
+    return df.reset_index(drop=True)
+
+
+def write_panel(spec: PanelSpec, path: Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    generate_panel(spec).to_csv(path, index=False)
+    return path
+
+
+def parse_args(argv=None):
+    defaults = PanelSpec()
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic SDG panel as a placeholder CSV.")
+    parser.add_argument("output", help="CSV path to write.")
+    for name, value in asdict(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> Path:
+    args = vars(parse_args(argv))
+    output = args.pop("output")
+    spec = PanelSpec(**args)
+    path = write_panel(spec, Path(output))
+    print(f"Synthetic panel ({spec.countries} countries x {spec.indicators} indicators x {spec.years} years) "
+          f"written to {path}")
+    return path
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,10 @@ CONFIG = {
     "countries": ["KEN", "UGA", "TZA", "RWA", "BDI", "SSD", "ETH", "SOM"],
     "sdgs": ["SDG1", "SDG2", "SDG3"],
     "indicators": [
-        {"sdg": 1, "code": "I1", "name": "Population"},
-        {"sdg": 2, "code": "I2", "name": "Agricultural land area (% of total land)"},
-        {"sdg": 3, "code": "I3", "name": "Life expectancy at birth (years)"},
+        # source_code: the indicator's id in the upstream API (logic/ingestion/fetch.py)
+        {"sdg": 1, "code": "I1", "name": "Population", "source_code": "SP.POP.TOTL"},
+        {"sdg": 2, "code": "I2", "name": "Agricultural land area (% of total land)", "source_code": "AG.LND.AGRI.ZS"},
+        {"sdg": 3, "code": "I3", "name": "Life expectancy at birth (years)", "source_code": "SP.DYN.LE00.IN"},
     ],
     "years": [2020, 2021, 2022, 2023],
     "metadata_schema": {
@@ -15,7 +16,7 @@ CONFIG = {
             {"name": "country", "type": "string"},
             {"name": "indicator_code", "type": "string"},
             {"name": "value", "type": "number"},
-            {"name": "reliability", "type": "string"}
+            {"name": "reliability", "type": "string", "enum": ["verified", "estimated", "provisional"]}
         ]
     },
     "data_quality_flags": {
@@ -1,29 +1,182 @@
+from __future__ import annotations
+import argparse
 import pandas as pd
 import numpy as np
-import glob
+import json
+import os
+import re
+import shutil
+import sys
+from datetime import datetime
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sdg_ea_pipeline.logic.cleaning.impute import METHOD_COLUMN, fill_gaps
+from sdg_ea_pipeline.logic.ingestion.provenance_store import record_lineage
+from sdg_ea_pipeline.logic.storage.artifacts import (
+    artifact_exists,
+    artifact_path,
+    find_artifact,
+    iter_artifact_file,
+    list_artifacts,
+    read_artifact,
+    read_artifact_file,
+    write_artifact,
+)
+from sdg_ea_pipeline.logic.storage.memory import (
+    MemoryBudget,
+    MemoryBudgetExceeded,
+    artifact_nbytes,
+    compact_frame,
+    config_vocabulary,
+)
+from sdg_ea_pipeline.logic.storage.partitions import (
+    CHUNK_ROWS,
+    DEFAULT_WORKERS,
+    MISSING_KEY,
+    PARTITIONS_DIR,
+    combine_shards,
+    conform,
+    group_medians,
+    map_shards,
+    merge_vocabularies,
+    observed_vocabulary,
+    partition_keys,
+    plan_workers,
+    shard_dir,
+    write_shard,
+    write_shards,
+)
+from sdg_ea_pipeline.logic.validation.quality import QUALITY_SUMMARY, apply_quality, combine_summaries, load_rules, write_summary
+
 INTERIM_DIR = ROOT / 'sdg_ea_pipeline' / 'data' / 'interim'
-CLEANED_OUTPUT = ROOT / 'sdg_ea_pipeline' / 'data' / 'processed' / 'cleaned.csv'
+CLEANED_OUTPUT = ROOT / 'sdg_ea_pipeline' / 'data' / 'processed' / 'cleaned'
+# Deduplicated (pre-imputation) observation table and the interims already merged into it
+OBSERVATIONS = ROOT / 'sdg_ea_pipeline' / 'data' / 'processed' / 'observations'
+CLEANING_STATE = ROOT / 'sdg_ea_pipeline' / 'data' / 'processed' / 'cleaning_state.json'
+CLEAN_PARTITIONS = PARTITIONS_DIR / 'clean'
+
+# One observation per key; re-ingested rows replace older ones (last write wins)
+KEY_COLUMNS = ['country', 'indicator_code', 'year', 'source']
+INGESTED_AT = 'ingested_at'
+OBS_KEY = '_obs_key'
+INTERIM_TIMESTAMP = re.compile(r'_(\d{8}_\d{6})$')
 
 
-def load_interims():
-    interim_files = sorted(Path(INTERIM_DIR).glob('**/*.csv'))
-    dfs = []
-    for p in interim_files:
+def interim_timestamp(path: Path) -> pd.Timestamp:
+    # Ingestion names interims ingested_<stem>_<YYYYmmdd_HHMMSS>; fall back to the file mtime
+    m = INTERIM_TIMESTAMP.search(Path(path).stem)
+    if m:
+        return pd.Timestamp(datetime.strptime(m.group(1), '%Y%m%d_%H%M%S'))
+    return pd.Timestamp(os.path.getmtime(path), unit='s')
+
+
+def _read_interims(paths):
+    dfs, loaded = [], []
+    for p in paths:
         try:
-            df = pd.read_csv(p)
-            dfs.append(df)
+            df = read_artifact_file(p)
         except Exception:
             continue
+        df[INGESTED_AT] = interim_timestamp(p)
+        dfs.append(df)
+        loaded.append(Path(p).name)
+    return dfs, loaded
+
+
+def load_interims(paths=None):
+    interim_files = list_artifacts(INTERIM_DIR) if paths is None else paths
+    dfs, _ = _read_interims(interim_files)
     if not dfs:
-        raise FileNotFoundError('No interim CSV files found for cleaning.')
+        raise FileNotFoundError('No interim artifacts found for cleaning.')
     return pd.concat(dfs, ignore_index=True, sort=False)
 
 
+def observation_keys(df: pd.DataFrame) -> pd.Series:
+    # 64-bit hash over the normalized key columns; year is compared numerically so
+    # 2020 and 2020.0 from differently typed interims collapse to the same key
+    keys = pd.DataFrame({
+        c: pd.to_numeric(df[c], errors='coerce').astype('float64') if c == 'year' else df[c].astype('string')
+        for c in KEY_COLUMNS
+    })
+    return pd.util.hash_pandas_object(keys, index=False)
+
+
+def merge_observations(*frames: pd.DataFrame) -> pd.DataFrame:
+    # Vectorized last-write-wins: stable sort by ingestion time, keep the last row per key
+    parts = []
+    for f in frames:
+        if f is None:
+            continue
+        f = normalize(f)
+        if 'source' not in f.columns:
+            f['source'] = pd.NA
+        if INGESTED_AT not in f.columns:
+            f[INGESTED_AT] = pd.NaT
+        if OBS_KEY not in f.columns:
+            f[OBS_KEY] = observation_keys(f)
+        parts.append(f)
+    df = pd.concat(parts, ignore_index=True, sort=False)
+    df = df.sort_values(INGESTED_AT, kind='stable', na_position='first')
+    df = df.drop_duplicates(subset=[OBS_KEY], keep='last')
+    return df.sort_index().reset_index(drop=True)
+
+
+def _load_state():
+    if not CLEANING_STATE.exists() or not artifact_exists(OBSERVATIONS):
+        return None
+    with open(CLEANING_STATE, 'r', encoding='utf-8') as f:
+        return set(json.load(f).get('interims', []))
+
+
+def _save_state(merged) -> None:
+    CLEANING_STATE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CLEANING_STATE.parent / f'.{CLEANING_STATE.name}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'interims': sorted(merged)}, f, indent=2)
+    os.replace(tmp, CLEANING_STATE)
+
+
+def update_observations(incremental: bool = True, budget: MemoryBudget | None = None) -> pd.DataFrame:
+    # Merge only interims not seen before into the stored observation table; rebuild from
+    # the full interim history when there is no state or a merged interim disappeared.
+    budget = budget or MemoryBudget(None)
+    interim_files = list_artifacts(INTERIM_DIR)
+    names = {p.name for p in interim_files}
+    merged = _load_state() if incremental else None
+    if merged is not None and merged <= names:
+        new_files = [p for p in interim_files if p.name not in merged]
+        if budget:
+            stored = find_artifact(OBSERVATIONS)
+            budget.check_bytes(sum(map(artifact_nbytes, new_files + [stored])), 'Cleaning')
+        if not new_files:
+            return read_artifact(OBSERVATIONS)
+        dfs, loaded = _read_interims(new_files)
+        if not dfs:
+            return read_artifact(OBSERVATIONS)
+        observations = merge_observations(read_artifact(OBSERVATIONS), *dfs)
+        merged |= set(loaded)
+    else:
+        if budget:
+            budget.check_bytes(sum(map(artifact_nbytes, interim_files)), 'Cleaning')
+        dfs, loaded = _read_interims(interim_files)
+        if not dfs:
+            raise FileNotFoundError('No interim artifacts found for cleaning.')
+        observations = merge_observations(*dfs)
+        merged = set(loaded)
+    write_artifact(observations, OBSERVATIONS)
+    _save_state(merged)
+    record_lineage(artifact_path(OBSERVATIONS), [INTERIM_DIR / name for name in sorted(merged)], "merge")
+    print(f"Merged {len(loaded)} interim artifact(s) into {len(observations)} unique observations.")
+    return observations
+
+
 def normalize(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+    # Shallow copy: columns below are replaced, never written into, so the caller's frame is untouched
+    df = df.copy(deep=False)
     # Ensure key columns exist
     if 'year' not in df.columns:
         df['year'] = pd.NA
@@ -43,23 +196,173 @@ def normalize(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-    df = normalize(df)
-    # Impute missing target with simple mean per indicator if possible
-    if 'indicator_code' in df.columns and 'target_value' in df.columns:
-        means = df.groupby('indicator_code')['target_value'].transform('mean')
-        df['target_value'] = df['target_value'].fillna(means)
+def order_by_country(df: pd.DataFrame) -> pd.DataFrame:
+    # Rows grouped by country, stable within a country: the order partitioned cleaning writes
+    # its shards in, so both modes produce the same row order
+    keys = partition_keys(df['country']).reset_index(drop=True)
+    return df.iloc[keys.sort_values(kind='stable').index.to_numpy()].reset_index(drop=True)
+
+
+def _indicator_keys(df: pd.DataFrame) -> pd.Series:
+    # Indicator codes as they are when gaps are filled (missing ones filled with UNKNOWN)
+    return df['indicator_code'].astype('string').fillna('UNKNOWN')
+
+
+def cleaning_stats(df: pd.DataFrame) -> dict:
+    # Statistics spanning countries, over a normalized table
+    return {
+        'indicator_medians': group_medians([_indicator_keys(df)], [df['target_value']]),
+        'year_min': df['year'].min(),
+    }
+
+
+def clean_dataframe(df: pd.DataFrame, stats: dict | None = None, vocabulary: dict | None = None,
+                    output: Path | None = CLEANED_OUTPUT) -> pd.DataFrame:
+    # Partitioned cleaning passes the whole table's stats and vocabulary for each country shard
+    df = order_by_country(normalize(df))
+    stats = cleaning_stats(df) if stats is None else stats
     # Ensure minimal required structure
-    df = df.fillna({'country':'UNKNOWN', 'indicator_code':'UNKNOWN', 'year': df['year'].min() if 'year' in df else 0})
+    df = df.fillna({'country': MISSING_KEY, 'indicator_code': 'UNKNOWN', 'year': stats['year_min']})
+    # Gap-fill every (country, indicator_code) series (see impute.py); the observed value stays
+    # in `value` and impute_method records how each cell of target_value was filled
+    df['target_value'], df[METHOD_COLUMN] = fill_gaps(df, stats['indicator_medians'])
+    # Dedup bookkeeping columns stay in the observation table only
+    df = df.drop(columns=[c for c in (OBS_KEY, INGESTED_AT) if c in df.columns])
+    # Compact schema: categorical codes, Int16 years (see logic/storage/memory.py)
+    df = compact_frame(df, vocabulary)
     # Output a cleaned copy
-    df.to_csv(CLEANED_OUTPUT, index=False)
+    if output is not None:
+        write_artifact(df, output)
     return df
 
 
-def main():
-    df = load_interims()
+def _country_keys(df: pd.DataFrame) -> pd.Series:
+    return partition_keys(df['country'] if 'country' in df.columns else pd.Series(pd.NA, index=df.index))
+
+
+def _interim_chunks(files, loaded: list, schema_parts: list):
+    # Interim rows chunk by chunk, tagged like _read_interims; unreadable files are skipped
+    for p in files:
+        try:
+            chunks = iter(iter_artifact_file(p, CHUNK_ROWS))
+            chunk = next(chunks, None)
+        except Exception:
+            continue
+        if chunk is None:
+            chunk = read_artifact_file(p)
+        loaded.append(Path(p).name)
+        ts = interim_timestamp(p)
+        while chunk is not None:
+            chunk[INGESTED_AT] = ts
+            schema_parts.append(chunk.iloc[:0])
+            yield chunk
+            chunk = next(chunks, None)
+
+
+def _observe_partition(task) -> dict:
+    # Pass 1 for one country: last-write-wins merge and quality check, returning this shard's
+    # share of the cross-country statistics
+    parts, schema, rules, output = task
+    observations = conform(merge_observations(*[read_artifact_file(p) for p in parts]), schema)
+    path = write_shard(observations, output)
+    df, summary = apply_quality(observations, rules, summary_path=None)
+    df = normalize(df)
+    return {
+        'path': path,
+        'rows': len(observations),
+        'summary': summary,
+        'indicator': _indicator_keys(df),
+        'target': df['target_value'],
+        'year_min': df['year'].min(),
+        'vocabulary': observed_vocabulary(df.fillna({'country': MISSING_KEY, 'indicator_code': 'UNKNOWN'})),
+    }
+
+
+def _clean_partition(task) -> Path:
+    # Pass 2: the in-memory cleaning steps on one country, with the global statistics
+    observations, rules, stats, vocabulary, output = task
+    df, _ = apply_quality(read_artifact_file(observations), rules, summary_path=None)
+    return write_shard(clean_dataframe(df, stats, vocabulary, output=None), output)
+
+
+def clean_partitioned(workers: int = DEFAULT_WORKERS, budget: MemoryBudget | None = None) -> bool:
+    # Out-of-core cleaning: interims are sharded by country to disk, then processed shard by
+    # shard in a process pool. The output equals the in-memory path's; the observation table
+    # is always rebuilt from every interim. Returns False when there is nothing to shard.
+    budget = budget or MemoryBudget(None)
+    interim_files = list_artifacts(INTERIM_DIR)
+    loaded, schema_parts = [], []
+    shards = write_shards(_interim_chunks(interim_files, loaded, schema_parts), CLEAN_PARTITIONS / 'interim', _country_keys)
+    if not loaded:
+        raise FileNotFoundError('No interim artifacts found for cleaning.')
+    if not shards:
+        return False
+    # Column order and dtypes of the in-memory observation table, from the empty interim chunks
+    schema = merge_observations(*schema_parts)
+    keys = sorted(shards)
+    workers = plan_workers(shards, workers, budget, 'Cleaning')
+    rules = load_rules()
+    tasks = [(shards[k], schema, rules, shard_dir(CLEAN_PARTITIONS / 'observations', k) / 'part-000000') for k in keys]
+    first = map_shards(_observe_partition, tasks, workers)
+
+    combine_shards([r['path'] for r in first], OBSERVATIONS)
+    _save_state(set(loaded))
+    record_lineage(artifact_path(OBSERVATIONS), [INTERIM_DIR / name for name in sorted(loaded)], "merge")
+    print(f"Merged {len(loaded)} interim artifact(s) into {sum(r['rows'] for r in first)} unique observations "
+          f"({len(keys)} country partitions, {workers} worker(s)).")
+    summary = combine_summaries([r['summary'] for r in first])
+    write_summary(summary, QUALITY_SUMMARY)
+    print(f"Quality check: {summary['rejected_rows']} of {summary['rows']} rows rejected, "
+          f"{summary['clean_rows']} without flags (summary: {QUALITY_SUMMARY})")
+
+    stats = {
+        'indicator_medians': group_medians([r['indicator'] for r in first], [r['target'] for r in first]),
+        'year_min': pd.Series([r['year_min'] for r in first]).min(),
+    }
+    vocabulary = merge_vocabularies([r['vocabulary'] for r in first], config_vocabulary())
+    tasks = [(r['path'], rules, stats, vocabulary, shard_dir(CLEAN_PARTITIONS / 'cleaned', k) / 'part-000000')
+             for k, r in zip(keys, first)]
+    combine_shards(map_shards(_clean_partition, tasks, workers), CLEANED_OUTPUT)
+    shutil.rmtree(CLEAN_PARTITIONS, ignore_errors=True)
+    return True
+
+
+def main(incremental: bool = True, memory_budget=None, partitioned: bool = False,
+         workers: int = DEFAULT_WORKERS) -> pd.DataFrame | None:
+    # Partitioned runs (or a budget the in-memory path would exceed) leave the cleaned table on
+    # disk only and return None
+    budget = MemoryBudget(memory_budget)
+    if not partitioned:
+        try:
+            df = update_observations(incremental=incremental, budget=budget)
+        except MemoryBudgetExceeded as e:
+            print(f"{e} Switching to partitioned cleaning.")
+            partitioned = True
+    if partitioned:
+        if clean_partitioned(workers, budget):
+            record_lineage(artifact_path(CLEANED_OUTPUT), [artifact_path(OBSERVATIONS)], "clean")
+            print(f"Cleaned data written to {CLEANED_OUTPUT}")
+            return None
+        df = update_observations(incremental=False)
+    # Schema / allow-list validation: flags every row, drops rows that cannot be used at all
+    df, summary = apply_quality(df)
+    print(f"Quality check: {summary['rejected_rows']} of {summary['rows']} rows rejected, "
+          f"{summary['clean_rows']} without flags (summary: {QUALITY_SUMMARY})")
     df_clean = clean_dataframe(df)
+    record_lineage(artifact_path(CLEANED_OUTPUT), [artifact_path(OBSERVATIONS)], "clean")
     print(f"Cleaned data written to {CLEANED_OUTPUT}")
+    return df_clean
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='STEP 4: merge interims, validate and clean.')
+    parser.add_argument('--full', action='store_true', help='Rebuild the observation table from every interim.')
+    parser.add_argument('--partitioned', action='store_true', help='Clean country partitions out of core in a process pool.')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Processes for partitioned cleaning.')
+    parser.add_argument('--memory-budget', default=None, help='e.g. 2G; cleaning switches to partitions when exceeded.')
+    return parser.parse_args(argv)
+
 
 if __name__ == '__main__':
-    main()
+    args = parse_args()
+    main(incremental=not args.full, memory_budget=args.memory_budget, partitioned=args.partitioned, workers=args.workers)
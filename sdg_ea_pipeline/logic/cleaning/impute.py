@@ -0,0 +1,82 @@
+from __future__ import annotations
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sdg_ea_pipeline.logic.storage.partitions import group_medians, lookup
+
+SERIES_KEYS = ["country", "indicator_code"]
+# Fill chain: each method only fills cells the previous ones left missing
+#   interpolate - linear in year between the series' previous and next observation
+#   ffill       - the series' last observation, carried at most FFILL_MAX_GAP years forward
+#   median      - the indicator's median over every observed value (all countries and years)
+METHODS = ("interpolate", "ffill", "median")
+FFILL_MAX_GAP = 2
+METHOD_COLUMN = "impute_method"
+# Per-cell flag categories; alphabetical, the order compact_frame gives label columns
+FLAGS = ("ffill", "interpolated", "median", "observed", "unfilled")
+FLAG_FOR_METHOD = {"interpolate": "interpolated", "ffill": "ffill", "median": "median"}
+
+# Gap filling for every (country, indicator_code) series at once: one sort puts each series in
+# a contiguous block ordered by year, and running max / min scans over observation positions
+# give every cell its previous and next observation. No step loops over series, so the cost is
+# one sort plus a few array passes, whatever the number of series.
+
+
+def _neighbours(observed: np.ndarray, series: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Positions of the previous / next observation (at or around each cell) in the same series
+    n = len(observed)
+    idx = np.arange(n)
+    prev = np.maximum.accumulate(np.where(observed, idx, -1)) if n else idx
+    nxt = np.minimum.accumulate(np.where(observed, idx, n)[::-1])[::-1] if n else idx
+    p, q = np.where(prev >= 0, prev, 0), np.where(nxt < n, nxt, 0)
+    has_prev = (prev >= 0) & (series[p] == series)
+    has_next = (nxt < n) & (series[q] == series)
+    return p, q, has_prev, has_next
+
+
+def fill_gaps(df: pd.DataFrame, medians: Optional[pd.Series] = None, methods: Sequence[str] = METHODS,
+              max_gap: float = FFILL_MAX_GAP, column: str = "target_value") -> Tuple[np.ndarray, pd.Categorical]:
+    # Returns the filled values and the per-cell method flag, both in the row order of df.
+    # Partitioned cleaning passes the medians of the whole table.
+    unknown = set(methods) - set(FLAG_FOR_METHOD)
+    if unknown:
+        raise ValueError(f"Unknown imputation method(s) {sorted(unknown)}; expected {list(FLAG_FOR_METHOD)}")
+    values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    years = pd.to_numeric(df["year"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    series = df.groupby(SERIES_KEYS, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    order = np.lexsort((years, series))
+    v, y, s = values[order], years[order], series[order]
+
+    observed = ~np.isnan(v)
+    filled = v.copy()
+    flags = np.where(observed, FLAGS.index("observed"), FLAGS.index("unfilled")).astype(np.int8)
+    p, q, has_prev, has_next = _neighbours(observed, s)
+    for method in methods:
+        todo = flags == FLAGS.index("unfilled")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if method == "interpolate":
+                span = y[q] - y[p]
+                weight = np.where(span > 0, (y - y[p]) / span, 0.0)
+                estimate = v[p] + (v[q] - v[p]) * weight
+                todo &= has_prev & has_next
+            elif method == "ffill":
+                estimate = v[p]
+                todo &= has_prev & (y - y[p] <= max_gap)
+            else:
+                if medians is None:
+                    medians = group_medians([df["indicator_code"]], [pd.Series(values)])
+                estimate = lookup(df["indicator_code"], medians).to_numpy(dtype=float, na_value=np.nan)[order]
+        todo &= ~np.isnan(estimate)
+        filled[todo] = estimate[todo]
+        flags[todo] = FLAGS.index(FLAG_FOR_METHOD[method])
+
+    out = np.empty_like(filled)
+    out[order] = filled
+    codes = np.empty_like(flags)
+    codes[order] = flags
+    return out, pd.Categorical.from_codes(codes, categories=list(FLAGS))
+
+
+__all__ = ["FFILL_MAX_GAP", "FLAGS", "METHODS", "METHOD_COLUMN", "fill_gaps"]
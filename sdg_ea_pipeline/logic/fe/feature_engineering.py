@@ -1,18 +1,80 @@
 from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+import sys
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[3]
-CLEANED_PATH = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "cleaned.csv"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sdg_ea_pipeline.logic.ingestion.provenance_store import record_lineage
+from sdg_ea_pipeline.logic.storage.artifacts import (
+    artifact_columns,
+    artifact_exists,
+    artifact_path,
+    find_artifact,
+    iter_artifact_file,
+    open_artifact_writer,
+    read_artifact,
+    write_artifact,
+)
+from sdg_ea_pipeline.logic.storage.memory import (
+    YEAR_DTYPE,
+    MemoryBudget,
+    MemoryBudgetExceeded,
+    artifact_nbytes,
+    compact_frame,
+    config_vocabulary,
+)
+from sdg_ea_pipeline.logic.storage.partitions import (
+    CHUNK_ROWS,
+    DEFAULT_WORKERS,
+    PARTITIONS_DIR,
+    combine_shards,
+    group_means,
+    lookup,
+    map_shards,
+    merge_vocabularies,
+    observed_vocabulary,
+    partition_keys,
+    plan_workers,
+    read_shard,
+    shard_dir,
+    write_shard,
+    write_shards,
+)
+
+CLEANED_PATH = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "cleaned"
 OUTPUT_DIR = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "fe"
-FEATURES_OUTPUT = OUTPUT_DIR / "features.csv"
-FEATURES_LONG_OUTPUT = OUTPUT_DIR / "features_long.csv"
+FEATURES_OUTPUT = OUTPUT_DIR / "features"
+FEATURES_LONG_OUTPUT = OUTPUT_DIR / "features_long"
+# Feature settings used for the stored features (incremental runs must match them)
+FEATURES_STATE = OUTPUT_DIR / "features_state.json"
+FE_PARTITIONS = PARTITIONS_DIR / "features"
+
+SERIES_KEYS = ["country", "indicator_code"]
+# Rolling windows (in observations) and statistics, e.g. rolling_mean_3 / rolling_std_3
+ROLLING_WINDOWS = (3,)
+ROLLING_STATS = ("mean", "std", "min", "max")
+LAGS = (1,)
+SORT_COLUMNS = SERIES_KEYS + ["year"]
+# The only per-row inputs features depend on; other cleaned columns are passed through
+FEATURE_INPUTS = ["year", "target_value"]
+LONG_ID_COLUMNS = ["country", "indicator_code", "year"]
 
 
 def load_cleaned() -> pd.DataFrame:
-    if not CLEANED_PATH.exists():
+    if not artifact_exists(CLEANED_PATH):
         raise FileNotFoundError(f"Cleaned data not found at {CLEANED_PATH}. Run STEP 4 first.")
-    df = pd.read_csv(CLEANED_PATH)
+    return select_target(read_artifact(CLEANED_PATH))
+
+
+def select_target(df: pd.DataFrame) -> pd.DataFrame:
     # Normalize target column to a unified name
     if 'target_value' in df.columns:
         df = df.rename(columns={'target_value': 'target_value'})
@@ -23,47 +85,378 @@ def load_cleaned() -> pd.DataFrame:
     return df
 
 
+def _upper(col: pd.Series) -> pd.Series:
+    # Categorical codes are upper-cased once per category instead of once per row
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        upper = col.cat.categories.astype(str).str.upper()
+        if upper.is_unique:
+            return col.cat.rename_categories(upper)
+    return col.astype(str).str.upper()
+
+
 def harmonize_input(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+    # Shallow copy: only whole columns are replaced
+    df = df.copy(deep=False)
     if 'country' in df.columns:
-        df['country'] = df['country'].astype(str).str.upper()
+        df['country'] = _upper(df['country'])
     if 'indicator_code' in df.columns:
-        df['indicator_code'] = df['indicator_code'].astype(str).str.upper()
+        df['indicator_code'] = _upper(df['indicator_code'])
     return df
 
 
-def compute_features(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.sort_values(by=["country", "indicator_code", "year"]).copy()
+def _shifted(values: np.ndarray, pos: np.ndarray, k: int) -> np.ndarray:
+    # Value k observations earlier in the same series (NaN across series boundaries)
+    out = np.full(len(values), np.nan)
+    if k < len(values):
+        out[k:] = values[:len(values) - k]
+    out[pos < k] = np.nan
+    return out
+
+
+def _rolling(values: np.ndarray, pos: np.ndarray, window: int) -> dict:
+    # Trailing window as an (n, window) matrix of shifted copies; min_periods=1, std with ddof=1
+    stack = np.column_stack([values] + [_shifted(values, pos, k) for k in range(1, window)])
+    valid = ~np.isnan(stack)
+    count = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(valid, stack, 0.0).sum(axis=1) / count
+        sq = np.where(valid, (stack - mean[:, None]) ** 2, 0.0).sum(axis=1)
+        std = np.sqrt(sq / (count - 1))
+    empty = count == 0
+    return {
+        "mean": np.where(empty, np.nan, mean),
+        "std": np.where(count < 2, np.nan, std),
+        "min": np.where(empty, np.nan, np.where(valid, stack, np.inf).min(axis=1)),
+        "max": np.where(empty, np.nan, np.where(valid, stack, -np.inf).max(axis=1)),
+    }
+
+
+def risk_levels(df: pd.DataFrame, indicator_means: pd.Series | None = None) -> pd.Series:
+    # Simple risk indicator: below the indicator's mean => low, above => high
+    means = group_means([df['indicator_code']], [df['target_value']]) if indicator_means is None else indicator_means
+    return (df['target_value'] > lookup(df['indicator_code'], means)).map({True: 'high', False: 'low'})
+
+
+def compute_features(df: pd.DataFrame, windows=ROLLING_WINDOWS, stats=ROLLING_STATS, lags=LAGS,
+                     indicator_means: pd.Series | None = None) -> pd.DataFrame:
+    # Partitioned runs pass the per-indicator means of the whole table for risk_level
     if 'target_value' not in df.columns:
         raise ValueError("Input dataframe must contain 'target_value' column.")
-    # YoY change with grouping; safe for stable environments
-    df['yoy_change'] = df.groupby(["country", "indicator_code"])["target_value"].transform(lambda s: s.pct_change()) * 100
-    # Simple risk indicator: below mean => low, above mean => high
-    mean_by_group = df.groupby(['indicator_code'])['target_value'].transform('mean')
-    df['risk_level'] = (df['target_value'] > mean_by_group).map({True: 'high', False: 'low'})
-    df['year'] = df['year'].astype('Int64')
+    # Sorting makes every (country, indicator_code) series a contiguous block; all features
+    # below are NumPy sweeps over the whole column, masked by the position within the block.
+    df = df.sort_values(by=SORT_COLUMNS, kind="stable").reset_index(drop=True)
+    pos = df.groupby(SERIES_KEYS, sort=False, dropna=False, observed=True).cumcount().to_numpy()
+    values = pd.to_numeric(df['target_value'], errors='coerce').to_numpy(dtype=float)
+    years = pd.to_numeric(df['year'], errors='coerce').to_numpy(dtype=float)
+
+    prev = _shifted(values, pos, 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # YoY change: percentage change against the previous observation of the series
+        df['yoy_change'] = (values - prev) / prev * 100
+    for k in lags:
+        df[f'lag_{k}'] = prev if k == 1 else _shifted(values, pos, k)
+    for window in windows:
+        rolled = _rolling(values, pos, window)
+        for stat in stats:
+            df[f'rolling_{stat}_{window}'] = rolled[stat]
+
+    # CAGR (%) since the first observation of the series
+    start = np.arange(len(df)) - pos
+    first_value, first_year = values[start], years[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        span = years - first_year
+        ratio = values / first_value
+        cagr = (np.power(ratio, 1.0 / span) - 1) * 100
+    df['cagr'] = np.where((span > 0) & (first_value > 0) & (ratio >= 0), cagr, np.nan)
+
+    # Value used by dashboards; cleaning gap-fills target_value per series (impute_method says how)
+    if 'value_filled' not in df.columns:
+        df['value_filled'] = df['target_value']
+    df['risk_level'] = risk_levels(df, indicator_means)
+    df['year'] = df['year'].astype(YEAR_DTYPE)
     return df
 
 
+def _feature_settings(windows=ROLLING_WINDOWS, stats=ROLLING_STATS, lags=LAGS) -> dict:
+    return {"windows": list(windows), "stats": list(stats), "lags": list(lags)}
+
+
+def _content_hash(df: pd.DataFrame, columns) -> np.ndarray:
+    # Per-row hash of `columns`. Numbers are compared as float64 so e.g. year int64 vs Int64
+    # after an artifact round trip still match; anything else as strings (categoricals too).
+    content = np.zeros(len(df), dtype=np.uint64)
+    for c in columns:
+        col = df[c]
+        if pd.api.types.is_numeric_dtype(col.dtype):
+            values = pd.to_numeric(col, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        else:
+            values = col.astype("string").to_numpy(dtype=object, na_value=None)
+        content = content * np.uint64(1000003) ^ pd.util.hash_array(values)
+    return content
+
+
+def _row_hashes(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    # (series id, row content) hashes over the only inputs features depend on. Keys are only
+    # hashed once per run of equal (country, indicator_code) rows, which on a sorted table is
+    # once per series.
+    n = len(df)
+    starts = np.zeros(n, dtype=bool)
+    starts[:1] = True
+    for c in SERIES_KEYS:
+        col = df[c]
+        starts[1:] |= col.ne(col.shift()).to_numpy(dtype=bool, na_value=True)[1:]
+    start_rows = np.flatnonzero(starts)
+    block_hash = np.zeros(len(start_rows), dtype=np.uint64)
+    for c in SERIES_KEYS:
+        values = df[c].iloc[start_rows].to_numpy(dtype=object, na_value=None)
+        block_hash = block_hash * np.uint64(1000003) ^ pd.util.hash_array(values)
+    sid = block_hash[np.cumsum(starts) - 1]
+    content = _content_hash(df, FEATURE_INPUTS)
+    return sid, sid ^ (content * np.uint64(0x9E3779B97F4A7C15))
+
+
+def _missing_from(values: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    # Hash-table lookup: True where a row hash of `values` does not occur in `reference`
+    return pd.Index(reference).unique().get_indexer(values) < 0
+
+
+def incremental_features(df: pd.DataFrame, previous: pd.DataFrame, windows=ROLLING_WINDOWS,
+                         stats=ROLLING_STATS, lags=LAGS) -> tuple[pd.DataFrame, dict]:
+    # Recompute only the tails of series whose input rows changed since `previous` was built.
+    # A changed series is recomputed from its first changed year on, using `context` earlier
+    # rows (enough for every lag/window) plus the series' first row (for CAGR) as history.
+    # Pass-through columns (source, value, reliability, ...) always come from `df`; rows where
+    # only they changed are counted in rows_updated, so the caller knows to save the table.
+    if previous.empty:
+        out = compute_features(df, windows, stats, lags)
+        return out, {"series_changed": int(out.groupby(SERIES_KEYS, sort=False, dropna=False, observed=True).ngroups),
+                     "rows_recomputed": len(out), "rows_updated": 0}
+    feature_cols = [c for c in previous.columns if c not in df.columns]
+    passthrough = [c for c in df.columns if c in previous.columns and c not in SERIES_KEYS + FEATURE_INPUTS]
+    df = df.sort_values(by=SORT_COLUMNS, kind="stable").reset_index(drop=True)
+    sid, new_hash = _row_hashes(df)
+    old_sid, old_hash = _row_hashes(previous)
+
+    # Hash-table match of every new row against the stored rows (first occurrence wins)
+    old_index = pd.Index(old_hash)
+    if old_index.is_unique:
+        match = old_index.get_indexer(new_hash)
+    else:
+        first = np.flatnonzero(~old_index.duplicated())
+        lookup = pd.Index(old_hash[first]).get_indexer(new_hash)
+        match = np.where(lookup >= 0, first[lookup], -1)
+    new_changed = match < 0
+    old_removed = np.ones(len(previous), dtype=bool)
+    old_removed[match[~new_changed]] = False
+
+    years = pd.to_numeric(df["year"], errors="coerce").to_numpy(dtype=float)
+    old_years = pd.to_numeric(previous["year"], errors="coerce").to_numpy(dtype=float)
+    changes = pd.Series(
+        np.concatenate([years[new_changed], old_years[old_removed]]),
+        index=np.concatenate([sid[new_changed], old_sid[old_removed]]),
+    )
+    first_changed_year = changes.groupby(level=0).min()
+    kept = np.flatnonzero(~new_changed)
+    updated = _content_hash(df.iloc[kept], passthrough) != _content_hash(previous.iloc[match[kept]], passthrough)
+    stats_out = {"series_changed": int(len(first_changed_year)), "rows_recomputed": 0,
+                 "rows_updated": int(updated.sum())}
+
+    # Sorted input: series are contiguous blocks, delimited where the series id changes
+    starts = np.ones(len(df), dtype=bool)
+    starts[1:] = sid[1:] != sid[:-1]
+    block = np.cumsum(starts) - 1
+    pos = np.arange(len(df)) - np.flatnonzero(starts)[block]
+    fcy = pd.Series(sid).map(first_changed_year).to_numpy(dtype=float)
+    tail = ~np.isnan(fcy) & (years >= fcy)
+    fresh = None
+    if tail.any():
+        big = np.iinfo(np.int64).max
+        first_changed_pos = np.minimum.reduceat(np.where(tail, pos, big), np.flatnonzero(starts))[block]
+        context = max(max(windows, default=1) - 1, max(lags, default=1), 1)
+        history = tail | (~np.isnan(fcy) & ((pos >= first_changed_pos - context) | (pos == 0)))
+        subset = df.loc[history].assign(_row=np.flatnonzero(history))
+        fresh = compute_features(subset, windows, stats, lags).set_index("_row").loc[np.flatnonzero(tail)]
+        stats_out["rows_recomputed"] = int(tail.sum())
+
+    # Splice: untouched rows keep their stored features, changed tails take the recomputed ones
+    out = df
+    src = np.where(tail, 0, match)
+    tail_rows = np.flatnonzero(tail)
+    for c in feature_cols:
+        if c == "risk_level":
+            continue
+        values = previous[c].to_numpy()[src]
+        if fresh is not None:
+            update = fresh[c].to_numpy()
+            if values.dtype != update.dtype:
+                values = values.astype(np.result_type(values.dtype, update.dtype))
+            values[tail_rows] = update
+        out[c] = values
+    # risk_level compares against per-indicator means, which any changed series can move
+    out['risk_level'] = risk_levels(out)
+    out['year'] = out['year'].astype(YEAR_DTYPE)
+    return out, stats_out
+
+
+def load_previous_features(columns, windows=ROLLING_WINDOWS, stats=ROLLING_STATS, lags=LAGS):
+    # Stored features are only reusable if built with the same settings and input columns
+    # An empty table (e.g. every row was rejected last time) has nothing to reuse either
+    if not FEATURES_STATE.exists() or not artifact_exists(FEATURES_OUTPUT):
+        return None
+    with open(FEATURES_STATE, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("settings") != _feature_settings(windows, stats, lags) or state.get("input_columns") != list(columns):
+        return None
+    previous = read_artifact(FEATURES_OUTPUT)
+    return previous if len(previous) else None
+
+
+def _save_state(columns) -> None:
+    tmp = FEATURES_STATE.parent / f".{FEATURES_STATE.name}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"settings": _feature_settings(), "input_columns": list(columns)}, f, indent=2)
+    os.replace(tmp, FEATURES_STATE)
+
+
+def _long_columns(columns) -> list:
+    value_cols = ["target_value", "yoy_change", "cagr"] + [c for c in columns if c.startswith(("lag_", "rolling_"))]
+    return [c for c in value_cols if c in columns]
+
+
+def _melt(df: pd.DataFrame, value_vars: list) -> pd.DataFrame:
+    return df.melt(id_vars=LONG_ID_COLUMNS, value_vars=value_vars, var_name="feature", value_name="feature_value")
+
+
+def _record_lineage() -> None:
+    record_lineage(artifact_path(FEATURES_OUTPUT), [artifact_path(CLEANED_PATH)], "features")
+    record_lineage(artifact_path(FEATURES_LONG_OUTPUT), [artifact_path(FEATURES_OUTPUT)], "features")
+
+
 def save_outputs(df: pd.DataFrame) -> None:
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    df.to_csv(FEATURES_OUTPUT, index=False)
-    long = df.copy()
-    value_cols = ["target_value", "yoy_change"]
-    available = [c for c in value_cols if c in long.columns]
+    write_artifact(df, FEATURES_OUTPUT)
+    long = df
+    available = _long_columns(df.columns)
     if available:
-        long = long.melt(id_vars=["country", "indicator_code", "year"], value_vars=available,
-                         var_name="feature", value_name="feature_value")
-    long.to_csv(FEATURES_LONG_OUTPUT, index=False)
+        long = _melt(long, available)
+    write_artifact(long, FEATURES_LONG_OUTPUT)
+    _record_lineage()
+
 
+def _feature_keys(df: pd.DataFrame) -> pd.Series:
+    # Series are keyed on harmonized codes, so shard on the harmonized country
+    return partition_keys(_upper(df['country']))
 
-def main():
-    df = load_cleaned()
+
+def _profile_partition(parts) -> dict:
+    # Pass 1 for one country: its rows in compute_features order, for the per-indicator means
+    df = harmonize_input(select_target(read_shard(parts)))
+    df = df.sort_values(by=SORT_COLUMNS, kind="stable")
+    country = df['country']
+    # Position of the shard in the in-memory sort: category code, or the code itself
+    rank = int(country.cat.codes.iloc[0]) if isinstance(country.dtype, pd.CategoricalDtype) else str(country.iloc[0])
+    return {
+        'rank': rank,
+        'columns': list(df.columns),
+        'indicator': df['indicator_code'],
+        'target': df['target_value'],
+        'vocabulary': observed_vocabulary(df),
+    }
+
+
+def _features_partition(task) -> Path:
+    # Pass 2: the in-memory feature computation on one country, with the global statistics
+    parts, means, vocabulary, output = task
+    df = harmonize_input(select_target(read_shard(parts)))
+    return write_shard(compact_frame(compute_features(df, indicator_means=means), vocabulary), output)
+
+
+def features_partitioned(workers: int = DEFAULT_WORKERS, budget: MemoryBudget | None = None) -> bool:
+    # Out-of-core features: the cleaned table is sharded by country to disk and every shard is
+    # computed in a process pool with the per-indicator means of the whole table. Always a full
+    # recompute; the output equals the in-memory path's. Returns False when there are no rows.
+    budget = budget or MemoryBudget(None)
+    path = find_artifact(CLEANED_PATH)
+    if path is None:
+        raise FileNotFoundError(f"Cleaned data not found at {CLEANED_PATH}. Run STEP 4 first.")
+    shards = write_shards(iter_artifact_file(path, CHUNK_ROWS), FE_PARTITIONS / "cleaned", _feature_keys)
+    if not shards:
+        return False
+    workers = plan_workers(shards, workers, budget, "Feature Engineering")
+    keys = list(shards)
+    first = map_shards(_profile_partition, [shards[k] for k in keys], workers)
+    order = sorted(range(len(keys)), key=lambda i: first[i]['rank'])
+    first = [first[i] for i in order]
+    keys = [keys[i] for i in order]
+
+    means = group_means([r['indicator'] for r in first], [r['target'] for r in first])
+    levels = set()
+    for r in first:
+        levels.update((r['target'] > lookup(r['indicator'], means)).map({True: 'high', False: 'low'}))
+    vocabulary = merge_vocabularies([r['vocabulary'] for r in first] + [{'risk_level': levels}], config_vocabulary())
+    tasks = [(shards[k], means, vocabulary, shard_dir(FE_PARTITIONS / "features", k) / "part-000000") for k in keys]
+    combine_shards(map_shards(_features_partition, tasks, workers), FEATURES_OUTPUT)
+    # Long format is feature-major, as melt lays it out: one projected sweep over the
+    # combined features per feature column, cast to the common dtype melt gives all of them
+    features = find_artifact(FEATURES_OUTPUT)
+    value_cols = _long_columns(artifact_columns(FEATURES_OUTPUT))
+    head = next(iter_artifact_file(features, 1, LONG_ID_COLUMNS + value_cols))
+    value_dtype = _melt(head.head(1), value_cols)["feature_value"].dtype
+    with open_artifact_writer(FEATURES_LONG_OUTPUT) as writer:
+        for col in value_cols:
+            for chunk in iter_artifact_file(features, CHUNK_ROWS, LONG_ID_COLUMNS + [col]):
+                writer.write(_melt(chunk, [col]).astype({"feature_value": value_dtype}))
+    _record_lineage()
+    _save_state(first[0]['columns'])
+    shutil.rmtree(FE_PARTITIONS, ignore_errors=True)
+    print(f"Features computed over {len(keys)} country partitions with {workers} worker(s).")
+    return True
+
+
+def main(cleaned: pd.DataFrame | None = None, incremental: bool = True, memory_budget=None,
+         partitioned: bool = False, workers: int = DEFAULT_WORKERS) -> pd.DataFrame | None:
+    # In-process callers (run_pipeline) hand over the cleaned frame directly. Partitioned runs
+    # (or a budget the in-memory path would exceed) leave the features on disk and return None.
+    budget = MemoryBudget(memory_budget)
+    if not partitioned and budget:
+        try:
+            if cleaned is not None:
+                budget.check(cleaned, "Feature Engineering")
+            elif artifact_exists(CLEANED_PATH):
+                budget.check_bytes(artifact_nbytes(find_artifact(CLEANED_PATH)), "Feature Engineering")
+        except MemoryBudgetExceeded as e:
+            print(f"{e} Switching to partitioned feature engineering.")
+            partitioned = True
+    if partitioned and features_partitioned(workers, budget):
+        print(f"Features written: {FEATURES_OUTPUT} and {FEATURES_LONG_OUTPUT}")
+        return None
+    df = load_cleaned() if cleaned is None else select_target(cleaned)
     df = harmonize_input(df)
-    df = compute_features(df)
+    input_columns = list(df.columns)
+    previous = load_previous_features(input_columns) if incremental else None
+    if previous is not None and len(previous):
+        df, stats = incremental_features(df, previous)
+        df = compact_frame(df)
+        print(f"Incremental features: {stats['series_changed']} changed series, {stats['rows_recomputed']} rows "
+              f"recomputed, {stats['rows_updated']} rows with updated pass-through columns.")
+        if stats["rows_recomputed"] == 0 and stats["rows_updated"] == 0 and len(df) == len(previous):
+            return df
+    else:
+        df = compact_frame(compute_features(df))
     save_outputs(df)
+    _save_state(input_columns)
     print(f"Features written: {FEATURES_OUTPUT} and {FEATURES_LONG_OUTPUT}")
+    return df
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="STEP 5: engineer features from the cleaned table.")
+    parser.add_argument("--full", action="store_true", help="Recompute every series instead of changed tails only.")
+    parser.add_argument("--partitioned", action="store_true", help="Compute country partitions out of core in a process pool.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Processes for partitioned feature engineering.")
+    parser.add_argument("--memory-budget", default=None, help="e.g. 2G; switches to partitions when exceeded.")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(incremental=not args.full, memory_budget=args.memory_budget, partitioned=args.partitioned, workers=args.workers)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from sdg_ea_pipeline.logic.storage.artifacts import find_artifact, read_artifact_file, write_artifact
+from sdg_ea_pipeline.logic.storage.fingerprint import file_digest
+
+ROOT = Path(__file__).resolve().parents[3]
+# Parsed workbooks, one columnar artifact per workbook content digest
+SIDECAR_DIR = ROOT / "sdg_ea_pipeline" / "data" / "raw" / "sidecars"
+# Part of the sidecar name: bump when parsing changes so older sidecars are not reused
+SIDECAR_VERSION = 1
+SHEET_COLUMN = "sheet"
+DEFAULT_SHEET_WORKERS = min(4, os.cpu_count() or 1)
+
+# Excel parsing is pure Python and by far the slowest way into ingestion. A workbook is parsed
+# once per content digest into a sidecar (Parquet / Arrow / CSV, as configured for artifacts).
+# The ingest manifest already skips unchanged files, so a sidecar is read when the same bytes
+# are ingested again anyway: under --force, or as a copy dropped under another name. Sidecars
+# of content no placeholder still has are pruned after each ingestion. Workbooks with several
+# sheets are parsed one sheet per worker process and tagged with a `sheet` column.
+
+
+def sidecar_base(digest: str) -> Path:
+    return SIDECAR_DIR / f"v{SIDECAR_VERSION}_{digest}"
+
+
+def prune_sidecars(keep: Iterable[str]) -> int:
+    # Removes sidecars of content no placeholder has any more (older revisions, deleted
+    # workbooks, an older SIDECAR_VERSION); returns how many were removed
+    keep = {sidecar_base(d).name for d in keep}
+    removed = 0
+    for p in SIDECAR_DIR.glob("*"):
+        if p.is_file() and p.name.split(".", 1)[0] not in keep:
+            p.unlink()
+            removed += 1
+    return removed
+
+
+def _read_sheet(task) -> pd.DataFrame:
+    path, sheet = task
+    return pd.read_excel(path, sheet_name=sheet)
+
+
+def parse_workbook(path: Path, workers: int = DEFAULT_SHEET_WORKERS,
+                   required: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    # A single sheet is read as before, untagged. With several sheets, those lacking the
+    # `required` columns (notes, lookups, charts) are skipped.
+    with pd.ExcelFile(path) as book:
+        sheets = list(book.sheet_names)
+        if len(sheets) <= 1:
+            return book.parse(sheets[0] if sheets else 0)
+    tasks = [(str(path), s) for s in sheets]
+    if workers <= 1:
+        frames = [_read_sheet(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            frames = list(pool.map(_read_sheet, tasks))
+    required = set(required or ())
+    tagged = []
+    for sheet, df in zip(sheets, frames):
+        missing = required - set(df.columns)
+        if missing:
+            logging.info(f"Skipping sheet '{sheet}' of {Path(path).name}: missing columns {sorted(missing)}")
+            continue
+        tagged.append(df.assign(**{SHEET_COLUMN: sheet}))
+    if not tagged:
+        raise ValueError(f"No sheet of {Path(path).name} has the required columns {sorted(required)}")
+    return pd.concat(tagged, ignore_index=True, sort=False)
+
+
+def read_excel_cached(path: Path, workers: int = DEFAULT_SHEET_WORKERS,
+                      required: Optional[Iterable[str]] = None, digest: Optional[str] = None) -> pd.DataFrame:
+    base = sidecar_base(digest or file_digest(path))
+    cached = find_artifact(base)
+    if cached is not None:
+        try:
+            return read_artifact_file(cached)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable sidecar {cached.name} for {Path(path).name}: {e}")
+    df = parse_workbook(path, workers, required)
+    try:
+        write_artifact(df, base)
+    except Exception as e:
+        # e.g. mixed-type object columns Parquet cannot store; the parsed frame is still usable
+        logging.warning(f"Could not write a sidecar for {Path(path).name}: {e}")
+    return df
+
+
+__all__ = ["DEFAULT_SHEET_WORKERS", "SHEET_COLUMN", "SIDECAR_DIR", "parse_workbook", "prune_sidecars", "read_excel_cached"]
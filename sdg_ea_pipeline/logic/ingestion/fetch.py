@@ -0,0 +1,359 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.parse import quote, urlencode
+from urllib.request import Request, urlopen
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+try:
+    import aiohttp  # optional; otherwise urllib requests run on a thread pool
+    AIOHTTP_AVAILABLE = True
+except Exception:
+    AIOHTTP_AVAILABLE = False
+
+from sdg_ea_pipeline.config.loader import load_config
+from sdg_ea_pipeline.logic.ingestion.ingest import PLACEHOLDERS_DIR
+
+CONFIG_FILE = ROOT / "sdg_ea_pipeline" / "config" / "config.yaml"
+# World Bank-style REST API: /country/<iso3>/indicator/<id>?format=json&page=<n>
+DEFAULT_BASE_URL = os.environ.get("SDG_EA_API_URL", "https://api.worldbank.org/v2")
+# Fetched series land next to hand-dropped files, so STEP 3 ingests them the same way
+FETCH_OUTPUT = PLACEHOLDERS_DIR / "api_fetch.csv"
+# Response bodies plus their ETag / Last-Modified validators, one file per URL
+HTTP_CACHE_DIR = ROOT / "sdg_ea_pipeline" / "data" / "raw" / "http_cache"
+SOURCE = "SDG_API"
+DEFAULT_CONNECTIONS = 8
+PER_PAGE = 1000
+TIMEOUT_SECONDS = 30
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Observation status codes -> the reliability levels of the placeholder schema
+RELIABILITY_BY_STATUS = {"": "verified", "E": "estimated", "F": "estimated", "P": "provisional"}
+OUTPUT_COLUMNS = ["source", "year", "country", "indicator_code", "value", "reliability"]
+
+# Acquisition in front of STEP 3: every configured country x indicator series is requested
+# concurrently from one event loop, with at most `connections` requests in flight. Pages after
+# the first are requested together once the first page reports the page count. Responses are
+# cached on disk and revalidated with If-None-Match / If-Modified-Since, so series the server
+# reports unchanged (304) are not downloaded again.
+
+
+class FetchError(RuntimeError):
+    pass
+
+
+@dataclass
+class FetchStats:
+    series: int = 0
+    failed: int = 0
+    pages: int = 0
+    downloaded: int = 0
+    not_modified: int = 0
+    retries: int = 0
+    bytes: int = 0
+
+
+class HttpCache:
+    def __init__(self, directory: Path = HTTP_CACHE_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return self.directory / f"{key}.body", self.directory / f"{key}.json"
+
+    def validators(self, url: str) -> Dict[str, str]:
+        body, meta = self._paths(url)
+        if not (body.exists() and meta.exists()):
+            return {}
+        try:
+            with open(meta, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        headers = {}
+        if stored.get("etag"):
+            headers["If-None-Match"] = stored["etag"]
+        if stored.get("last_modified"):
+            headers["If-Modified-Since"] = stored["last_modified"]
+        return headers
+
+    def body(self, url: str) -> bytes:
+        return self._paths(url)[0].read_bytes()
+
+    def store(self, url: str, headers: Dict[str, str], body: bytes) -> None:
+        path, meta = self._paths(url)
+        etag, modified = headers.get("etag"), headers.get("last-modified")
+        if not (etag or modified):
+            return
+        # Body first: validators are only trusted next to a complete body
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+        with open(meta, "w", encoding="utf-8") as f:
+            json.dump({"url": url, "etag": etag, "last_modified": modified}, f)
+
+
+class _UrllibTransport:
+    # Blocking urllib on a bounded thread pool; the fallback without aiohttp
+    name = "urllib"
+
+    def __init__(self, connections: int, timeout: float):
+        self.timeout = timeout
+        self.pool = ThreadPoolExecutor(max_workers=connections, thread_name_prefix="fetch")
+
+    def _get(self, url: str, headers: Dict[str, str]):
+        try:
+            with urlopen(Request(url, headers=headers), timeout=self.timeout) as resp:
+                return resp.status, {k.lower(): v for k, v in resp.headers.items()}, resp.read()
+        except HTTPError as e:
+            # 304 and error statuses arrive as HTTPError
+            return e.code, {k.lower(): v for k, v in (e.headers or {}).items()}, e.read()
+
+    async def get(self, url: str, headers: Dict[str, str]):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, self._get, url, headers)
+
+    async def close(self) -> None:
+        self.pool.shutdown(wait=False)
+
+
+class _AiohttpTransport:
+    name = "aiohttp"
+
+    def __init__(self, connections: int, timeout: float):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=connections),
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        )
+
+    async def get(self, url: str, headers: Dict[str, str]):
+        async with self.session.get(url, headers=headers) as resp:
+            return resp.status, {k.lower(): v for k, v in resp.headers.items()}, await resp.read()
+
+    async def close(self) -> None:
+        await self.session.close()
+
+
+TRANSIENT_ERRORS = (OSError, asyncio.TimeoutError) + ((aiohttp.ClientError,) if AIOHTTP_AVAILABLE else ())
+
+
+def series_url(base_url: str, country: str, indicator: str, years: List[int], page: int = 1,
+               per_page: int = PER_PAGE) -> str:
+    query = {"format": "json", "per_page": per_page, "page": page}
+    if years:
+        query["date"] = f"{min(years)}:{max(years)}"
+    return f"{base_url.rstrip('/')}/country/{quote(country, safe='')}/indicator/{quote(indicator, safe='')}?{urlencode(query)}"
+
+
+def backoff_seconds(attempt: int, retry_after: Optional[str] = None) -> float:
+    # Server-provided Retry-After wins; otherwise capped exponential backoff with jitter
+    try:
+        if retry_after is not None:
+            return min(BACKOFF_MAX_SECONDS, max(0.0, float(retry_after)))
+    except ValueError:
+        pass
+    return min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def _page(payload) -> Tuple[dict, list]:
+    # [meta, records]; a single-element list is an API error message, records may be null
+    if not isinstance(payload, list) or not payload or not isinstance(payload[0], dict):
+        raise FetchError(f"Unexpected response: {str(payload)[:200]}")
+    if "message" in payload[0]:
+        raise FetchError(f"API error: {payload[0]['message']}")
+    return payload[0], (payload[1] if len(payload) > 1 and payload[1] else [])
+
+
+class Fetcher:
+    def __init__(self, transport, cache: Optional[HttpCache], connections: int, retries: int = MAX_RETRIES):
+        self.transport = transport
+        self.cache = cache
+        self.retries = retries
+        self.semaphore = asyncio.Semaphore(connections)
+        self.stats = FetchStats()
+
+    async def get_json(self, url: str):
+        error = "no attempt"
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats.retries += 1
+            headers = self.cache.validators(url) if self.cache else {}
+            retry_after = None
+            # The slot is held only for the request itself, not while backing off
+            async with self.semaphore:
+                try:
+                    status, resp_headers, body = await self.transport.get(url, headers)
+                except TRANSIENT_ERRORS as e:
+                    status, resp_headers, body, error = None, {}, b"", f"{type(e).__name__}: {e}"
+            if status == 304 and headers:
+                self.stats.not_modified += 1
+                return json.loads(self.cache.body(url))
+            if status == 200:
+                self.stats.downloaded += 1
+                self.stats.bytes += len(body)
+                if self.cache:
+                    self.cache.store(url, resp_headers, body)
+                return json.loads(body)
+            if status is not None:
+                error = f"HTTP {status}"
+                if status not in RETRY_STATUS:
+                    break
+                retry_after = resp_headers.get("retry-after")
+            if attempt < self.retries:
+                await asyncio.sleep(backoff_seconds(attempt, retry_after))
+        raise FetchError(f"{url}: {error}")
+
+    async def series(self, base_url: str, country: str, indicator: str, code: str, years: List[int],
+                     per_page: int = PER_PAGE) -> List[dict]:
+        meta, records = _page(await self.get_json(series_url(base_url, country, indicator, years, 1, per_page)))
+        pages = int(meta.get("pages") or 1)
+        rest = await asyncio.gather(*(self.get_json(series_url(base_url, country, indicator, years, p, per_page))
+                                      for p in range(2, pages + 1)))
+        for payload in rest:
+            records = records + _page(payload)[1]
+        self.stats.pages += pages
+        return [_row(r, country, code) for r in records]
+
+
+def _row(record: dict, country: str, code: str) -> dict:
+    date = str(record.get("date") or "")
+    return {
+        "source": SOURCE,
+        # Annual series only; sub-annual dates ("2020Q1", "2020M01") become missing years
+        "year": int(date) if date.isdigit() else None,
+        "country": record.get("countryiso3code") or country,
+        "indicator_code": code,
+        "value": record.get("value"),
+        "reliability": RELIABILITY_BY_STATUS.get(str(record.get("obs_status") or "").upper(), "estimated"),
+    }
+
+
+def configured_series(config_path: Path = CONFIG_FILE) -> Tuple[List[Tuple[str, str, str]], List[int]]:
+    # (country, upstream indicator id, pipeline indicator code); an indicator's `source_code`
+    # names it upstream, defaulting to its code
+    cfg = load_config(str(config_path))
+    indicators = []
+    for i in cfg.indicators:
+        code = str(i.get("code")) if isinstance(i, dict) else str(i)
+        upstream = str(i.get("source_code") or code) if isinstance(i, dict) else code
+        indicators.append((upstream, code))
+    pairs = [(str(c), upstream, code) for c in cfg.countries for upstream, code in indicators]
+    return pairs, [int(y) for y in cfg.years]
+
+
+async def fetch_all(series: List[Tuple[str, str, str]], years: List[int], base_url: str = DEFAULT_BASE_URL,
+                    connections: int = DEFAULT_CONNECTIONS, retries: int = MAX_RETRIES, per_page: int = PER_PAGE,
+                    cache: Optional[HttpCache] = None, timeout: float = TIMEOUT_SECONDS):
+    transport_cls = _AiohttpTransport if AIOHTTP_AVAILABLE else _UrllibTransport
+    transport = transport_cls(connections, timeout)
+    fetcher = Fetcher(transport, cache, connections, retries)
+    try:
+        results = await asyncio.gather(
+            *(fetcher.series(base_url, country, upstream, code, years, per_page) for country, upstream, code in series),
+            return_exceptions=True,
+        )
+    finally:
+        await transport.close()
+    rows, errors, failed = [], [], []
+    for (country, upstream, code), result in zip(series, results):
+        if isinstance(result, BaseException):
+            errors.append(f"{country}/{upstream}: {result}")
+            failed.append((country, code))
+        else:
+            rows.extend(result)
+    fetcher.stats.series = len(series)
+    fetcher.stats.failed = len(errors)
+    # Deterministic row order whatever order the responses arrived in
+    return _sorted(pd.DataFrame(rows, columns=OUTPUT_COLUMNS)), fetcher.stats, errors, failed, transport.name
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(["country", "indicator_code", "year"], kind="stable", na_position="last", ignore_index=True)
+
+
+def keep_previous(df: pd.DataFrame, failed: List[Tuple[str, str]], path: Path = FETCH_OUTPUT) -> Tuple[pd.DataFrame, int]:
+    # A series that failed this time keeps the rows of the last successful fetch, so a transient
+    # error does not drop it from the next ingestion. Returns the frame and the rows kept.
+    path = Path(path)
+    if not failed or not path.exists():
+        return df, 0
+    previous = pd.read_csv(path)
+    keys = pd.MultiIndex.from_frame(previous[["country", "indicator_code"]].astype(str))
+    kept = previous[keys.isin(pd.MultiIndex.from_tuples(failed))]
+    if kept.empty:
+        return df, 0
+    return _sorted(pd.concat([df, kept[OUTPUT_COLUMNS]], ignore_index=True)), len(kept)
+
+
+def write_fetched(df: pd.DataFrame, path: Path = FETCH_OUTPUT) -> bool:
+    # The file is only replaced when its content changes, so unchanged upstream data leaves
+    # STEP 3's content-hash manifest and the stage cache alone
+    payload = df.to_csv(index=False).encode("utf-8")
+    path = Path(path)
+    if path.exists() and path.read_bytes() == payload:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(payload)
+    os.replace(tmp, path)
+    return True
+
+
+def main(base_url: str = DEFAULT_BASE_URL, connections: int = DEFAULT_CONNECTIONS, retries: int = MAX_RETRIES,
+         per_page: int = PER_PAGE, output: Path = FETCH_OUTPUT, use_cache: bool = True,
+         config_path: Path = CONFIG_FILE) -> pd.DataFrame:
+    series, years = configured_series(config_path)
+    t0 = time.perf_counter()
+    df, stats, errors, failed, transport = asyncio.run(fetch_all(
+        series, years, base_url, connections, retries, per_page, HttpCache() if use_cache else None))
+    elapsed = time.perf_counter() - t0
+    for e in errors[:10]:
+        print(f"[WARN] fetch failed: {e}")
+    if errors and len(errors) == len(series):
+        raise FetchError(f"All {len(series)} series failed to fetch from {base_url}")
+    df, kept = keep_previous(df, failed, output)
+    if kept:
+        print(f"[WARN] kept {kept} previously fetched row(s) for {len(failed)} failed series")
+    changed = write_fetched(df, output)
+    print(f"Fetched {stats.series - stats.failed}/{stats.series} series ({stats.pages} pages: {stats.downloaded} "
+          f"downloaded, {stats.not_modified} not modified, {stats.retries} retries) in {elapsed:.2f}s over "
+          f"{connections} connections ({transport}).")
+    print(f"{len(df)} rows {'written to' if changed else 'unchanged in'} {output}")
+    return df
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch the configured countries x indicators from an SDG / World Bank-style API.")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL,
+                        help="API root (default: %(default)s; env SDG_EA_API_URL).")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS,
+                        help="Maximum concurrent requests (default: %(default)s).")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES)
+    parser.add_argument("--per-page", type=int, default=PER_PAGE)
+    parser.add_argument("--output", type=Path, default=FETCH_OUTPUT)
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the HTTP cache.")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(base_url=args.base_url, connections=max(1, args.connections), retries=args.retries,
+         per_page=args.per_page, output=args.output, use_cache=not args.no_cache)
@@ -1,21 +1,51 @@
 from __future__ import annotations
+import argparse
+import csv
 import os
+import sys
 from pathlib import Path
 import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 import logging
+import numpy as np
 import pandas as pd
 
 # Project root resolution (assumes standard repo layout)
 ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sdg_ea_pipeline.logic.ingestion.excel_sidecar import DEFAULT_SHEET_WORKERS, prune_sidecars, read_excel_cached
+from sdg_ea_pipeline.logic.ingestion.manifest import IngestManifest
+from sdg_ea_pipeline.logic.ingestion.provenance_store import PROVENANCE_DB, record_ingestions
+from sdg_ea_pipeline.logic.storage.artifacts import artifact_path, open_artifact_writer, write_artifact
+from sdg_ea_pipeline.logic.storage.memory import CSV_EXPANSION, WORKING_SET_FACTOR, MemoryBudget, frame_nbytes
+
 PLACEHOLDERS_DIR = ROOT / "sdg_ea_pipeline" / "data" / "raw" / "placeholders"
 ARCHIVE_DIR = ROOT / "sdg_ea_pipeline" / "data" / "raw" / "archive"
 INTERIM_DIR = ROOT / "sdg_ea_pipeline" / "data" / "interim"
 PROVENANCE_DIR = ROOT / "sdg_ea_pipeline" / "data" / "provenance"
 PROVENANCE_FILE = PROVENANCE_DIR / "provenance.csv"
+# Content-hash manifest of already ingested sources (incremental ingestion)
+MANIFEST_FILE = PROVENANCE_DIR / "ingest_manifest.json"
 LOG_DIR = ROOT / "sdg_ea_pipeline" / "logs"
 LOG_PATH = LOG_DIR / "ingestion.log" 
 
+PROVENANCE_HEADER = ["ingested_file", "source", "year_min", "year_max", "countries", "indicators", "status", "timestamp", "reliability_summary", "original_path"]
+# Parallel ingestion: worker processes read/archive/summarize, the parent is the single provenance writer
+DEFAULT_WORKERS = 1
+PROVENANCE_BATCH_SIZE = 50
+# Streaming ingestion: CSVs at or above the threshold are read in bounded chunks
+STREAM_THRESHOLD_BYTES = 256 * 1024 * 1024
+STREAM_CHUNK_ROWS = 250_000
+# Rows parsed to estimate the in-memory size of a CSV row under a memory budget
+BUDGET_SAMPLE_ROWS = 10_000
+# Every streamed column is read as text so all chunks share one schema whatever a later
+# chunk holds (dirty cells such as "..", extra columns empty in the first chunk); cleaning
+# coerces year/value and validation flags the non-numeric cells, as for a non-streamed read
+STREAM_DTYPE = "string"
+
 REQUIRED_COLUMNS = {"source", "year", "country", "indicator_code", "value", "reliability"}
 
 
@@ -63,11 +93,13 @@ def discover_placeholders() -> list[Path]:
     return sorted(files, key=lambda x: x.name)
 
 
-def read_dataframe(path: Path) -> pd.DataFrame:
+def read_dataframe(path: Path, sheet_workers: int = DEFAULT_SHEET_WORKERS, digest: str | None = None) -> pd.DataFrame:
     if path.suffix.lower() == ".csv":
         return pd.read_csv(path)
     elif path.suffix.lower() in {".xlsx", ".xls"}:
-        return pd.read_excel(path)
+        # Parsed once per content digest into a columnar sidecar; every sheet, tagged by name.
+        # The manifest has already hashed the file, so its digest is passed in when known.
+        return read_excel_cached(path, sheet_workers, REQUIRED_COLUMNS, digest)
     else:
         raise ValueError(f"Unsupported placeholder format: {path}")
 
@@ -80,62 +112,182 @@ def archive_source(path: Path) -> Path:
     return archived
 
 
-def write_interim(df: pd.DataFrame, original_path: Path) -> Path:
+def _interim_base(original_path: Path) -> Path:
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     INTERIM_DIR.mkdir(parents=True, exist_ok=True)
-    interim_path = INTERIM_DIR / f"ingested_{original_path.stem}_{timestamp}.csv"
-    df.to_csv(interim_path, index=False)
-    return interim_path
+    return INTERIM_DIR / f"ingested_{original_path.stem}_{timestamp}"
+
+
+def write_interim(df: pd.DataFrame, original_path: Path) -> Path:
+    return write_artifact(df, _interim_base(original_path))
+
+
+class ProvenanceSummary:
+    # Provenance aggregates updated incrementally, one pass per chunk (or once for a full frame)
+    def __init__(self):
+        self.rows = 0
+        self.source = None
+        self.year_min = None
+        self.year_max = None
+        self.values = {"country": None, "indicator_code": None, "reliability": None}
+        # (source, country, indicator_code) -> [year_min, year_max, rows] for the provenance store
+        self.coverage = {}
+
+    def update(self, df: pd.DataFrame) -> "ProvenanceSummary":
+        self.rows += len(df)
+        if self.source is None and "source" in df.columns and not df["source"].empty:
+            self.source = str(df["source"].iloc[0])
+        if "year" in df.columns:
+            years = pd.to_numeric(df["year"], errors="coerce").dropna().astype(int)
+            if not years.empty:
+                lo, hi = int(years.min()), int(years.max())
+                self.year_min = lo if self.year_min is None else min(self.year_min, lo)
+                self.year_max = hi if self.year_max is None else max(self.year_max, hi)
+        for col in self.values:
+            if col in df.columns:
+                seen = self.values[col] if self.values[col] is not None else set()
+                seen.update(df[col].dropna().astype(str).unique())
+                self.values[col] = seen
+        if {"country", "indicator_code", "year"} <= set(df.columns):
+            keys = pd.DataFrame({
+                "source": df["source"].astype("string") if "source" in df.columns else pd.NA,
+                "country": df["country"].astype("string"),
+                "indicator_code": df["indicator_code"].astype("string"),
+                "year": pd.to_numeric(df["year"], errors="coerce"),
+            })
+            groups = keys.groupby(["source", "country", "indicator_code"], dropna=False, sort=False)["year"].agg(["min", "max", "size"])
+            for key, (lo, hi, n) in zip(groups.index, groups.to_numpy(dtype=float, na_value=np.nan)):
+                key = tuple(None if pd.isna(k) else str(k) for k in key)
+                lo, hi = (None if np.isnan(v) else int(v) for v in (lo, hi))
+                seen = self.coverage.get(key)
+                if seen is None:
+                    self.coverage[key] = [lo, hi, int(n)]
+                else:
+                    seen[0] = lo if seen[0] is None else (seen[0] if lo is None else min(seen[0], lo))
+                    seen[1] = hi if seen[1] is None else (seen[1] if hi is None else max(seen[1], hi))
+                    seen[2] += int(n)
+        return self
+
+    def coverage_rows(self) -> list:
+        return [(*key, *span) for key, span in sorted(self.coverage.items(), key=lambda kv: tuple(map(str, kv[0])))]
+
+    def joined(self, col: str) -> str:
+        return ";".join(sorted(self.values[col])) if self.values[col] else ""
+
+
+def stream_interim(path: Path, chunksize: int = STREAM_CHUNK_ROWS) -> tuple[Path, ProvenanceSummary]:
+    # Peak memory is bounded by one chunk: each chunk updates the summary and is appended to the interim
+    base = _interim_base(path)
+    summary = ProvenanceSummary()
+    with open_artifact_writer(base) as writer:
+        for chunk in pd.read_csv(path, chunksize=chunksize, dtype=STREAM_DTYPE):
+            summary.update(chunk)
+            writer.write(chunk)
+    return artifact_path(base), summary
+
+
+def should_stream(path: Path, chunksize: int | None = None, budget: MemoryBudget | None = None) -> bool:
+    if path.suffix.lower() != ".csv":
+        return False
+    if budget and not budget.fits(path.stat().st_size * CSV_EXPANSION * WORKING_SET_FACTOR):
+        return True
+    return chunksize is not None or path.stat().st_size >= STREAM_THRESHOLD_BYTES
+
+
+def budget_chunk_rows(path: Path, budget: MemoryBudget) -> int | None:
+    # Chunk size whose working set fits the budget, from the parsed size of a sample of rows
+    sample = pd.read_csv(path, nrows=BUDGET_SAMPLE_ROWS, dtype=STREAM_DTYPE)
+    if sample.empty:
+        return None
+    rows = budget.chunk_rows(frame_nbytes(sample) / len(sample))
+    return min(rows, STREAM_CHUNK_ROWS) if rows else None
 
 
 def append_provenance(record: dict) -> None:
+    append_provenance_batch([record])
+
+
+def append_provenance_batch(records: list[dict]) -> None:
+    if not records:
+        return
     PROVENANCE_DIR.mkdir(parents=True, exist_ok=True)
     file_exists = PROVENANCE_FILE.exists()
-    header = ["ingested_file", "source", "year_min", "year_max", "countries", "indicators", "status", "timestamp", "reliability_summary", "original_path"]
     with open(str(PROVENANCE_FILE), "a", encoding="utf-8", newline="") as f:
-        writer = None
-        import csv as _csv
+        writer = csv.DictWriter(f, fieldnames=PROVENANCE_HEADER, extrasaction="ignore")
         if not file_exists:
-            writer = _csv.DictWriter(f, fieldnames=header)
             writer.writeheader()
-        else:
-            writer = _csv.DictWriter(f, fieldnames=header)
-        writer.writerow(record)
+        writer.writerows(records)
+    # Indexed copy for audit / lineage queries, one transaction per batch
+    record_ingestions(records, PROVENANCE_DB)
 
 
-def ingest_file(path: Path) -> None:
+def process_file(path: Path, chunksize: int | None = None, memory_budget=None,
+                 sheet_workers: int = DEFAULT_SHEET_WORKERS, digest: str | None = None) -> dict:
+    # Read, archive and write the interim copy; returns the provenance record without writing it,
+    # so it can run in a worker process while the parent serializes provenance appends.
     logging.info(f"Ingesting placeholder file: {path}")
-    df = read_dataframe(path)
-    # Archive raw source immutably
-    archived = archive_source(path)
-    # Write an interim, progression-friendly copy
-    interim = write_interim(df, path)
-    # Prepare provenance summary for this file
-    year_vals = df["year"].astype(int) if "year" in df.columns else pd.Series(dtype=int)
-    year_min = int(year_vals.min()) if not year_vals.empty else None
-    year_max = int(year_vals.max()) if not year_vals.empty else None
-    countries = ";".join(sorted(df["country"].astype(str).dropna().unique())) if "country" in df.columns else ""
-    indicators = ";".join(sorted(df["indicator_code"].astype(str).dropna().unique())) if "indicator_code" in df.columns else ""
-    reliability_summary = ";".join(sorted(df["reliability"].astype(str).dropna().unique())) if "reliability" in df.columns else ""
-    provenance_record = {
+    budget = MemoryBudget(memory_budget)
+    if should_stream(path, chunksize, budget):
+        if budget and chunksize is None:
+            chunksize = budget_chunk_rows(path, budget)
+        interim, summary = stream_interim(path, chunksize or STREAM_CHUNK_ROWS)
+        archived = archive_source(path)
+    else:
+        df = read_dataframe(path, sheet_workers, digest)
+        # Archive raw source immutably
+        archived = archive_source(path)
+        # Write an interim, progression-friendly copy
+        interim = write_interim(df, path)
+        summary = ProvenanceSummary().update(df)
+    logging.info(f"Ingested {path.name} ({summary.rows} rows): archived -> {archived.name}, interim -> {interim.name}")
+    return {
         "ingested_file": interim.name,
-        "source": str(df["source"].iloc[0]) if "source" in df.columns and not df["source"].empty else "",
-        "year_min": year_min,
-        "year_max": year_max,
-        "countries": countries,
-        "indicators": indicators,
+        "source": summary.source or "",
+        "year_min": summary.year_min,
+        "year_max": summary.year_max,
+        "countries": summary.joined("country"),
+        "indicators": summary.joined("indicator_code"),
         "status": "INGESTED",
         "timestamp": datetime.utcnow().isoformat(),
-        "reliability_summary": reliability_summary,
+        "reliability_summary": summary.joined("reliability"),
         "original_path": str(path),
+        "archived_file": archived.name,
+        "coverage": summary.coverage_rows(),
     }
-    append_provenance(provenance_record)
-    logging.info(
-        f"Ingested {path.name}: archived -> {archived.name}, interim -> {interim.name}, provenance updated"
-    )
 
 
-def main() -> None:
+def ingest_file(path: Path, chunksize: int | None = None, memory_budget=None,
+                sheet_workers: int = DEFAULT_SHEET_WORKERS) -> dict:
+    record = process_file(path, chunksize, memory_budget, sheet_workers)
+    append_provenance(record)
+    return record
+
+
+def _ingest_results(digests: dict[Path, str], workers: int, chunksize: int | None = None, memory_budget=None,
+                    sheet_workers: int = DEFAULT_SHEET_WORKERS):
+    # Yields (path, record, error) per file of {path: content digest}; a failure never aborts the other files.
+    # A memory budget is shared by the workers, so each gets an equal slice of it. Workbook
+    # sheets only get their own processes when files are not already read in parallel.
+    if workers <= 1 or len(digests) <= 1:
+        for p, digest in digests.items():
+            try:
+                yield p, process_file(p, chunksize, memory_budget, sheet_workers, digest), None
+            except Exception as e:
+                yield p, None, e
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=setup_logging, initargs=(LOG_PATH,)) as pool:
+        share = MemoryBudget(memory_budget).limit
+        share = share // min(workers, len(digests)) if share is not None else None
+        futures = {pool.submit(process_file, p, chunksize, share, 1, digest): p for p, digest in digests.items()}
+        for fut in as_completed(futures):
+            try:
+                yield futures[fut], fut.result(), None
+            except Exception as e:
+                yield futures[fut], None, e
+
+
+def main(force: bool = False, workers: int = DEFAULT_WORKERS, chunksize: int | None = None, memory_budget=None,
+         sheet_workers: int = DEFAULT_SHEET_WORKERS) -> None:
     setup_logging(LOG_PATH)
     ensure_dirs()
     ensure_dummy_placeholder()
@@ -143,12 +295,56 @@ def main() -> None:
     if not placeholders:
         logging.info("No placeholder files found in data/raw/placeholders.")
         return
+    manifest = IngestManifest.load(MANIFEST_FILE)
+    digests, current = {}, set()
     for p in placeholders:
         try:
-            ingest_file(p)
+            changed, digest = manifest.check(p)
+            current.add(digest)
+            if changed or force:
+                digests[p] = digest
         except Exception as e:
             logging.exception(f"Ingestion failed for {p}: {e}")
+    skipped = len(placeholders) - len(digests)
+
+    batch = []
+    try:
+        for p, record, error in _ingest_results(digests, workers, chunksize, memory_budget, sheet_workers):
+            if error is not None:
+                logging.error(f"Ingestion failed for {p}: {error}", exc_info=error)
+                continue
+            manifest.record(p, digests[p], archived=record["archived_file"], interim=record["ingested_file"])
+            batch.append(record)
+            if len(batch) >= PROVENANCE_BATCH_SIZE:
+                append_provenance_batch(batch)
+                batch = []
+    finally:
+        append_provenance_batch(batch)
+        manifest.save()
+    # Sidecars only for workbook contents the placeholders still have
+    removed = prune_sidecars(current)
+    if removed:
+        logging.info(f"Removed {removed} stale Excel sidecar(s).")
+    if skipped:
+        logging.info(f"Skipped {skipped} unchanged placeholder file(s) (same content as their last ingestion).")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="STEP 3: ingest placeholder files with provenance.")
+    parser.add_argument("--force", action="store_true", help="Re-ingest files even if their content was already ingested.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Worker processes for multi-file ingestion (default: %(default)s).")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream CSV sources in chunks of this many rows (default: only files "
+                             f"over {STREAM_THRESHOLD_BYTES // (1024 * 1024)} MB, {STREAM_CHUNK_ROWS} rows per chunk).")
+    parser.add_argument("--memory-budget", default=None,
+                        help="Memory budget per run, e.g. 512M or 2G: CSVs that would not fit are streamed in chunks sized to it.")
+    parser.add_argument("--sheet-workers", type=int, default=DEFAULT_SHEET_WORKERS,
+                        help="Worker processes for parsing the sheets of one workbook (default: %(default)s).")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(force=args.force, workers=args.workers, chunksize=args.chunksize, memory_budget=args.memory_budget,
+         sheet_workers=args.sheet_workers)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+from sdg_ea_pipeline.logic.storage.fingerprint import file_digest
+
+# 2: sources hold the last ingested digest (1 recorded every digest seen, ingested or not)
+MANIFEST_VERSION = 2
+
+
+class IngestManifest:
+    # Two indexes:
+    #   sources: placeholder name -> size/mtime/digest of its last ingested content
+    #   digests: content digest  -> archive/interim records produced for that content
+    # A source is skipped when its content digest is the one last ingested from it; an unchanged
+    # size+mtime reuses that digest without reading the file. Content the source had in an
+    # earlier revision counts as a change, so reverting a file is ingested again.
+
+    def __init__(self, path: Path, data: Optional[dict] = None):
+        self.path = Path(path)
+        data = data or {}
+        self.sources = data.get("sources", {})
+        self.digests = data.get("digests", {})
+        # Stat of each source when it was checked, stored with its digest once ingested
+        self._checked = {}
+
+    @classmethod
+    def load(cls, path: Path) -> "IngestManifest":
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data)
+
+    @staticmethod
+    def _key(source: Path) -> str:
+        return source.name
+
+    def check(self, source: Path) -> Tuple[bool, str]:
+        # Returns (changed, digest)
+        st = source.stat()
+        self._checked[self._key(source)] = st
+        cached = self.sources.get(self._key(source))
+        if cached and cached.get("size") == st.st_size and cached.get("mtime_ns") == st.st_mtime_ns:
+            return False, cached["digest"]
+        digest = file_digest(source)
+        if cached and cached.get("digest") == digest:
+            # Touched but not modified: remember the new stat so the next check is cheap again
+            self._remember(source, st, digest)
+            return False, digest
+        return True, digest
+
+    def _remember(self, source: Path, st: os.stat_result, digest: str) -> None:
+        self.sources[self._key(source)] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": digest}
+
+    def record(self, source: Path, digest: str, archived: str, interim: str) -> None:
+        # Only a successful ingestion moves the source on to its new digest
+        self._remember(source, self._checked.get(self._key(source)) or source.stat(), digest)
+        self.digests[digest] = {
+            "source": self._key(source),
+            "archived": archived,
+            "interim": interim,
+            "ingested_at": datetime.utcnow().isoformat(),
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.parent / f".{self.path.name}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "sources": self.sources, "digests": self.digests}, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+__all__ = ["IngestManifest"]
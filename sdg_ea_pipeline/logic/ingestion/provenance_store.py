@@ -0,0 +1,242 @@
+from __future__ import annotations
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DATA_DIR = ROOT / "sdg_ea_pipeline" / "data"
+PROVENANCE_DIR = DATA_DIR / "provenance"
+PROVENANCE_DB = PROVENANCE_DIR / "provenance.sqlite"
+PROVENANCE_CSV = PROVENANCE_DIR / "provenance.csv"
+SCHEMA_VERSION = 1
+
+# Indexed provenance + lineage, one SQLite file next to the CSV log:
+#   ingestions: one row per ingested file (interim, archived original, summary fields)
+#   coverage:   (source, country, indicator_code) year ranges per ingestion, for audit queries
+#   lineage:    artifact -> parent edges (interim -> archived original, cleaned -> interims,
+#               features -> cleaned), walked with a recursive query
+# Artifacts are identified by their path relative to data/.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingestions (
+    id INTEGER PRIMARY KEY,
+    ingested_file TEXT NOT NULL UNIQUE,
+    source TEXT,
+    year_min INTEGER,
+    year_max INTEGER,
+    countries TEXT,
+    indicators TEXT,
+    status TEXT,
+    timestamp TEXT,
+    reliability_summary TEXT,
+    original_path TEXT,
+    archived_file TEXT
+);
+CREATE TABLE IF NOT EXISTS coverage (
+    ingestion_id INTEGER NOT NULL REFERENCES ingestions(id) ON DELETE CASCADE,
+    source TEXT,
+    country TEXT,
+    indicator_code TEXT,
+    year_min INTEGER,
+    year_max INTEGER,
+    rows INTEGER
+);
+CREATE TABLE IF NOT EXISTS lineage (
+    artifact TEXT NOT NULL,
+    parent TEXT NOT NULL,
+    kind TEXT,
+    recorded_at TEXT,
+    PRIMARY KEY (artifact, parent)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_ingestions_source ON ingestions(source);
+CREATE INDEX IF NOT EXISTS idx_ingestions_timestamp ON ingestions(timestamp);
+CREATE INDEX IF NOT EXISTS idx_coverage_series ON coverage(country, indicator_code, year_min, year_max);
+CREATE INDEX IF NOT EXISTS idx_coverage_indicator ON coverage(indicator_code);
+CREATE INDEX IF NOT EXISTS idx_coverage_source ON coverage(source);
+CREATE INDEX IF NOT EXISTS idx_coverage_ingestion ON coverage(ingestion_id);
+CREATE INDEX IF NOT EXISTS idx_lineage_parent ON lineage(parent);
+"""
+INGESTION_FIELDS = ["ingested_file", "source", "year_min", "year_max", "countries", "indicators", "status",
+                    "timestamp", "reliability_summary", "original_path", "archived_file"]
+
+
+def artifact_id(path) -> str:
+    # Stable id for an artifact: its path relative to data/ (absolute if outside it)
+    path = Path(os.path.abspath(path))
+    try:
+        return path.relative_to(DATA_DIR).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+@contextmanager
+def connect(path: Path = PROVENANCE_DB) -> Iterator[sqlite3.Connection]:
+    # One transaction per `with` block: committed on success, rolled back on error
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    new = not path.exists()
+    conn = sqlite3.connect(str(path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            if new and path == PROVENANCE_DB:
+                _import_csv(conn, PROVENANCE_CSV)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _insert_ingestions(conn: sqlite3.Connection, records: Iterable[dict]) -> int:
+    n = 0
+    for record in records:
+        # Re-recording an interim replaces its row and coverage
+        conn.execute("DELETE FROM coverage WHERE ingestion_id IN (SELECT id FROM ingestions WHERE ingested_file = ?)",
+                     (record["ingested_file"],))
+        conn.execute("DELETE FROM ingestions WHERE ingested_file = ?", (record["ingested_file"],))
+        cur = conn.execute(
+            f"INSERT INTO ingestions ({', '.join(INGESTION_FIELDS)}) "
+            f"VALUES ({', '.join('?' * len(INGESTION_FIELDS))})",
+            [record.get(k) for k in INGESTION_FIELDS],
+        )
+        ingestion_id = cur.lastrowid
+        conn.executemany(
+            "INSERT INTO coverage (ingestion_id, source, country, indicator_code, year_min, year_max, rows) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(ingestion_id, *row) for row in record.get("coverage") or []],
+        )
+        # interim -> archived copy -> original placeholder
+        interim = artifact_id(DATA_DIR / "interim" / record["ingested_file"])
+        archived = artifact_id(DATA_DIR / "raw" / "archive" / record["archived_file"]) if record.get("archived_file") else None
+        original = artifact_id(record["original_path"]) if record.get("original_path") else None
+        if archived or original:
+            _replace_parents(conn, interim, [archived or original], "ingest", record.get("timestamp"))
+        if archived and original:
+            _replace_parents(conn, archived, [original], "archive", record.get("timestamp"))
+        n += 1
+    return n
+
+
+def _import_csv(conn: sqlite3.Connection, path: Path) -> None:
+    # One-off migration of an existing provenance.csv. Per-series coverage was not logged
+    # there, so it is approximated by every country x indicator over the file's year range.
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    records = []
+    for row in rows:
+        years = [int(float(row[k])) if row.get(k) else None for k in ("year_min", "year_max")]
+        countries = [c for c in (row.get("countries") or "").split(";") if c]
+        indicators = [i for i in (row.get("indicators") or "").split(";") if i]
+        records.append({
+            **row, "year_min": years[0], "year_max": years[1],
+            "coverage": [(row.get("source"), c, i, years[0], years[1], None) for c in countries for i in indicators],
+        })
+    with conn:
+        _insert_ingestions(conn, records)
+
+
+def record_ingestions(records: list[dict], path: Path = PROVENANCE_DB) -> int:
+    # Batched insert: all records of a batch land in one transaction
+    if not records:
+        return 0
+    with connect(path) as conn:
+        return _insert_ingestions(conn, records)
+
+
+def _replace_parents(conn: sqlite3.Connection, artifact: str, parents: Iterable[str], kind: str,
+                     recorded_at: Optional[str] = None) -> None:
+    recorded_at = recorded_at or datetime.utcnow().isoformat()
+    conn.execute("DELETE FROM lineage WHERE artifact = ?", (artifact,))
+    conn.executemany(
+        "INSERT OR REPLACE INTO lineage (artifact, parent, kind, recorded_at) VALUES (?, ?, ?, ?)",
+        [(artifact, p, kind, recorded_at) for p in parents],
+    )
+
+
+def record_lineage(artifact, parents: Iterable, kind: str, path: Path = PROVENANCE_DB) -> None:
+    # Overwritten artifacts (cleaned, features) get their parent set replaced, not extended
+    with connect(path) as conn:
+        _replace_parents(conn, artifact_id(artifact), [artifact_id(p) for p in parents], kind)
+
+
+def sources_for(country: Optional[str] = None, indicator: Optional[str] = None, year: Optional[int] = None,
+                path: Path = PROVENANCE_DB) -> list[dict]:
+    # "Which sources fed KEN I3 in 2022": an index range scan over coverage, joined to the ingestion
+    clauses, params = [], []
+    if country is not None:
+        clauses.append("c.country = ?")
+        params.append(country)
+    if indicator is not None:
+        clauses.append("c.indicator_code = ?")
+        params.append(indicator)
+    if year is not None:
+        clauses.append("c.year_min <= ? AND c.year_max >= ?")
+        params += [int(year), int(year)]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    query = f"""
+        SELECT c.source, c.country, c.indicator_code, c.year_min, c.year_max, c.rows,
+               i.ingested_file, i.archived_file, i.original_path, i.timestamp
+        FROM coverage c JOIN ingestions i ON i.id = c.ingestion_id
+        {where}
+        ORDER BY i.timestamp, c.source
+    """
+    with connect(path) as conn:
+        return [dict(r) for r in conn.execute(query, params)]
+
+
+def lineage(artifact, path: Path = PROVENANCE_DB) -> list[dict]:
+    # Every ancestor of an artifact down to the archived originals, with its distance
+    query = """
+        WITH RECURSIVE up(artifact, parent, kind, depth) AS (
+            SELECT artifact, parent, kind, 1 FROM lineage WHERE artifact = ?
+            UNION
+            SELECT l.artifact, l.parent, l.kind, up.depth + 1
+            FROM lineage l JOIN up ON l.artifact = up.parent
+        )
+        SELECT artifact, parent, kind, MIN(depth) AS depth FROM up GROUP BY artifact, parent ORDER BY depth, parent
+    """
+    with connect(path) as conn:
+        return [dict(r) for r in conn.execute(query, (artifact_id(artifact),))]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Query the provenance and lineage store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    q = sub.add_parser("sources", help="Ingested sources covering a country / indicator / year.")
+    q.add_argument("--country")
+    q.add_argument("--indicator")
+    q.add_argument("--year", type=int)
+    l = sub.add_parser("lineage", help="Ancestors of an artifact (path, or path relative to data/).")
+    l.add_argument("artifact")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "sources":
+        rows = sources_for(args.country, args.indicator, args.year)
+    else:
+        artifact = Path(args.artifact)
+        rows = lineage(artifact if artifact.exists() else DATA_DIR / artifact)
+    print(json.dumps(rows, indent=2))
+    return rows
+
+
+if __name__ == "__main__":
+    main()
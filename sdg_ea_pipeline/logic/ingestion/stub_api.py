@@ -0,0 +1,163 @@
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import math
+import random
+import sys
+import threading
+import time
+import zlib
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Local stand-in for the World Bank-style API that fetch.py reads: deterministic series per
+# (country, indicator), paginated JSON, ETag / Last-Modified validators with 304 responses,
+# and optional latency and transient 503s for exercising the fetcher's pool and retries.
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+DEFAULT_YEARS = (2000, 2024)
+OBS_STATUS = ("", "", "", "E", "P")
+
+
+def series_records(country: str, indicator: str, start: int, end: int, revision: int = 0) -> list:
+    # Newest year first, like the upstream API; a revision bump changes every value
+    rng = np.random.default_rng(zlib.crc32(f"{country}|{indicator}|{revision}".encode("utf-8")))
+    years = np.arange(start, end + 1)
+    values = rng.lognormal(4.0, 2.0) * np.exp(np.cumsum(rng.normal(0.01, 0.03, size=len(years))))
+    status = rng.choice(len(OBS_STATUS), size=len(years))
+    records = []
+    for year, value, s in zip(years[::-1], values[::-1], status[::-1]):
+        missing = rng.random() < 0.05
+        records.append({
+            "indicator": {"id": indicator, "value": f"Stub indicator {indicator}"},
+            "country": {"id": country[:2], "value": f"Stub country {country}"},
+            "countryiso3code": country,
+            "date": str(int(year)),
+            "value": None if missing else round(float(value), 4),
+            "unit": "",
+            "obs_status": OBS_STATUS[s],
+            "decimal": 4,
+        })
+    return records
+
+
+class StubApi:
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.revision = 0
+        self.modified = formatdate(time.time(), usegmt=True)
+        self.random = random.Random(seed)
+        self.counts: Dict[str, int] = {"requests": 0, "ok": 0, "not_modified": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def bump(self) -> None:
+        # Simulates an upstream data release: new values, new validators
+        with self._lock:
+            self.revision += 1
+            self.modified = formatdate(time.time(), usegmt=True)
+
+    def page(self, country: str, indicator: str, params: Dict[str, list]) -> dict:
+        page = max(1, int(params.get("page", ["1"])[0]))
+        per_page = max(1, int(params.get("per_page", ["50"])[0]))
+        start, end = DEFAULT_YEARS
+        if params.get("date"):
+            bounds = params["date"][0].split(":")
+            start, end = int(bounds[0]), int(bounds[-1])
+        records = series_records(country, indicator, start, end, self.revision)
+        pages = max(1, math.ceil(len(records) / per_page))
+        meta = {"page": page, "pages": pages, "per_page": per_page, "total": len(records), "lastupdated": self.modified}
+        return [meta, records[(page - 1) * per_page: page * per_page] or None]
+
+
+def _route(path: str) -> Optional[tuple]:
+    # /<prefix...>/country/<iso3>/indicator/<id>
+    parts = [unquote(p) for p in path.strip("/").split("/")]
+    for i in range(len(parts) - 3):
+        if parts[i] == "country" and parts[i + 2] == "indicator":
+            return parts[i + 1], parts[i + 3]
+    return None
+
+
+def make_handler(api: StubApi):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: bytes = b"", headers: Optional[dict] = None):
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            api.count("requests")
+            if api.latency:
+                time.sleep(api.latency)
+            url = urlparse(self.path)
+            if url.path.rstrip("/").endswith("/_stats"):
+                return self._send(200, json.dumps(api.counts).encode("utf-8"), {"Content-Type": "application/json"})
+            if api.fail_rate and api.random.random() < api.fail_rate:
+                api.count("failed")
+                return self._send(503, b"", {"Retry-After": "0"})
+            key = _route(url.path)
+            if key is None:
+                payload = [{"message": [{"id": "120", "key": "Invalid value", "value": "The provided parameter value is not valid"}]}]
+                return self._send(200, json.dumps(payload).encode("utf-8"), {"Content-Type": "application/json"})
+            try:
+                body = json.dumps(api.page(*key, parse_qs(url.query))).encode("utf-8")
+            except ValueError as e:
+                return self._send(400, json.dumps({"error": str(e)}).encode("utf-8"))
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                api.count("not_modified")
+                return self._send(304, b"", {"ETag": etag, "Last-Modified": api.modified})
+            api.count("ok")
+            self._send(200, body, {"Content-Type": "application/json", "ETag": etag, "Last-Modified": api.modified})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, api: Optional[StubApi] = None) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(api or StubApi()))
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the SDG / World Bank-style API.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response.")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 503.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    server = serve(args.host, args.port, StubApi(args.latency, args.fail_rate, args.seed))
+    host, port = server.server_address[:2]
+    print(f"Serving stub SDG API on http://{host}:{port}/v2 (e.g. /v2/country/KEN/indicator/I1?format=json)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
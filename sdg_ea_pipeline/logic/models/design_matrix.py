@@ -0,0 +1,174 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Shared model input for STEP 6 (baselines) and STEP 7 (validation): numeric predictors plus
+# a sparse one-hot encoding of the categorical columns, in a persisted column order.
+DESIGN_DIR = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "fe" / "design"
+VOCABULARY_FILE = ROOT / "sdg_ea_pipeline" / "models" / "design_vocabulary.json"
+
+TARGET_COLUMNS = ("target_value", "value")
+CATEGORICAL_COLUMNS = ("country", "indicator_code")
+# Only predictors known before the target year is observed; yoy/rolling/cagr/value_filled all
+# include the current value and would leak it into the baselines.
+NUMERIC_COLUMNS = ("year",)
+NUMERIC_PREFIXES = ("lag_",)
+VOCABULARY_VERSION = 1
+
+_lock = threading.Lock()
+# Last built matrix, so stages running in the same process share one build
+_memo: dict = {}
+
+
+def target_column(df: pd.DataFrame) -> str:
+    for c in TARGET_COLUMNS:
+        if c in df.columns:
+            return c
+    raise ValueError("No target column found: 'target_value' or 'value'.")
+
+
+def numeric_columns(df: pd.DataFrame) -> List[str]:
+    return [c for c in df.columns if c in NUMERIC_COLUMNS or str(c).startswith(NUMERIC_PREFIXES)]
+
+
+def load_vocabulary(path: Path = VOCABULARY_FILE) -> Optional[dict]:
+    if not Path(path).exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        vocab = json.load(f)
+    return vocab if vocab.get("version") == VOCABULARY_VERSION else None
+
+
+def _save_vocabulary(vocab: dict, path: Path = VOCABULARY_FILE) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.parent / f".{path.name}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(vocab, f, indent=2)
+    os.replace(tmp, path)
+
+
+def update_vocabulary(df: pd.DataFrame, vocab: Optional[dict] = None) -> Tuple[dict, bool]:
+    # Append-only: existing columns keep their position, unseen categories go at the end
+    vocab = vocab or {"version": VOCABULARY_VERSION, "numeric": [], "categories": {}}
+    changed = False
+    for c in numeric_columns(df):
+        if c not in vocab["numeric"]:
+            vocab["numeric"].append(c)
+            changed = True
+    for c in CATEGORICAL_COLUMNS:
+        if c not in df.columns:
+            continue
+        known = vocab["categories"].setdefault(c, [])
+        seen = set(known)
+        new = sorted(v for v in df[c].dropna().astype(str).unique() if v not in seen)
+        if new:
+            known.extend(new)
+            changed = True
+    return vocab, changed
+
+
+def feature_names(vocab: dict) -> List[str]:
+    names = list(vocab["numeric"])
+    for c in CATEGORICAL_COLUMNS:
+        names += [f"{c}_{v}" for v in vocab["categories"].get(c, [])]
+    return names
+
+
+def content_key(df: pd.DataFrame, vocab: dict) -> str:
+    # Hash of exactly the inputs the matrix is built from, plus the column layout
+    cols = [c for c in vocab["numeric"] + list(CATEGORICAL_COLUMNS) if c in df.columns]
+    h = hashlib.sha256(json.dumps(vocab, sort_keys=True).encode("utf-8"))
+    h.update(json.dumps(cols).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df[cols], index=False).to_numpy().tobytes())
+    return h.hexdigest()[:32]
+
+
+def encode(df: pd.DataFrame, vocab: dict) -> sparse.csr_matrix:
+    # Numeric block (NaN -> 0) followed by one one-hot block per categorical column.
+    # Categories missing from the vocabulary encode as all-zero rows.
+    n = len(df)
+    blocks = []
+    numeric = vocab["numeric"]
+    if numeric:
+        values = np.zeros((n, len(numeric)), dtype=np.float64)
+        for j, c in enumerate(numeric):
+            if c in df.columns:
+                values[:, j] = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        blocks.append(sparse.csr_matrix(np.nan_to_num(values, nan=0.0)))
+    for c in CATEGORICAL_COLUMNS:
+        categories = vocab["categories"].get(c, [])
+        if not categories:
+            continue
+        if c in df.columns:
+            codes = pd.Categorical(df[c].astype("string"), categories=categories).codes
+        else:
+            codes = np.full(n, -1)
+        rows = np.flatnonzero(codes >= 0)
+        blocks.append(sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, codes[rows])), shape=(n, len(categories)),
+        ))
+    if not blocks:
+        return sparse.csr_matrix((n, 0))
+    return sparse.hstack(blocks, format="csr")
+
+
+def _cache_path(key: str) -> Path:
+    return DESIGN_DIR / f"design_{key}.npz"
+
+
+def _prune_cache(keep: Path) -> None:
+    for p in DESIGN_DIR.glob("design_*.npz"):
+        if p != keep:
+            p.unlink(missing_ok=True)
+
+
+def build_design_matrix(df: pd.DataFrame) -> Tuple[sparse.csr_matrix, pd.Series, List[str]]:
+    # Returns (X, y, feature names). X is cached on disk by the content hash of its inputs,
+    # so training and validation (and reruns on unchanged features) load instead of rebuilding.
+    y = pd.to_numeric(df[target_column(df)], errors="coerce").astype(float)
+    with _lock:
+        vocab, changed = update_vocabulary(df, load_vocabulary())
+        if changed:
+            _save_vocabulary(vocab)
+        key = content_key(df, vocab)
+        names = feature_names(vocab)
+        if _memo.get("key") == key:
+            return _memo["X"], y, names
+        path = _cache_path(key)
+        if path.exists():
+            X = sparse.load_npz(path).tocsr()
+        else:
+            X = encode(df, vocab)
+            DESIGN_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = DESIGN_DIR / f".{path.stem}.tmp.npz"
+            # Uncompressed: zlib dominates the build time and the matrix is mostly index arrays
+            sparse.save_npz(tmp, X, compressed=False)
+            os.replace(tmp, path)
+            _prune_cache(path)
+        _memo.update(key=key, X=X)
+    return X, y, names
+
+
+__all__ = [
+    "build_design_matrix",
+    "encode",
+    "feature_names",
+    "load_vocabulary",
+    "update_vocabulary",
+    "numeric_columns",
+    "target_column",
+]
@@ -0,0 +1,175 @@
+from __future__ import annotations
+import argparse
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sdg_ea_pipeline.logic.storage.artifacts import (
+    artifact_path, find_artifact, open_artifact_writer, read_artifact_file,
+)
+from sdg_ea_pipeline.logic.models.design_matrix import (
+    CATEGORICAL_COLUMNS, VOCABULARY_FILE, encode, load_vocabulary,
+)
+from sdg_ea_pipeline.logic.models.series_fleet import SERIES_TRENDS, predict_series
+
+MODELS_DIR = ROOT / "sdg_ea_pipeline" / "models"
+FEAT_PATH = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "fe" / "features"
+QUERY_COLUMNS = ["country", "indicator_code", "year"]
+HISTORY_COLUMNS = QUERY_COLUMNS + ["target_value"]
+CHUNK_ROWS = 100_000
+
+
+def _stamp(path: Optional[Path]):
+    # (path, mtime_ns, size): memoized loads are keyed on it, so a retrained model or rebuilt
+    # feature table is picked up without restarting the process
+    if path is None or not Path(path).exists():
+        return None
+    st = Path(path).stat()
+    return str(path), st.st_mtime_ns, st.st_size
+
+
+@lru_cache(maxsize=8)
+def _load_joblib(stamp):
+    import joblib
+    return joblib.load(stamp[0])
+
+
+@lru_cache(maxsize=2)
+def _load_vocabulary(stamp):
+    return load_vocabulary(Path(stamp[0]))
+
+
+@lru_cache(maxsize=2)
+def _load_history(stamp):
+    # Observed values in series order, plus an as-of lookup table (already sorted by year, as
+    # merge_asof needs) giving each row's index into those values and its position in its series
+    hist = read_artifact_file(Path(stamp[0]), columns=HISTORY_COLUMNS)
+    hist["year"] = pd.to_numeric(hist["year"], errors="coerce").astype("float64")
+    # Features store the keys as categoricals; merge_asof needs the same key dtype on both sides
+    hist[["country", "indicator_code"]] = hist[["country", "indicator_code"]].astype(str)
+    hist = hist.dropna(subset=["year"]).sort_values(QUERY_COLUMNS, kind="stable").reset_index(drop=True)
+    hist["_row"] = np.arange(len(hist))
+    hist["_pos"] = hist.groupby(["country", "indicator_code"], sort=False).cumcount()
+    values = hist["target_value"].to_numpy(dtype=float, na_value=np.nan)
+    lookup = hist.drop(columns="target_value").sort_values("year", kind="stable").reset_index(drop=True)
+    return lookup, values
+
+
+@lru_cache(maxsize=2)
+def _load_trends(stamp):
+    return read_artifact_file(Path(stamp[0]))
+
+
+def load_model(name: str):
+    stamp = _stamp(MODELS_DIR / name)
+    return _load_joblib(stamp) if stamp else None
+
+
+def check_features(model, name: str, n_features: int) -> None:
+    # A model trained before the vocabulary grew would silently return no predictions
+    expected = getattr(model, "n_features_in_", n_features)
+    if expected != n_features:
+        raise ValueError(
+            f"Model {name} expects {expected} features but the design vocabulary encodes {n_features}. "
+            "Re-run STEP 6 to retrain the models against the current vocabulary."
+        )
+
+
+def lag_features(queries: pd.DataFrame, history, lags: Iterable[int]) -> pd.DataFrame:
+    # lag_k for each query year = the k-th latest observation strictly before that year, as in STEP 5
+    q = queries[QUERY_COLUMNS].copy()
+    q["year"] = pd.to_numeric(q["year"], errors="coerce").astype("float64")
+    q[["country", "indicator_code"]] = q[["country", "indicator_code"]].astype(str)
+    q["_q"] = np.arange(len(q))
+    lookup, values = history
+    matched = pd.merge_asof(
+        q.dropna(subset=["year"]).sort_values("year"), lookup,
+        on="year", by=["country", "indicator_code"], allow_exact_matches=False,
+    )
+    row = np.full(len(q), -1, dtype=np.int64)
+    pos = np.full(len(q), -1, dtype=np.int64)
+    found = matched["_row"].notna().to_numpy()
+    row[matched["_q"].to_numpy()[found]] = matched["_row"].to_numpy()[found].astype(np.int64)
+    pos[matched["_q"].to_numpy()[found]] = matched["_pos"].to_numpy()[found].astype(np.int64)
+    out = queries[QUERY_COLUMNS].copy()
+    for k in lags:
+        ok = (row >= 0) & (pos >= k - 1)
+        lag = np.full(len(q), np.nan)
+        lag[ok] = values[row[ok] - (k - 1)]
+        out[f"lag_{k}"] = lag
+    return out
+
+
+def predict(queries: pd.DataFrame) -> pd.DataFrame:
+    # One vectorized pass for any number of (country, indicator_code, year) rows
+    vocab = _load_vocabulary(_stamp(VOCABULARY_FILE))
+    if vocab is None:
+        raise FileNotFoundError(f"No design vocabulary at {VOCABULARY_FILE}. Run STEP 6 first.")
+    history_stamp = _stamp(find_artifact(FEAT_PATH))
+    if history_stamp is None:
+        raise FileNotFoundError(f"Features file not found at {FEAT_PATH}. Run STEP 5 first.")
+    missing = [c for c in QUERY_COLUMNS if c not in queries.columns]
+    if missing:
+        raise ValueError(f"Queries are missing column(s): {missing}")
+    lags = [int(c.split("_", 1)[1]) for c in vocab["numeric"] if c.startswith("lag_")]
+    frame = lag_features(queries, _load_history(history_stamp), lags)
+    frame[list(CATEGORICAL_COLUMNS)] = frame[list(CATEGORICAL_COLUMNS)].astype("string")
+    X = encode(frame, vocab)
+
+    out = queries[QUERY_COLUMNS].copy()
+    # sklearn rejects zero-row input; no queries still give the usual (empty) output columns
+    rows = len(out)
+    # Absent models are skipped; a model that does not match the vocabulary is an error
+    reg = load_model("linear_regression.joblib")
+    if reg is not None:
+        check_features(reg, "linear_regression.joblib", X.shape[1])
+        out["predicted_value"] = reg.predict(X) if rows else np.empty(0)
+    clf = load_model("logistic_regression.joblib")
+    if clf is not None:
+        check_features(clf, "logistic_regression.joblib", X.shape[1])
+        out["p_above_median"] = clf.predict_proba(X)[:, 1] if rows else np.empty(0)
+    trends_stamp = _stamp(find_artifact(SERIES_TRENDS))
+    if trends_stamp is not None:
+        trends = _load_trends(trends_stamp)
+        for model in trends["model"].unique():
+            out[f"trend_{model}"] = predict_series(trends, queries, model=model)
+    return out
+
+
+def write_predictions(queries: pd.DataFrame, output: Path, fmt: Optional[str] = None,
+                      chunk_rows: int = CHUNK_ROWS) -> Path:
+    # Large query sets are predicted and written chunk by chunk; no queries give an empty artifact
+    with open_artifact_writer(output, fmt) as writer:
+        for start in range(0, max(len(queries), 1), chunk_rows):
+            writer.write(predict(queries.iloc[start:start + chunk_rows]))
+    return artifact_path(output, fmt)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Batch predictions from the persisted STEP 6 models.")
+    parser.add_argument("queries", help="CSV/Parquet file with country, indicator_code, year columns.")
+    parser.add_argument("--output", default=str(ROOT / "sdg_ea_pipeline" / "data" / "processed" / "predictions"),
+                        help="Output artifact path without suffix (default: %(default)s).")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default=None,
+                        help="Output format (default: the configured artifact format).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    queries = read_artifact_file(Path(args.queries))
+    path = write_predictions(queries, Path(args.output), fmt=args.format)
+    print(f"Predictions for {len(queries)} queries written to {path}")
+    return path
+
+
+if __name__ == "__main__":
+    main()
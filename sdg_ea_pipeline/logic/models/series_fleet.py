@@ -0,0 +1,176 @@
+from __future__ import annotations
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sdg_ea_pipeline.logic.storage.artifacts import read_artifact, write_artifact
+
+# One small trend model per (country, indicator_code), all stored in one coefficient table.
+# Time enters as t = year - year_offset (the series' mean year) to keep the solves well conditioned.
+SERIES_TRENDS = ROOT / "sdg_ea_pipeline" / "models" / "series_trends"
+SERIES_KEYS = ["country", "indicator_code"]
+# Polynomial trends solved in one batch; non-linear curves are fitted per series in a process pool
+POLYNOMIAL_MODELS = {"linear": 1, "quadratic": 2}
+LOG_LINEAR_MODELS = ("exponential",)
+NONLINEAR_MODELS = ("logistic",)
+DEFAULT_MODELS = ("linear", "quadratic")
+MAX_COEFS = 3
+NONLINEAR_CHUNK = 500
+
+
+def series_panel(df: pd.DataFrame) -> pd.DataFrame:
+    # (keys, t, y, group) rows with a usable year and value, grouped per series
+    target = "target_value" if "target_value" in df.columns else "value"
+    panel = pd.DataFrame({
+        "country": df["country"],
+        "indicator_code": df["indicator_code"],
+        "year": pd.to_numeric(df["year"], errors="coerce").astype("float64"),
+        "y": pd.to_numeric(df[target], errors="coerce").astype("float64"),
+    }).dropna(subset=["year", "y"])
+    panel = panel.sort_values(SERIES_KEYS + ["year"], kind="stable").reset_index(drop=True)
+    panel["group"] = panel.groupby(SERIES_KEYS, sort=False, observed=True).ngroup()
+    return panel
+
+
+def _series_index(panel: pd.DataFrame) -> pd.DataFrame:
+    first = panel.drop_duplicates("group")
+    g = panel["group"].to_numpy()
+    years = panel["year"].to_numpy()
+    n = np.bincount(g)
+    return pd.DataFrame({
+        "country": first["country"].to_numpy(),
+        "indicator_code": first["indicator_code"].to_numpy(),
+        "n_obs": n,
+        "first_year": pd.Series(years).groupby(g).min().to_numpy(),
+        "last_year": pd.Series(years).groupby(g).max().to_numpy(),
+        "year_offset": np.bincount(g, years) / n,
+    })
+
+
+def _batched_polyfit(g: np.ndarray, t: np.ndarray, y: np.ndarray, degree: int, n_groups: int):
+    # Stacked normal equations: A[g] = sum t^(i+j), b[g] = sum y t^i, solved for every series at
+    # once. pinv keeps short series (fewer points than coefficients) finite instead of singular.
+    k = degree + 1
+    powers = np.stack([t ** p for p in range(2 * k - 1)])
+    moments = np.stack([np.bincount(g, powers[p], minlength=n_groups) for p in range(2 * k - 1)], axis=1)
+    rhs = np.stack([np.bincount(g, y * powers[p], minlength=n_groups) for p in range(k)], axis=1)
+    A = moments[:, np.add.outer(np.arange(k), np.arange(k))]
+    coefs = np.einsum("gij,gj->gi", np.linalg.pinv(A), rhs)
+    fitted = np.einsum("gi,ig->g", coefs[g], powers[:k])
+    ssr = np.bincount(g, (y - fitted) ** 2, minlength=n_groups)
+    dof = np.bincount(g, minlength=n_groups) - k
+    with np.errstate(invalid="ignore", divide="ignore"):
+        residual_std = np.where(dof > 0, np.sqrt(ssr / np.maximum(dof, 1)), np.nan)
+    return coefs, residual_std
+
+
+def _logistic(t, capacity, rate, midpoint):
+    return capacity / (1.0 + np.exp(-rate * (t - midpoint)))
+
+
+def _fit_logistic_chunk(series: Sequence[tuple]) -> list:
+    # Runs in a worker process: one curve_fit per series, NaN where it does not converge
+    from scipy.optimize import curve_fit
+    out = []
+    for t, y in series:
+        params = (np.nan, np.nan, np.nan)
+        resid = np.nan
+        if len(t) >= 4:
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    p0 = (max(np.max(y) * 1.1, 1e-9), 0.1, 0.0)
+                    params, _ = curve_fit(_logistic, t, y, p0=p0, maxfev=2000)
+                resid = float(np.sqrt(np.sum((y - _logistic(t, *params)) ** 2) / (len(t) - 3)))
+            except (RuntimeError, ValueError):
+                params = (np.nan, np.nan, np.nan)
+        out.append((*params, resid))
+    return out
+
+
+def _fit_nonlinear(g: np.ndarray, t: np.ndarray, y: np.ndarray, n_groups: int, workers: int):
+    bounds = np.flatnonzero(np.r_[True, g[1:] != g[:-1], True])
+    series = [(t[a:b], y[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+    chunks = [series[i:i + NONLINEAR_CHUNK] for i in range(0, len(series), NONLINEAR_CHUNK)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_fit_logistic_chunk, chunks))
+    else:
+        results = [_fit_logistic_chunk(c) for c in chunks]
+    fitted = np.array([r for chunk in results for r in chunk], dtype=float).reshape(n_groups, 4)
+    return fitted[:, :3], fitted[:, 3]
+
+
+def fit_series_models(df: pd.DataFrame, models: Iterable[str] = DEFAULT_MODELS, workers: int = 1) -> pd.DataFrame:
+    # Long coefficient table: one row per (country, indicator_code, model)
+    panel = series_panel(df)
+    if panel.empty:
+        return pd.DataFrame(columns=SERIES_KEYS + ["model", "n_obs", "first_year", "last_year", "year_offset"]
+                            + [f"coef_{i}" for i in range(MAX_COEFS)] + ["residual_std"])
+    index = _series_index(panel)
+    g = panel["group"].to_numpy()
+    n_groups = len(index)
+    t = panel["year"].to_numpy() - index["year_offset"].to_numpy()[g]
+    y = panel["y"].to_numpy()
+    tables = []
+    for model in models:
+        if model in POLYNOMIAL_MODELS:
+            coefs, resid = _batched_polyfit(g, t, y, POLYNOMIAL_MODELS[model], n_groups)
+        elif model in LOG_LINEAR_MODELS:
+            # Fitted on log(y); series with any non-positive value get no model
+            positive = np.bincount(g, y <= 0, minlength=n_groups) == 0
+            coefs, resid = _batched_polyfit(g, t, np.log(np.where(y > 0, y, 1.0)), 1, n_groups)
+            coefs[~positive], resid[~positive] = np.nan, np.nan
+        elif model in NONLINEAR_MODELS:
+            coefs, resid = _fit_nonlinear(g, t, y, n_groups, workers)
+        else:
+            raise ValueError(f"Unknown series model '{model}'.")
+        table = index.copy()
+        table.insert(2, "model", model)
+        for i in range(MAX_COEFS):
+            table[f"coef_{i}"] = coefs[:, i] if i < coefs.shape[1] else np.nan
+        table["residual_std"] = resid
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True)
+
+
+def predict_series(trends: pd.DataFrame, frame: pd.DataFrame, model: str = "linear") -> np.ndarray:
+    # Vectorized evaluation for (country, indicator_code, year) rows; NaN for series without a fit
+    coefs = trends[trends["model"] == model].drop(columns="model")
+    rows = frame[SERIES_KEYS + ["year"]].merge(coefs, on=SERIES_KEYS, how="left", validate="many_to_one")
+    t = pd.to_numeric(rows["year"], errors="coerce").to_numpy(dtype=float) - rows["year_offset"].to_numpy(dtype=float)
+    c = [rows[f"coef_{i}"].to_numpy(dtype=float) for i in range(MAX_COEFS)]
+    if model in POLYNOMIAL_MODELS:
+        return sum(c[p] * t ** p for p in range(POLYNOMIAL_MODELS[model] + 1))
+    if model in LOG_LINEAR_MODELS:
+        return np.exp(c[0] + c[1] * t)
+    if model in NONLINEAR_MODELS:
+        return _logistic(t, c[0], c[1], c[2])
+    raise ValueError(f"Unknown series model '{model}'.")
+
+
+def save_series_models(trends: pd.DataFrame) -> Path:
+    return write_artifact(trends, SERIES_TRENDS)
+
+
+def load_series_models() -> pd.DataFrame:
+    return read_artifact(SERIES_TRENDS)
+
+
+__all__ = [
+    "DEFAULT_MODELS",
+    "SERIES_TRENDS",
+    "fit_series_models",
+    "predict_series",
+    "save_series_models",
+    "load_series_models",
+]
@@ -1,5 +1,6 @@
 from __future__ import annotations
 import json
+import sys
 from pathlib import Path
 import pandas as pd
 import numpy as np
@@ -9,7 +10,14 @@ from sklearn.linear_model import LinearRegression, LogisticRegression
 import joblib
 
 ROOT = Path(__file__).resolve().parents[3]
-FEAT_CSV = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "fe" / "features.csv"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sdg_ea_pipeline.logic.storage.artifacts import artifact_exists, read_artifact
+from sdg_ea_pipeline.logic.models.design_matrix import build_design_matrix
+from sdg_ea_pipeline.logic.models.series_fleet import DEFAULT_MODELS, fit_series_models, save_series_models
+
+FEAT_PATH = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "fe" / "features"
 OUTPUT_MODELS_DIR = ROOT / "sdg_ea_pipeline" / "models"
 REPORTS_DIR = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "fe" / "model_reports"
 
@@ -20,26 +28,15 @@ def ensure_dirs():
 
 
 def load_features():
-    if not FEAT_CSV.exists():
-        raise FileNotFoundError(f"Features file not found at {FEAT_CSV}. Run STEP 5 first.")
-    df = pd.read_csv(FEAT_CSV)
+    if not artifact_exists(FEAT_PATH):
+        raise FileNotFoundError(f"Features file not found at {FEAT_PATH}. Run STEP 5 first.")
+    df = read_artifact(FEAT_PATH)
     return df
 
 
 def prepare_dataset(df: pd.DataFrame):
-    if 'target_value' in df.columns:
-        y = df['target_value'].astype(float)
-        X = df.drop(columns=['target_value'])
-    elif 'value' in df.columns:
-        y = df['value'].astype(float)
-        X = df.drop(columns=['value'])
-    else:
-        raise ValueError("No target column found for regression: 'target_value' or 'value'.")
-
-    X = X.select_dtypes(include=[np.number]).fillna(0)
-    if 'country' in X.columns and 'indicator_code' in X.columns:
-        X = pd.get_dummies(X, columns=["country", "indicator_code"], drop_first=True)
-    y = y.astype(float)
+    # Sparse CSR matrix shared with validation (see design_matrix.py)
+    X, y, _ = build_design_matrix(df)
     return X, y
 
 
@@ -71,9 +68,26 @@ def train_classification(X, y):
     return clf, X_test, y_test, y_pred, {'accuracy': acc, 'confusion_matrix': cm.tolist()}
 
 
-def main():
+def train_series_models(df: pd.DataFrame, models=DEFAULT_MODELS, workers: int = 1):
+    # Per-(country, indicator) trends, all coefficients in one table instead of one pickle each
+    trends = fit_series_models(df, models=models, workers=workers)
+    save_series_models(trends)
+    summary = {
+        'models': list(models),
+        'n_series': int(trends[['country', 'indicator_code']].drop_duplicates().shape[0]),
+        'median_residual_std': {
+            m: (None if pd.isna(v) else float(v))
+            for m, v in trends.groupby('model')['residual_std'].median().items()
+        },
+    }
+    with open(REPORTS_DIR / 'series_report.json', 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main(features: pd.DataFrame | None = None, series_models=DEFAULT_MODELS, workers: int = 1):
     ensure_dirs()
-    df = load_features()
+    df = load_features() if features is None else features
     X, y = prepare_dataset(df)
 
     reg_model, X_t, y_t, y_pred, reg_metrics = train_regression(X, y)
@@ -97,7 +111,9 @@ def main():
         }
         with open(REPORTS_DIR / 'classification_report.json', 'w', encoding='utf-8') as f:
             json.dump(report_clf, f, indent=2)
+    series_summary = train_series_models(df, models=series_models, workers=workers)
     print("STEP 6: Baseline models trained.")
+    return {'regression': reg_metrics, 'classification': clf_metrics, 'series': series_summary}
 
 
 if __name__ == '__main__':
@@ -0,0 +1,315 @@
+from __future__ import annotations
+import os
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+import pandas as pd
+
+try:
+    import pyarrow as pa  # optional; enables Parquet / Arrow IPC intermediates
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    ARROW_AVAILABLE = True
+except Exception:
+    ARROW_AVAILABLE = False
+
+# Intermediate artifacts (interim, cleaned, features) are addressed by a base path
+# without suffix; the configured format decides the on-disk suffix. CSV is only a
+# fallback when pyarrow is missing and otherwise remains an export format.
+DEFAULT_FORMAT = os.environ.get("SDG_EA_ARTIFACT_FORMAT") or ("parquet" if ARROW_AVAILABLE else "csv")
+PARQUET_COMPRESSION = "zstd"
+
+
+@dataclass(frozen=True)
+class ArtifactFormat:
+    name: str
+    suffix: str
+    write: Callable[[pd.DataFrame, Path], None]
+    read: Callable[[Path, Optional[Sequence[str]]], pd.DataFrame]
+    columns: Callable[[Path], List[str]]
+    # Returns an object with write(df) / close() for chunk-at-a-time output
+    open_writer: Callable[[Path], "ChunkWriter"]
+    # Optional: writes a pyarrow Table directly (no pandas round trip per write)
+    write_table: Optional[Callable[[Any, Path], None]] = None
+
+
+class ChunkWriter(ABC):
+    # Subclasses must implement write; an incomplete one fails when instantiated
+    @abstractmethod
+    def write(self, df: pd.DataFrame) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class _CsvChunkWriter(ChunkWriter):
+    def __init__(self, path: Path):
+        self.path = path
+        self.header = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self.path, index=False, header=self.header, mode="w" if self.header else "a")
+        self.header = False
+
+    def close(self) -> None:
+        if self.header:  # nothing written: leave an empty file behind
+            open(self.path, "w").close()
+
+
+FORMATS: Dict[str, ArtifactFormat] = {}
+
+
+def register_format(fmt: ArtifactFormat) -> None:
+    FORMATS[fmt.name] = fmt
+
+
+def _csv_columns(path: Path) -> List[str]:
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+# The default float parser can be off by an ulp; CSV artifacts must read back exactly what was written
+CSV_FLOAT_PRECISION = "round_trip"
+
+
+def _read_csv(path: Path, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    if columns is None:
+        return pd.read_csv(path, float_precision=CSV_FLOAT_PRECISION)
+    wanted = set(columns)
+    return pd.read_csv(path, usecols=lambda c: c in wanted, float_precision=CSV_FLOAT_PRECISION)
+
+
+register_format(ArtifactFormat(
+    name="csv",
+    suffix=".csv",
+    write=lambda df, path: df.to_csv(path, index=False),
+    read=_read_csv,
+    columns=_csv_columns,
+    open_writer=_CsvChunkWriter,
+))
+
+if ARROW_AVAILABLE:
+    def _read_parquet(path: Path, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+        if columns is not None:
+            columns = [c for c in columns if c in set(_parquet_columns(path))]
+        return pd.read_parquet(path, columns=columns)
+
+    def _parquet_columns(path: Path) -> List[str]:
+        return list(pq.read_schema(path).names)
+
+    def _read_arrow(path: Path, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+        if columns is not None:
+            columns = [c for c in columns if c in set(_arrow_columns(path))]
+        # Uncompressed IPC files are memory-mapped, so the Arrow read itself does not copy;
+        # to_pandas still copies the selected columns into pandas-owned memory
+        return feather.read_table(str(path), columns=columns, memory_map=True).to_pandas()
+
+    def _arrow_columns(path: Path) -> List[str]:
+        with pa.memory_map(str(path)) as source:
+            return list(pa.ipc.open_file(source).schema.names)
+
+    class _ArrowChunkWriter(ChunkWriter):
+        # The first chunk fixes the schema; later chunks are cast to it
+        def __init__(self, path: Path, ipc: bool):
+            self.path = path
+            self.ipc = ipc
+            self.writer = None
+            self.schema = None
+
+        def write(self, df: pd.DataFrame) -> None:
+            table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+            if self.writer is None:
+                self.schema = table.schema
+                if self.ipc:
+                    self.writer = pa.ipc.new_file(str(self.path), self.schema)
+                else:
+                    self.writer = pq.ParquetWriter(str(self.path), self.schema, compression=PARQUET_COMPRESSION)
+            self.writer.write_table(table)
+
+        def close(self) -> None:
+            if self.writer is not None:
+                self.writer.close()
+            elif self.ipc:
+                feather.write_feather(pd.DataFrame(), str(self.path), compression="uncompressed")
+            else:
+                pd.DataFrame().to_parquet(self.path)
+
+    register_format(ArtifactFormat(
+        name="parquet",
+        suffix=".parquet",
+        write=lambda df, path: df.to_parquet(path, index=False, compression=PARQUET_COMPRESSION),
+        read=_read_parquet,
+        columns=_parquet_columns,
+        open_writer=lambda path: _ArrowChunkWriter(path, ipc=False),
+        write_table=lambda table, path: pq.write_table(table, str(path), compression=PARQUET_COMPRESSION),
+    ))
+    register_format(ArtifactFormat(
+        name="arrow",
+        suffix=".arrow",
+        write=lambda df, path: feather.write_feather(df.reset_index(drop=True), str(path), compression="uncompressed"),
+        read=_read_arrow,
+        columns=_arrow_columns,
+        open_writer=lambda path: _ArrowChunkWriter(path, ipc=True),
+        write_table=lambda table, path: feather.write_feather(table, str(path), compression="uncompressed"),
+    ))
+
+
+def _format(name: Optional[str] = None) -> ArtifactFormat:
+    name = name or DEFAULT_FORMAT
+    if name not in FORMATS:
+        raise ValueError(f"Unknown or unavailable artifact format '{name}'. Available: {sorted(FORMATS)}")
+    return FORMATS[name]
+
+
+def _format_for_path(path: Path) -> ArtifactFormat:
+    for fmt in FORMATS.values():
+        if path.suffix.lower() == fmt.suffix:
+            return fmt
+    raise ValueError(f"No artifact format registered for {path}")
+
+
+def artifact_path(base: Path, fmt: Optional[str] = None) -> Path:
+    base = Path(base)
+    return base.parent / f"{base.name}{_format(fmt).suffix}"
+
+
+def find_artifact(base: Path) -> Optional[Path]:
+    # Prefer the configured format, then anything else that exists (e.g. legacy CSV)
+    candidates = [_format()] + [f for f in FORMATS.values() if f.name != _format().name]
+    for fmt in candidates:
+        path = artifact_path(base, fmt.name)
+        if path.exists():
+            return path
+    return None
+
+
+def artifact_exists(base: Path) -> bool:
+    return find_artifact(base) is not None
+
+
+def write_artifact(df: pd.DataFrame, base: Path, fmt: Optional[str] = None) -> Path:
+    path = artifact_path(base, fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temp file and swap in atomically so concurrent readers never see partial files
+    tmp = path.parent / f".{path.name}.tmp"
+    _format(fmt).write(df, tmp)
+    os.replace(tmp, path)
+    _drop_stale(base, path)
+    return path
+
+
+def supports_tables(fmt: Optional[str] = None) -> bool:
+    return _format(fmt).write_table is not None
+
+
+def write_artifact_table(table, base: Path, fmt: Optional[str] = None) -> Path:
+    # Same as write_artifact for a pyarrow Table; e.g. many zero-copy slices of one converted table
+    path = artifact_path(base, fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.parent / f".{path.name}.tmp"
+    _format(fmt).write_table(table, tmp)
+    os.replace(tmp, path)
+    _drop_stale(base, path)
+    return path
+
+
+def _drop_stale(base: Path, path: Path) -> None:
+    # Drop copies in other formats so readers cannot pick up an outdated artifact
+    for other in FORMATS.values():
+        stale = artifact_path(base, other.name)
+        if stale != path and stale.exists():
+            stale.unlink()
+
+
+@contextmanager
+def open_artifact_writer(base: Path, fmt: Optional[str] = None) -> Iterator[ChunkWriter]:
+    # Streams chunks into one artifact; it only appears under its final name once fully written
+    path = artifact_path(base, fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.parent / f".{path.name}.tmp"
+    writer = _format(fmt).open_writer(tmp)
+    try:
+        yield writer
+        writer.close()
+    except BaseException:
+        writer.close()
+        if tmp.exists():
+            tmp.unlink()
+        raise
+    os.replace(tmp, path)
+    _drop_stale(base, path)
+
+
+def read_artifact_file(path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    # `columns` is a projection: only the requested columns that exist are read
+    return _format_for_path(Path(path)).read(Path(path), columns)
+
+
+def iter_artifact_file(path: Path, chunk_rows: int, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+    # Chunk-at-a-time read for files that may not fit in memory; chunks concatenate to read_artifact_file
+    path = Path(path)
+    if ARROW_AVAILABLE and path.suffix.lower() in (".parquet", ".arrow"):
+        if path.suffix.lower() == ".parquet":
+            source = pq.ParquetFile(str(path))
+            if columns is not None:
+                columns = [c for c in columns if c in set(source.schema_arrow.names)]
+            batches = source.iter_batches(batch_size=chunk_rows, columns=columns)
+        else:
+            if columns is not None:
+                columns = [c for c in columns if c in set(_arrow_columns(path))]
+            batches = feather.read_table(str(path), columns=columns, memory_map=True).to_batches(max_chunksize=chunk_rows)
+        for batch in batches:
+            yield batch.to_pandas()
+        return
+    if path.suffix.lower() == ".csv":
+        wanted = None if columns is None else set(columns)
+        yield from pd.read_csv(path, chunksize=chunk_rows, usecols=None if wanted is None else (lambda c: c in wanted),
+                               float_precision=CSV_FLOAT_PRECISION)
+        return
+    yield read_artifact_file(path, columns)
+
+
+def read_artifact(base: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    path = find_artifact(base)
+    if path is None:
+        raise FileNotFoundError(f"Artifact not found at {base} (formats: {sorted(FORMATS)})")
+    return read_artifact_file(path, columns)
+
+
+def artifact_columns(base: Path) -> List[str]:
+    path = find_artifact(base)
+    if path is None:
+        raise FileNotFoundError(f"Artifact not found at {base} (formats: {sorted(FORMATS)})")
+    return _format_for_path(path).columns(path)
+
+
+def list_artifacts(directory: Path, pattern: str = "*") -> List[Path]:
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+    suffixes = {f.suffix for f in FORMATS.values()}
+    return sorted(p for p in directory.rglob(pattern) if p.is_file() and p.suffix.lower() in suffixes)
+
+
+__all__ = [
+    "ARROW_AVAILABLE",
+    "DEFAULT_FORMAT",
+    "ArtifactFormat",
+    "FORMATS",
+    "register_format",
+    "artifact_path",
+    "find_artifact",
+    "artifact_exists",
+    "write_artifact",
+    "write_artifact_table",
+    "supports_tables",
+    "ChunkWriter",
+    "open_artifact_writer",
+    "read_artifact",
+    "read_artifact_file",
+    "iter_artifact_file",
+    "artifact_columns",
+    "list_artifacts",
+]
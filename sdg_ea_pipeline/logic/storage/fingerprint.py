@@ -0,0 +1,16 @@
+from __future__ import annotations
+import hashlib
+from pathlib import Path
+
+CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path: Path, algorithm: str = "sha256") -> str:
+    h = hashlib.new(algorithm)
+    with open(str(path), "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+__all__ = ["file_digest"]
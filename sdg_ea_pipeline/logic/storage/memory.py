@@ -0,0 +1,177 @@
+from __future__ import annotations
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[3]
+CONFIG_FILE = ROOT / "sdg_ea_pipeline" / "config" / "config.yaml"
+
+# Compact schema shared by the cleaned and feature tables:
+#   country / indicator_code -> categorical, categories = GovernanceConfig vocabulary first
+#                               (config order), then any other observed code
+#   source / reliability / risk_level / impute_method -> categorical (a handful of distinct values)
+#   year -> Int16 (nullable)
+#   float columns -> float32 when SDG_EA_FLOAT32=1 (or `run_pipeline.py --float32`), else float64
+CODE_COLUMNS = ("country", "indicator_code")
+LABEL_COLUMNS = ("source", "reliability", "risk_level", "impute_method")
+YEAR_DTYPE = "Int16"
+FLOAT32_ENV = "SDG_EA_FLOAT32"
+# Peak working set of a stage relative to the frame it holds (sorts, merges and feature
+# columns materialize several column-sized temporaries)
+WORKING_SET_FACTOR = 4.0
+# In-memory size of a parsed CSV relative to its size on disk, for budgeting ingestion
+CSV_EXPANSION = 3.0
+SIZE_UNITS = {"": 1, "K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+
+
+def use_float32() -> bool:
+    return os.environ.get(FLOAT32_ENV, "").lower() in {"1", "true", "yes"}
+
+
+def float_dtype() -> str:
+    return "float32" if use_float32() else "float64"
+
+
+def policy() -> dict:
+    # Part of the stage-cache fingerprint: switching policy must not reuse stale artifacts
+    return {"year": YEAR_DTYPE, "float": float_dtype(), "codes": "category"}
+
+
+def config_vocabulary(config_path: Path = CONFIG_FILE) -> dict:
+    try:
+        from sdg_ea_pipeline.config.loader import load_config
+        cfg = load_config(str(config_path))
+    except Exception:
+        return {}
+    return {
+        "country": [str(c) for c in cfg.countries],
+        "indicator_code": [str(i.get("code")) if isinstance(i, dict) else str(i) for i in cfg.indicators],
+    }
+
+
+def _categorical(col: pd.Series, vocabulary: Iterable[str] = ()) -> pd.Series:
+    if isinstance(col.dtype, pd.CategoricalDtype) and not list(vocabulary):
+        return col
+    codes, uniques = pd.factorize(col, use_na_sentinel=True)
+    vocabulary = list(dict.fromkeys(vocabulary))
+    known = set(vocabulary)
+    categories = vocabulary + sorted(str(u) for u in uniques if str(u) not in known)
+    # Remap factorized codes onto the category order without touching the rows again
+    position = pd.Index(categories).get_indexer([str(u) for u in uniques])
+    remapped = np.append(position, -1)[codes].astype(np.int32 if len(categories) > 32767 else np.int16)
+    return pd.Series(pd.Categorical.from_codes(remapped, categories=categories), index=col.index, name=col.name)
+
+
+def _year(col: pd.Series) -> pd.Series:
+    if str(col.dtype) == YEAR_DTYPE:
+        return col
+    values = pd.to_numeric(col, errors="coerce")
+    lo, hi = values.min(), values.max()
+    if pd.notna(lo) and (lo < np.iinfo(np.int16).min or hi > np.iinfo(np.int16).max):
+        return values.astype("Int64")
+    return values.round().astype(YEAR_DTYPE)
+
+
+def compact_frame(df: pd.DataFrame, vocabulary: Optional[dict] = None) -> pd.DataFrame:
+    # Converts columns in place (column replacement, no full-frame copy) and returns df.
+    # Partitioned runs pass the whole table's vocabulary so every shard gets the same categories.
+    vocabulary = config_vocabulary() if vocabulary is None else vocabulary
+    for c in (*CODE_COLUMNS, *LABEL_COLUMNS):
+        if c in df.columns:
+            df[c] = _categorical(df[c], vocabulary.get(c, ()))
+    if "year" in df.columns:
+        df["year"] = _year(df["year"])
+    target = float_dtype()
+    for c in df.columns:
+        if pd.api.types.is_float_dtype(df[c].dtype) and str(df[c].dtype) != target:
+            df[c] = df[c].astype(target)
+    return df
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def artifact_nbytes(path: Path) -> int:
+    # Estimated in-memory size of an artifact, read from metadata without loading it
+    path = Path(path)
+    if path.suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+            meta = pq.ParquetFile(str(path)).metadata
+            return int(sum(meta.row_group(i).total_byte_size for i in range(meta.num_row_groups)))
+        except Exception:
+            pass
+    if path.suffix == ".csv":
+        return int(path.stat().st_size * CSV_EXPANSION)
+    return int(path.stat().st_size)
+
+
+def parse_size(value) -> Optional[int]:
+    # "512M", "2G", "1.5GiB", "1000000" -> bytes
+    if value is None or isinstance(value, int):
+        return value
+    m = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]?)(?:I?B)?\s*", str(value).upper())
+    if not m:
+        raise ValueError(f"Invalid memory size '{value}' (expected e.g. 512M or 2G)")
+    return int(float(m.group(1)) * SIZE_UNITS[m.group(2)])
+
+
+def format_size(nbytes: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(nbytes) < 1024 or unit == "GiB":
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+
+
+class MemoryBudgetExceeded(MemoryError):
+    pass
+
+
+class MemoryBudget:
+    # Per-stage memory budget. Stages that can stream (ingestion) size their chunks from it;
+    # the others call check() and fail fast before the expensive part of the stage.
+    def __init__(self, limit: Optional[int]):
+        self.limit = parse_size(limit)
+
+    def __bool__(self) -> bool:
+        return self.limit is not None
+
+    def fits(self, nbytes: float) -> bool:
+        return self.limit is None or nbytes <= self.limit
+
+    def check_bytes(self, nbytes: float, stage: str, factor: float = WORKING_SET_FACTOR) -> int:
+        estimate = int(nbytes * factor)
+        if not self.fits(estimate):
+            raise MemoryBudgetExceeded(
+                f"{stage}: estimated working set {format_size(estimate)} exceeds the memory budget of "
+                f"{format_size(self.limit)}. Raise --memory-budget or process fewer countries per run."
+            )
+        return estimate
+
+    def check(self, df: pd.DataFrame, stage: str, factor: float = WORKING_SET_FACTOR) -> int:
+        return self.check_bytes(frame_nbytes(df), stage, factor)
+
+    def chunk_rows(self, bytes_per_row: float, factor: float = WORKING_SET_FACTOR) -> Optional[int]:
+        # Rows per chunk so one chunk's working set stays within the budget
+        if self.limit is None or bytes_per_row <= 0:
+            return None
+        return max(1, int(self.limit / (bytes_per_row * factor)))
+
+
+__all__ = [
+    "MemoryBudget",
+    "MemoryBudgetExceeded",
+    "artifact_nbytes",
+    "compact_frame",
+    "config_vocabulary",
+    "float_dtype",
+    "format_size",
+    "frame_nbytes",
+    "parse_size",
+    "policy",
+]
@@ -0,0 +1,194 @@
+from __future__ import annotations
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from sdg_ea_pipeline.logic.storage.artifacts import ARROW_AVAILABLE, open_artifact_writer, read_artifact_file, write_artifact
+from sdg_ea_pipeline.logic.storage.memory import CODE_COLUMNS, LABEL_COLUMNS, MemoryBudget, artifact_nbytes
+
+ROOT = Path(__file__).resolve().parents[3]
+PARTITIONS_DIR = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "partitions"
+PARTITION_KEY = "country"
+# Cleaning fills missing countries with this code, so those rows share its partition
+MISSING_KEY = "UNKNOWN"
+CHUNK_ROWS = 250_000
+# Shards are scratch files read back once or twice: uncompressed Arrow IPC when available
+SHARD_FORMAT = "arrow" if ARROW_AVAILABLE else None
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Out-of-core execution for cleaning and feature engineering. Rows are sharded by country into
+# part files under data/processed/partitions/<stage>/country=<code>/, so every series lives in
+# exactly one shard, and shards are processed independently in a process pool. Statistics that
+# span countries (per-indicator means / medians, vocabularies, the earliest year) come from a
+# first pass and are handed to every shard, so the shard outputs, concatenated in partition
+# order, equal the in-memory result row for row.
+
+
+def partition_keys(col: pd.Series) -> pd.Series:
+    return col.astype("string").fillna(MISSING_KEY)
+
+
+def shard_dir(root: Path, key) -> Path:
+    return root / f"{PARTITION_KEY}={quote(str(key), safe='')}"
+
+
+def write_shard(df: pd.DataFrame, base: Path) -> Path:
+    return write_artifact(df, base, SHARD_FORMAT)
+
+
+def write_shards(chunks: Iterable[pd.DataFrame], root: Path,
+                 keys: Callable[[pd.DataFrame], pd.Series]) -> Dict[str, List[Path]]:
+    # Each chunk adds one numbered part file per key it contains, so a shard's parts read in
+    # order give its rows in input order
+    shutil.rmtree(root, ignore_errors=True)
+    shards: Dict[str, List[Path]] = {}
+    for n, chunk in enumerate(chunks):
+        chunk = chunk.reset_index(drop=True)
+        for key, rows in chunk.groupby(keys(chunk), sort=False).indices.items():
+            path = write_shard(chunk.iloc[rows], shard_dir(root, key) / f"part-{n:06d}")
+            shards.setdefault(str(key), []).append(path)
+    return shards
+
+
+def read_shard(parts: Sequence[Path], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    frames = [read_artifact_file(p, columns) for p in parts]
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True, sort=False)
+
+
+def combine_shards(parts: Iterable[Path], base: Path, chunk_rows: int = CHUNK_ROWS) -> None:
+    # Streams shard outputs into one artifact, holding about chunk_rows rows at a time; small
+    # shards are written together so the artifact keeps large row groups. Empty shards (every
+    # row rejected) are skipped: their categoricals lose the dictionary on the IPC round trip.
+    buffer, rows, empty, written = [], 0, None, False
+    with open_artifact_writer(base) as writer:
+        for p in parts:
+            df = read_artifact_file(p)
+            if df.empty:
+                empty = df if empty is None else empty
+                continue
+            buffer.append(df)
+            rows += len(df)
+            if rows >= chunk_rows:
+                writer.write(pd.concat(buffer, ignore_index=True))
+                buffer, rows, written = [], 0, True
+        if buffer:
+            writer.write(pd.concat(buffer, ignore_index=True))
+        elif not written and empty is not None:
+            writer.write(empty)
+
+
+def conform(df: pd.DataFrame, schema: pd.DataFrame) -> pd.DataFrame:
+    # Columns and dtypes of the whole table, for a shard that only saw some of its input files
+    df = df.reindex(columns=schema.columns)
+    for c, dtype in schema.dtypes.items():
+        if df[c].dtype != dtype:
+            df[c] = df[c].astype(dtype)
+    return df
+
+
+def shard_bytes(parts: Sequence[Path]) -> int:
+    return sum(artifact_nbytes(p) for p in parts)
+
+
+def plan_workers(shards: Dict[str, List[Path]], workers: int, budget: MemoryBudget, stage: str) -> int:
+    # Each worker holds one shard at a time: run as many as the budget allows, and fail fast
+    # if even the largest shard alone would not fit
+    if not budget or not shards:
+        return workers
+    largest = max(shard_bytes(parts) for parts in shards.values())
+    per_worker = budget.check_bytes(largest, f"{stage} (largest partition)")
+    return max(1, min(workers, budget.limit // max(per_worker, 1)))
+
+
+def map_shards(func: Callable, items: Sequence, workers: int = DEFAULT_WORKERS) -> list:
+    # Results in input order; a single worker (or shard) runs in-process
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ProcessPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+def observed_vocabulary(df: pd.DataFrame) -> Dict[str, set]:
+    # What compact_frame would derive categories from: observed codes, and label categories
+    # as they are (or observed labels when the column is not categorical yet)
+    out = {}
+    for c in (*CODE_COLUMNS, *LABEL_COLUMNS):
+        if c not in df.columns:
+            continue
+        col = df[c]
+        if c in LABEL_COLUMNS and isinstance(col.dtype, pd.CategoricalDtype):
+            out[c] = {str(v) for v in col.cat.categories}
+        else:
+            out[c] = {str(v) for v in pd.unique(col.dropna())}
+    return out
+
+
+def merge_vocabularies(observed: Iterable[Dict[str, set]], base: Dict[str, list]) -> Dict[str, list]:
+    # The category order compact_frame gives a whole table: configured codes first, then every
+    # other observed value sorted; labels sorted
+    merged: Dict[str, set] = {}
+    for vocab in observed:
+        for c, values in vocab.items():
+            merged.setdefault(c, set()).update(values)
+    out = {}
+    for c, values in merged.items():
+        known = list(dict.fromkeys(base.get(c, ()))) if c in CODE_COLUMNS else []
+        out[c] = known + sorted(values - set(known))
+    return out
+
+
+def _group_stat(keys: Sequence[pd.Series], values: Sequence[pd.Series], stat: str) -> pd.Series:
+    cats = union_categoricals([pd.Categorical(k.astype("string")) for k in keys], ignore_order=True)
+    out = getattr(pd.concat(list(values), ignore_index=True).groupby(cats, observed=True), stat)()
+    out.index = out.index.astype(str)
+    return out
+
+
+def group_means(keys: Sequence[pd.Series], values: Sequence[pd.Series]) -> pd.Series:
+    # Per-key mean over shard columns concatenated in partition order. Rows reach the groupby
+    # in the in-memory order, so the (compensated) sums and the means match it exactly.
+    return _group_stat(keys, values, "mean")
+
+
+def group_medians(keys: Sequence[pd.Series], values: Sequence[pd.Series]) -> pd.Series:
+    # Per-key median over shard columns: needs every value, but not their order
+    return _group_stat(keys, values, "median")
+
+
+def lookup(keys: pd.Series, table: pd.Series) -> pd.Series:
+    # Broadcast a per-key statistic onto rows; unknown or missing keys give NaN
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        codes = keys.cat.codes.to_numpy()
+        pos = np.append(table.index.get_indexer(keys.cat.categories.astype(str)), -1)[codes]
+    else:
+        pos = table.index.get_indexer(keys.astype("string"))
+    values = np.where(pos >= 0, table.to_numpy()[pos], np.nan)
+    return pd.Series(values, index=keys.index, dtype=table.dtype)
+
+
+__all__ = [
+    "CHUNK_ROWS",
+    "DEFAULT_WORKERS",
+    "PARTITIONS_DIR",
+    "combine_shards",
+    "conform",
+    "group_means",
+    "group_medians",
+    "lookup",
+    "map_shards",
+    "merge_vocabularies",
+    "observed_vocabulary",
+    "partition_keys",
+    "plan_workers",
+    "read_shard",
+    "shard_dir",
+    "write_shard",
+    "write_shards",
+]
@@ -0,0 +1,219 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sdg_ea_pipeline.config.loader import GovernanceConfig, load_config
+from sdg_ea_pipeline.logic.storage.artifacts import read_artifact_file
+
+CONFIG_FILE = ROOT / "sdg_ea_pipeline" / "config" / "config.yaml"
+QUALITY_SUMMARY = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "quality_summary.json"
+QUALITY_COLUMN = "quality_flags"
+
+# One bit per check; a row's quality_flags is the OR of every check it fails.
+# missing / outdated / estimated are only set when enabled in data_quality_flags.
+FLAGS = {
+    "missing": 1,            # value is null
+    "outdated": 2,           # year before the configured reporting window
+    "estimated": 4,          # reliability == "estimated"
+    "bad_type": 8,           # a schema field holds a value of the wrong type
+    "missing_key": 16,       # country / indicator_code / year null or unusable
+    "unknown_country": 32,   # country not in the configured allow-list
+    "unknown_indicator": 64, # indicator_code not in the configured allow-list
+    "year_out_of_range": 128,  # year after the configured reporting window
+    "bad_enum": 256,         # value outside a schema field's enum
+}
+# Rows with any of these bits are dropped before cleaning; the others are kept and reported
+REJECT_FLAGS = ("missing_key", "unknown_country", "unknown_indicator")
+KEY_FIELDS = ("country", "indicator_code", "year")
+# Ingested files call the observed value `value`; cleaned tables call it `target_value`
+FIELD_ALIASES = {"value": "target_value"}
+NUMERIC_TYPES = {"integer", "number"}
+
+
+@dataclass(frozen=True)
+class QualityRules:
+    # Schema fields as (name, type, enum) plus the allow-lists, compiled once from the config
+    fields: Tuple[Tuple[str, str, Optional[frozenset]], ...]
+    countries: frozenset
+    indicators: frozenset
+    year_min: Optional[int]
+    year_max: Optional[int]
+    enabled: frozenset = field(default_factory=frozenset)
+
+    @property
+    def reject_mask(self) -> int:
+        return sum(FLAGS[f] for f in REJECT_FLAGS)
+
+
+def compile_rules(cfg: GovernanceConfig) -> QualityRules:
+    fields = tuple(
+        (str(f["name"]), str(f.get("type", "string")), frozenset(map(str, f["enum"])) if f.get("enum") else None)
+        for f in cfg.metadata_schema.get("fields", []) if isinstance(f, dict) and f.get("name")
+    )
+    indicators = [i.get("code") if isinstance(i, dict) else i for i in cfg.indicators]
+    years = [int(y) for y in cfg.years]
+    return QualityRules(
+        fields=fields,
+        countries=frozenset(str(c) for c in cfg.countries),
+        indicators=frozenset(str(i) for i in indicators if i is not None),
+        year_min=min(years) if years else None,
+        year_max=max(years) if years else None,
+        enabled=frozenset(k for k, v in cfg.data_quality_flags.items() if v and k in FLAGS),
+    )
+
+
+def load_rules(config_path: Path = CONFIG_FILE) -> QualityRules:
+    return compile_rules(load_config(str(config_path)))
+
+
+def _column(df: pd.DataFrame, name: str) -> Optional[pd.Series]:
+    if name in df.columns:
+        return df[name]
+    alias = FIELD_ALIASES.get(name)
+    return df[alias] if alias in df.columns else None
+
+
+def _numeric(col: pd.Series, integer: bool) -> Tuple[np.ndarray, np.ndarray]:
+    # float64 values plus a bad-type mask (present but not coercible / not integral)
+    if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+        values = col.to_numpy(dtype="float64", na_value=np.nan)
+        bad = np.zeros(len(col), dtype=bool)
+    else:
+        values = pd.to_numeric(col, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        bad = np.isnan(values) & col.notna().to_numpy(dtype=bool)
+    if integer:
+        with np.errstate(invalid="ignore"):
+            fractional = ~np.isnan(values) & (values != np.floor(values))
+        bad |= fractional
+        values = np.where(fractional, np.nan, values)
+    return values, bad
+
+
+def _members(col: pd.Series, allowed: frozenset) -> np.ndarray:
+    # Hash each distinct value once and test only the uniques against the allow-list;
+    # nulls count as members here (they are reported as missing_key instead)
+    codes, uniques = pd.factorize(col, use_na_sentinel=True)
+    ok = np.fromiter((str(u) in allowed for u in uniques), dtype=bool, count=len(uniques))
+    return np.append(ok, True)[codes]
+
+
+def quality_flags(df: pd.DataFrame, rules: QualityRules) -> np.ndarray:
+    # Single columnar pass: each check ORs its bit into one uint16 array, no per-row Python
+    n = len(df)
+    flags = np.zeros(n, dtype=np.uint16)
+
+    def mark(name: str, mask: np.ndarray) -> None:
+        np.bitwise_or(flags, np.uint16(FLAGS[name]), out=flags, where=mask)
+
+    years = None
+    for name, ftype, enum in rules.fields:
+        col = _column(df, name)
+        if col is None:
+            if name in KEY_FIELDS:
+                mark("missing_key", np.ones(n, dtype=bool))
+            continue
+        null = col.isna().to_numpy(dtype=bool)
+        if ftype in NUMERIC_TYPES:
+            values, bad = _numeric(col, integer=ftype == "integer")
+            mark("bad_type", bad)
+            if name == "year":
+                years = values
+            null = np.isnan(values)
+        if name in KEY_FIELDS:
+            mark("missing_key", null)
+        if name == "value" and "missing" in rules.enabled:
+            mark("missing", null)
+        if enum is not None:
+            mark("bad_enum", ~null & ~_members(col.astype("string"), enum))
+        if name == "reliability" and "estimated" in rules.enabled:
+            mark("estimated", (col.astype("string") == "estimated").to_numpy(dtype=bool, na_value=False))
+
+    if rules.countries and "country" in df.columns:
+        mark("unknown_country", ~_members(df["country"], rules.countries))
+    if rules.indicators and "indicator_code" in df.columns:
+        mark("unknown_indicator", ~_members(df["indicator_code"], rules.indicators))
+    if years is not None:
+        with np.errstate(invalid="ignore"):
+            if rules.year_min is not None and "outdated" in rules.enabled:
+                mark("outdated", years < rules.year_min)
+            if rules.year_max is not None:
+                mark("year_out_of_range", years > rules.year_max)
+    return flags
+
+
+def summarize(flags: np.ndarray, rules: QualityRules) -> dict:
+    counts = {name: int(np.count_nonzero(flags & bit)) for name, bit in FLAGS.items()}
+    return {
+        "rows": int(len(flags)),
+        "clean_rows": int(np.count_nonzero(flags == 0)),
+        "rejected_rows": int(np.count_nonzero(flags & rules.reject_mask)),
+        "reject_flags": list(REJECT_FLAGS),
+        "enabled_flags": sorted(rules.enabled),
+        "bits": dict(FLAGS),
+        "counts": counts,
+    }
+
+
+def combine_summaries(summaries: list) -> dict:
+    # Summaries of disjoint row sets (e.g. country partitions) add up to the summary of their union
+    out = dict(summaries[0], counts=dict(summaries[0]["counts"]))
+    for s in summaries[1:]:
+        for k in ("rows", "clean_rows", "rejected_rows"):
+            out[k] += s[k]
+        for name, n in s["counts"].items():
+            out["counts"][name] += n
+    return out
+
+
+def apply_quality(df: pd.DataFrame, rules: Optional[QualityRules] = None,
+                  summary_path: Optional[Path] = QUALITY_SUMMARY) -> Tuple[pd.DataFrame, dict]:
+    # Adds the quality_flags bitmask, drops rows with reject bits and writes the summary
+    rules = rules or load_rules()
+    flags = quality_flags(df, rules)
+    summary = summarize(flags, rules)
+    keep = (flags & rules.reject_mask) == 0
+    out = df.assign(**{QUALITY_COLUMN: flags})
+    if not keep.all():
+        out = out[keep].reset_index(drop=True)
+    if summary_path is not None:
+        write_summary(summary, summary_path)
+    return out, summary
+
+
+def write_summary(summary: dict, path: Path = QUALITY_SUMMARY) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.parent / f".{path.name}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp, path)
+
+
+def decode(flags: int) -> list:
+    return [name for name, bit in FLAGS.items() if flags & bit]
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Validate a table against the governance schema and allow-lists.")
+    parser.add_argument("path", help="CSV/Parquet/Arrow file to validate.")
+    parser.add_argument("--config", default=str(CONFIG_FILE))
+    args = parser.parse_args(argv)
+    rules = load_rules(Path(args.config))
+    summary = summarize(quality_flags(read_artifact_file(Path(args.path)), rules), rules)
+    print(json.dumps(summary, indent=2))
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,141 @@
 from __future__ import annotations
 import json
+import os
+import sys
 import numpy as np
 import pandas as pd
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[3]
-FEAT_PATH = ROOT / 'sdg_ea_pipeline' / 'data' / 'processed' / 'fe' / 'features.csv'
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sdg_ea_pipeline.logic.storage.artifacts import artifact_exists, read_artifact
+from sdg_ea_pipeline.logic.models.design_matrix import build_design_matrix
+
+FEAT_PATH = ROOT / 'sdg_ea_pipeline' / 'data' / 'processed' / 'fe' / 'features'
 VALIDATION_OUT = ROOT / 'sdg_ea_pipeline' / 'data' / 'processed' / 'fe' / 'validation_report.json'
+MODELS_DIR = ROOT / 'sdg_ea_pipeline' / 'models'
+
+# Walk-forward CV: one fold per test year over the last CV_FOLDS years, each trained on all
+# earlier years only. Folds are independent and scored in parallel on threads, which share the
+# sparse design matrix instead of pickling it to worker processes (the solver releases the GIL).
+CV_FOLDS = 5
+CV_MIN_TRAIN_ROWS = 2
+DEFAULT_JOBS = min(4, os.cpu_count() or 1)
 
 
 def load_features():
-    if not FEAT_PATH.exists():
+    if not artifact_exists(FEAT_PATH):
         raise FileNotFoundError(f"Features file not found at {FEAT_PATH}. Run STEP 5 first.")
-    return pd.read_csv(FEAT_PATH)
-
-
-def main():
-    df = load_features()
-    # Build regression dataset locally
-    if 'target_value' in df.columns:
-        y = df['target_value'].astype(float)
-        X = df.drop(columns=['target_value'])
-    elif 'value' in df.columns:
-        y = df['value'].astype(float)
-        X = df.drop(columns=['value'])
-    else:
-        raise ValueError("No target column found for validation: 'target_value' or 'value'.")
-    # Encode categoricals simply
-    if 'country' in X.columns and 'indicator_code' in X.columns:
-        X = pd.get_dummies(X, columns=["country", "indicator_code"], drop_first=True)
-    X = X.select_dtypes(include=[np.number]).fillna(0)
+    return read_artifact(FEAT_PATH)
 
+
+def _regression_metrics(y_true, y_pred) -> dict:
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+    y_true, y_pred = np.asarray(y_true, dtype=float), np.asarray(y_pred, dtype=float)
+    return {
+        'mae': float(mean_absolute_error(y_true, y_pred)),
+        'rmse': float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        'r2': float(r2_score(y_true, y_pred)) if len(y_true) > 1 else None,
+    }
+
+
+def _load_model(name: str):
+    import joblib
+    path = MODELS_DIR / name
+    return joblib.load(path) if path.exists() else None
+
+
+def score_trained_models(X, y) -> dict:
+    # Score the STEP 6 models on the rows they held out (same split, no refit)
     from sklearn.model_selection import train_test_split
+    from sklearn.metrics import accuracy_score
+    _, test_rows = train_test_split(np.arange(X.shape[0]), test_size=0.2, random_state=42)
+    X_test, y_test = X[test_rows], y.iloc[test_rows]
+    scores = {}
+    reg = _load_model('linear_regression.joblib')
+    if reg is None or getattr(reg, 'n_features_in_', X.shape[1]) != X.shape[1]:
+        scores['LinearRegression'] = {'skipped': 'model missing or trained on a different design matrix; rerun STEP 6'}
+    else:
+        scores['LinearRegression'] = _regression_metrics(y_test, reg.predict(X_test))
+    clf = _load_model('logistic_regression.joblib')
+    if clf is None or getattr(clf, 'n_features_in_', X.shape[1]) != X.shape[1]:
+        scores['LogisticRegression'] = {'skipped': 'model missing or trained on a different design matrix; rerun STEP 6'}
+    else:
+        y_class = (y > y.median()).astype(int).iloc[test_rows]
+        scores['LogisticRegression'] = {'accuracy': float(accuracy_score(y_class, clf.predict(X_test)))}
+    return scores
+
+
+def _fit_fold(X, y, train_rows, test_rows):
     from sklearn.linear_model import LinearRegression
-    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     reg = LinearRegression()
-    reg.fit(X_train, y_train)
-    y_pred = reg.predict(X_test)
-    mae = mean_absolute_error(y_test, y_pred)
-    try:
-        rmse = mean_squared_error(y_test, y_pred, squared=False)
-    except TypeError:
-        rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-    r2 = r2_score(y_test, y_pred)
+    reg.fit(X[train_rows], y[train_rows])
+    return test_rows, reg.predict(X[test_rows])
+
+
+def walk_forward_splits(years: np.ndarray, n_folds: int = CV_FOLDS):
+    # (test_year, train_rows, test_rows) for the last n_folds years that have earlier data
+    test_years = [yr for yr in np.unique(years[~np.isnan(years)])
+                  if (years < yr).sum() >= CV_MIN_TRAIN_ROWS][-n_folds:]
+    for yr in test_years:
+        yield yr, np.flatnonzero(years < yr), np.flatnonzero(years == yr)
+
+
+def _grouped_errors(frame: pd.DataFrame, key: str) -> dict:
+    err = frame.assign(abs_err=(frame['y'] - frame['pred']).abs(), sq_err=(frame['y'] - frame['pred']) ** 2)
+    agg = err.groupby(key, observed=True).agg(n=('abs_err', 'size'), mae=('abs_err', 'mean'), mse=('sq_err', 'mean'))
+    return {
+        str(k): {'n': int(r.n), 'mae': float(r.mae), 'rmse': float(np.sqrt(r.mse))}
+        for k, r in agg.iterrows()
+    }
+
+
+def walk_forward_cv(df: pd.DataFrame, X, y, n_folds: int = CV_FOLDS, n_jobs: int = DEFAULT_JOBS) -> dict:
+    from joblib import Parallel, delayed
+    years = pd.to_numeric(df['year'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    y_values = y.to_numpy(dtype=float)
+    splits = list(walk_forward_splits(years, n_folds))
+    if not splits:
+        return {'skipped': 'not enough years for walk-forward validation'}
+    results = Parallel(n_jobs=max(1, min(n_jobs, len(splits))), prefer="threads")(
+        delayed(_fit_fold)(X, y_values, train, test) for _, train, test in splits
+    )
+    folds = []
+    pred = np.full(len(y_values), np.nan)
+    for (yr, train, test), (_, fold_pred) in zip(splits, results):
+        pred[test] = fold_pred
+        folds.append({'test_year': int(yr), 'n_train': int(len(train)), 'n_test': int(len(test)),
+                      **_regression_metrics(y_values[test], fold_pred)})
+    scored = ~np.isnan(pred)
+    oof = pd.DataFrame({
+        'country': df['country'].to_numpy()[scored],
+        'indicator_code': df['indicator_code'].to_numpy()[scored],
+        'y': y_values[scored],
+        'pred': pred[scored],
+    })
+    return {
+        'folds': folds,
+        'overall': _regression_metrics(oof['y'], oof['pred']),
+        'by_country': _grouped_errors(oof, 'country'),
+        'by_indicator': _grouped_errors(oof, 'indicator_code'),
+    }
+
+
+def main(features: pd.DataFrame | None = None, n_jobs: int = DEFAULT_JOBS):
+    df = load_features() if features is None else features
+    # Same cached design matrix as STEP 6
+    X, y, _ = build_design_matrix(df)
     report = {
-        'model': 'LinearRegression',
-        'metrics': {'mae': float(mae), 'rmse': float(rmse), 'r2': float(r2)}
+        'holdout': score_trained_models(X, y),
+        'walk_forward': walk_forward_cv(df, X, y, n_jobs=n_jobs),
     }
     VALIDATION_OUT.parent.mkdir(parents=True, exist_ok=True)
     with open(VALIDATION_OUT, 'w', encoding='utf-8') as f:
         json.dump(report, f, indent=2)
     print("Validation complete. Output:", VALIDATION_OUT)
+    return report
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Stage:
+    key: str
+    name: str
+    # Called with a dict of upstream results keyed by dependency key
+    func: Callable[[Dict[str, Any]], Any]
+    deps: Tuple[str, ...] = ()
+    # Optional cache declarations (see stage_cache.py): external input files/dirs, the
+    # artifacts the stage writes, the modules implementing it, and how to reload its result
+    inputs: Tuple[Any, ...] = ()
+    outputs: Tuple[Any, ...] = ()
+    code: Tuple[Any, ...] = ()
+    load: Optional[Callable[[], Any]] = None
+
+
+class StageFailed(RuntimeError):
+    def __init__(self, stage: Stage, error: BaseException):
+        super().__init__(f"{stage.name} failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+def topological_order(stages: Iterable[Stage]) -> List[Stage]:
+    by_key = {}
+    for s in stages:
+        if s.key in by_key:
+            raise ValueError(f"Duplicate stage key: {s.key}")
+        by_key[s.key] = s
+    for s in by_key.values():
+        missing = [d for d in s.deps if d not in by_key]
+        if missing:
+            raise ValueError(f"Stage '{s.key}' depends on unknown stage(s): {missing}")
+
+    order: List[Stage] = []
+    state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+    def visit(key: str) -> None:
+        if state.get(key) == 2:
+            return
+        if state.get(key) == 1:
+            raise ValueError(f"Cycle detected in pipeline DAG at stage '{key}'")
+        state[key] = 1
+        for d in by_key[key].deps:
+            visit(d)
+        state[key] = 2
+        order.append(by_key[key])
+
+    for key in by_key:
+        visit(key)
+    return order
+
+
+def run_dag(
+    stages: Iterable[Stage],
+    max_workers: Optional[int] = None,
+    runner: Optional[Callable[[Stage, Dict[str, Any]], Any]] = None,
+) -> Dict[str, Any]:
+    # Stages run in-process on a thread pool as soon as all their dependencies
+    # finished; DataFrames are handed downstream in memory. Threads (not
+    # processes) keep the handoff copy-free; pandas/sklearn release the GIL for
+    # the heavy lifting.
+    if runner is None:
+        runner = lambda stage, inputs: stage.func(inputs)
+    pending = {s.key: s for s in topological_order(stages)}
+    results: Dict[str, Any] = {}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            ready = [s for s in pending.values() if all(d in results for d in s.deps)]
+            for s in ready:
+                del pending[s.key]
+                inputs = {d: results[d] for d in s.deps}
+                running[pool.submit(runner, s, inputs)] = s
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                s = running.pop(fut)
+                try:
+                    results[s.key] = fut.result()
+                except Exception as e:
+                    for other in running:
+                        other.cancel()
+                    raise StageFailed(s, e) from e
+    return results
+
+
+__all__ = ["Stage", "StageFailed", "topological_order", "run_dag"]
@@ -0,0 +1,207 @@
+from __future__ import annotations
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import pandas as pd
+
+try:
+    import resource  # POSIX only; used for the process-wide peak RSS
+    RESOURCE_AVAILABLE = True
+except Exception:
+    RESOURCE_AVAILABLE = False
+
+from sdg_ea_pipeline.orchestration.stage_cache import Deferred, target_files
+
+ROOT = Path(__file__).resolve().parents[2]
+TRACE_DIR = ROOT / "sdg_ea_pipeline" / "logs" / "runs"
+RSS_SAMPLE_SECONDS = 0.05
+PROFILE_TOP = 40
+# Only one profiler may be active per process (Python 3.12+ raises otherwise)
+_PROFILE_LOCK = threading.Lock()
+
+# Per-stage run trace: one NDJSON line per finished stage (wall / CPU time, peak RSS, rows and
+# bytes in/out, cache hit) and a closing line for the whole run. CPU time is the stage thread's
+# own; peak RSS is the process high-water mark sampled while the stage ran, so stages that
+# overlap on the thread pool see each other's memory.
+
+
+def _current_rss() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+
+def _max_rss() -> Optional[int]:
+    if not RESOURCE_AVAILABLE:
+        return None
+    # ru_maxrss is in KiB on Linux
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * 1024
+
+
+class RssSampler:
+    # One background thread samples RSS and raises the peak of every stage currently running
+    def __init__(self, interval: float = RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self._peaks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        rss = _current_rss()
+        if rss is None:
+            return
+        with self._lock:
+            for key, peak in self._peaks.items():
+                if rss > peak:
+                    self._peaks[key] = rss
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "RssSampler":
+        if _current_rss() is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def begin(self, key: str) -> None:
+        with self._lock:
+            self._peaks[key] = 0
+        self._sample()
+
+    def end(self, key: str) -> Optional[int]:
+        self._sample()
+        with self._lock:
+            peak = self._peaks.pop(key, 0)
+        return peak or _max_rss()
+
+
+def _rows(value: Any) -> Optional[int]:
+    if isinstance(value, Deferred):
+        value = value.value if value.loaded else None
+    return len(value) if isinstance(value, pd.DataFrame) else None
+
+
+def _bytes(targets: Iterable) -> int:
+    return sum(p.stat().st_size for t in targets for p in target_files(t))
+
+
+class RunTrace:
+    def __init__(self, path: Optional[Path] = None, run_id: Optional[str] = None):
+        self.run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self.path = Path(path) if path else TRACE_DIR / f"run_{self.run_id}.ndjson"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._cpu = time.process_time()
+        self.stages: list = []
+        # Truncate: a trace file belongs to exactly one run
+        open(self.path, "w").close()
+
+    def write(self, record: dict) -> None:
+        line = json.dumps({"run_id": self.run_id, **record}, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def stage(self, record: dict) -> None:
+        with self._lock:
+            self.stages.append(record)
+        self.write({"event": "stage", **record})
+
+    def close(self, status: str) -> dict:
+        record = {
+            "event": "run",
+            "status": status,
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "wall_s": round(time.perf_counter() - self._started, 6),
+            "cpu_s": round(time.process_time() - self._cpu, 6),
+            "peak_rss_bytes": _max_rss(),
+            "stages": len(self.stages),
+            "cache_hits": sum(1 for s in self.stages if s.get("cache_hit")),
+            "slowest": max(self.stages, key=lambda s: s["wall_s"])["stage"] if self.stages else None,
+        }
+        self.write(record)
+        return record
+
+
+def _profile_call(func: Callable, trace: RunTrace, stage, *args):
+    # cProfile only sees the calling thread, which is the one running this stage. Profiled
+    # stages that would overlap run one after another; the wait counts towards their wall time.
+    profiler = cProfile.Profile()
+    try:
+        with _PROFILE_LOCK:
+            return profiler.runcall(func, *args)
+    finally:
+        base = trace.path.with_name(f"{trace.path.stem}_{stage.key}")
+        profiler.dump_stats(str(base.with_suffix(".prof")))
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        base.with_suffix(".txt").write_text(out.getvalue(), encoding="utf-8")
+
+
+def instrumented_runner(runner: Callable[[Any, Dict[str, Any]], Any], trace: RunTrace,
+                        stages: Iterable = (), sampler: Optional[RssSampler] = None, profile: Iterable[str] = ()):
+    # Wraps the (possibly cached) stage runner; a Deferred result means the cache skipped the stage.
+    # Bytes in = the stage's declared inputs plus its upstream stages' declared outputs.
+    profile = set(profile)
+    outputs = {s.key: s.outputs for s in stages}
+
+    def run(stage, inputs: Dict[str, Any]):
+        started = datetime.now(timezone.utc).isoformat()
+        t0, c0 = time.perf_counter(), time.thread_time()
+        if sampler is not None:
+            sampler.begin(stage.key)
+        status, error, result = "ok", None, None
+        try:
+            if stage.key in profile:
+                result = _profile_call(runner, trace, stage, stage, inputs)
+            else:
+                result = runner(stage, inputs)
+            return result
+        except BaseException as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            wall, cpu = time.perf_counter() - t0, time.thread_time() - c0
+            peak = sampler.end(stage.key) if sampler is not None else _max_rss()
+            cache_hit = isinstance(result, Deferred)
+            rows_in = [_rows(v) for v in inputs.values()]
+            trace.stage({
+                "stage": stage.key,
+                "name": stage.name,
+                "status": "skipped" if cache_hit else status,
+                "started_at": started,
+                "wall_s": round(wall, 6),
+                "cpu_s": round(cpu, 6),
+                "peak_rss_bytes": peak,
+                "rows_in": sum(r for r in rows_in if r is not None) if any(r is not None for r in rows_in) else None,
+                "rows_out": _rows(result),
+                "bytes_in": _bytes([*stage.inputs, *(t for d in stage.deps for t in outputs.get(d, ()))]),
+                "bytes_out": _bytes(stage.outputs),
+                "cache_hit": cache_hit,
+                "profile": str(trace.path.with_name(f"{trace.path.stem}_{stage.key}.prof")) if stage.key in profile else None,
+                "error": error,
+            })
+
+    return run
+
+
+__all__ = ["RssSampler", "RunTrace", "TRACE_DIR", "instrumented_runner"]
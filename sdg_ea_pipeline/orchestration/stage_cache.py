@@ -0,0 +1,183 @@
+from __future__ import annotations
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+from dataclasses import asdict
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from sdg_ea_pipeline.logic.storage.artifacts import find_artifact
+from sdg_ea_pipeline.logic.storage.fingerprint import file_digest
+
+ROOT = Path(__file__).resolve().parents[2]
+CACHE_DIR = ROOT / "sdg_ea_pipeline" / "data" / "stage_cache"
+CONFIG_FILE = ROOT / "sdg_ea_pipeline" / "config" / "config.yaml"
+CACHE_VERSION = 1
+
+# Hash-based `make`: a stage is skipped when the fingerprint of everything it reads is the one
+# recorded after its last successful run and its outputs are still the ones it wrote. The
+# fingerprint covers the stage's code, the governance config, its external inputs and the
+# content of its upstream stages' outputs, so a stage that reruns but writes identical
+# artifacts does not invalidate anything downstream.
+
+
+class Deferred:
+    # Result of a skipped stage, reloaded from disk only if a downstream stage actually runs
+    def __init__(self, load: Optional[Callable[[], Any]]):
+        self._load = load
+        self._lock = threading.Lock()
+        self._done = False
+        self._value = None
+
+    def get(self) -> Any:
+        with self._lock:
+            if not self._done:
+                self._value = self._load() if self._load is not None else None
+                self._done = True
+            return self._value
+
+    @property
+    def loaded(self) -> bool:
+        return self._done
+
+    @property
+    def value(self) -> Any:
+        return self._value
+
+
+def resolve(value: Any) -> Any:
+    return value.get() if isinstance(value, Deferred) else value
+
+
+def _module_files(modules: Iterable[ModuleType]) -> list:
+    # The declared modules plus the pipeline modules they import directly
+    files = set()
+    for m in modules:
+        related = [m] + [
+            sys.modules.get(getattr(obj, "__module__", None) or "") if not isinstance(obj, ModuleType) else obj
+            for obj in vars(m).values()
+        ]
+        for r in related:
+            if isinstance(r, ModuleType) and r.__name__.startswith("sdg_ea_pipeline"):
+                try:
+                    files.add(inspect.getsourcefile(r))
+                except TypeError:
+                    continue
+    return sorted(f for f in files if f)
+
+
+def target_files(target) -> list:
+    # Artifact bases resolve to whichever format exists; directories expand to their files
+    target = Path(target)
+    if target.is_dir():
+        return sorted(p for p in target.rglob("*") if p.is_file() and not p.name.startswith("."))
+    if target.exists():
+        return [target]
+    found = find_artifact(target)
+    return [found] if found is not None else []
+
+
+def config_fingerprint() -> str:
+    from sdg_ea_pipeline.config.loader import load_config
+    from sdg_ea_pipeline.logic.storage.memory import policy
+    cfg = asdict(load_config(str(CONFIG_FILE)))
+    # The dtype policy changes every artifact's schema without touching code or config
+    cfg["_dtype_policy"] = policy()
+    return hashlib.sha256(json.dumps(cfg, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    def __init__(self, directory: Path = CACHE_DIR):
+        self.directory = Path(directory)
+        self._config: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _state_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def load_state(self, key: str) -> dict:
+        path = self._state_path(key)
+        if not path.exists():
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return state if state.get("version") == CACHE_VERSION else {}
+
+    def _save_state(self, key: str, state: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._state_path(key)
+        tmp = path.parent / f".{path.name}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, **state}, f, indent=2)
+        os.replace(tmp, path)
+
+    def config(self) -> str:
+        with self._lock:
+            if self._config is None:
+                self._config = config_fingerprint()
+            return self._config
+
+    def digest_paths(self, targets: Iterable, stats: dict) -> Dict[str, str]:
+        # Content digests keyed by path; `stats` caches (size, mtime_ns) -> digest between runs
+        out = {}
+        for target in targets:
+            files = target_files(target)
+            if not files:
+                out[str(target)] = "missing"
+            for p in files:
+                st = p.stat()
+                cached = stats.get(str(p))
+                if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+                    digest = cached[2]
+                else:
+                    digest = file_digest(p)
+                    stats[str(p)] = [st.st_size, st.st_mtime_ns, digest]
+                out[str(p)] = digest
+        return out
+
+    def fingerprint(self, stage, stats: dict) -> str:
+        h = hashlib.sha256(stage.key.encode("utf-8"))
+        for f in _module_files(stage.code):
+            h.update(f.encode("utf-8"))
+            h.update(file_digest(Path(f)).encode("utf-8"))
+        h.update(self.config().encode("utf-8"))
+        h.update(json.dumps(self.digest_paths(stage.inputs, stats), sort_keys=True).encode("utf-8"))
+        for dep in stage.deps:
+            h.update(json.dumps(self.load_state(dep).get("outputs", {}), sort_keys=True).encode("utf-8"))
+        return h.hexdigest()
+
+    def is_fresh(self, stage, fingerprint: str, state: dict, stats: dict) -> bool:
+        if not state or state.get("fingerprint") != fingerprint:
+            return False
+        return self.digest_paths(stage.outputs, stats) == state.get("outputs")
+
+    def run(self, stage, inputs: Dict[str, Any], runner: Callable[[Any, Dict[str, Any]], Any]) -> Any:
+        # Stages without declared outputs are always run
+        if not stage.outputs:
+            return runner(stage, {k: resolve(v) for k, v in inputs.items()})
+        state = self.load_state(stage.key)
+        stats = state.get("stats", {})
+        fingerprint = self.fingerprint(stage, stats)
+        if self.is_fresh(stage, fingerprint, state, stats):
+            print(f"[SKIP] {stage.name} (unchanged)")
+            return Deferred(stage.load)
+        result = runner(stage, {k: resolve(v) for k, v in inputs.items()})
+        # Recomputed after the run: a stage may create its own inputs (e.g. the ingestion placeholder)
+        self._save_state(stage.key, {
+            "fingerprint": self.fingerprint(stage, stats),
+            "outputs": self.digest_paths(stage.outputs, stats),
+            "stats": stats,
+        })
+        return result
+
+
+def cached_runner(runner: Callable[[Any, Dict[str, Any]], Any], cache: Optional[StageCache] = None):
+    cache = cache or StageCache()
+    return lambda stage, inputs: cache.run(stage, inputs, runner)
+
+
+__all__ = ["CACHE_DIR", "Deferred", "StageCache", "cached_runner", "config_fingerprint", "resolve", "target_files"]
@@ -1,48 +1,187 @@
 from __future__ import annotations
 import json
+import sys
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Optional
+import numpy as np
 import pandas as pd
 
 ROOT = Path(__file__).resolve().parents[3]
-FEATS_PATH = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "fe" / "features.csv"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sdg_ea_pipeline.logic.storage.artifacts import artifact_columns, artifact_exists, read_artifact
+from sdg_ea_pipeline.config.loader import load_config
+
+FEATS_PATH = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "fe" / "features"
 OUTPUT_DIR = ROOT / "sdg_ea_pipeline" / "outputs" / "insights"
 INSIGHTS_TXT = OUTPUT_DIR / "insights.txt"
 INSIGHTS_CSV = OUTPUT_DIR / "insights.csv"
+# Global, per-country and per-SDG report lines in one table
+INSIGHT_REPORTS = OUTPUT_DIR / "insight_reports.csv"
+CONFIG_FILE = ROOT / "sdg_ea_pipeline" / "config" / "config.yaml"
+# Only these feature columns are needed; columnar artifacts are read with a projection
+INSIGHT_COLUMNS = ["country", "indicator_code", "year", "yoy_change", "risk_level", "impute_method", "value"]
+CSV_COLUMNS = ["country", "indicator_code", "year", "yoy_change", "risk_level"]
+SERIES_KEYS = ["country", "indicator_code"]
+STALLED_YEARS = 2
+
+
+@dataclass(frozen=True)
+class InsightRule:
+    name: str
+    title: str
+    # Column of the shared per-series summary to rank by
+    metric: str
+    largest: bool = True
+    n: int = 3
+    # Optional filter on the summary (vectorized mask)
+    where: Optional[Callable[[pd.DataFrame], pd.Series]] = None
+    # printf-style format for the metric next to the series label; None lists labels only
+    value_format: Optional[str] = None
+
+
+RULES = [
+    InsightRule("top_growers", "Top growing indicators", "mean_yoy", where=lambda s: s["mean_yoy"] > 0,
+                value_format="%.1f%%"),
+    InsightRule("top_decliners", "Top declining indicators", "mean_yoy", largest=False,
+                where=lambda s: s["mean_yoy"] < 0, value_format="%.1f%%"),
+    InsightRule("high_risk", "High risk observations", "high_count", where=lambda s: s["high_count"] > 0),
+    InsightRule("stalled", f"Stalled series (no update in {STALLED_YEARS}+ years)", "years_since_update",
+                where=lambda s: s["years_since_update"] >= STALLED_YEARS, value_format="%.0f yrs"),
+    InsightRule("missing_hotspots", "Missing-data hotspots", "missing_share",
+                where=lambda s: s["missing_share"] > 0, value_format="%.0f%% missing"),
+]
 
 
 def load_features():
-    if not FEATS_PATH.exists():
+    if not artifact_exists(FEATS_PATH):
         raise FileNotFoundError(f"Features file not found at {FEATS_PATH}. Run STEP 5 first.")
-    return pd.read_csv(FEATS_PATH)
-
-
-def generate_text_insights(df: pd.DataFrame) -> list:
-    lines = []
-    if 'country' in df.columns and 'indicator_code' in df.columns and 'yoy_change' in df.columns:
-        grp = df.dropna(subset=['yoy_change']).groupby(['country','indicator_code'])['yoy_change'].mean().reset_index()
-        top = grp.sort_values('yoy_change', ascending=False).head(3)
-        parts = [f"{r['country']} {r['indicator_code']}: {r['yoy_change']:.1f}%" for _, r in top.iterrows()]
-        lines.append("Top growing indicators: " + ", ".join(parts))
-    if 'risk_level' in df.columns:
-        high = df[df['risk_level'] == 'high']
-        if not high.empty:
-            c = high.groupby(['country','indicator_code']).size().reset_index(name='count')
-            top = c.sort_values('count', ascending=False).head(3)
-            parts = [f"{row['country']} {row['indicator_code']}" for _, row in top.iterrows()]
-            lines.append("High risk observations: " + ", ".join(parts))
+    available = set(artifact_columns(FEATS_PATH))
+    return read_artifact(FEATS_PATH, columns=[c for c in INSIGHT_COLUMNS if c in available])
+
+
+def sdg_lookup() -> dict:
+    try:
+        cfg = load_config(str(CONFIG_FILE))
+    except Exception:
+        return {}
+    return {str(i.get("code")): f"SDG{i.get('sdg')}" for i in cfg.indicators if isinstance(i, dict)}
+
+
+def gap_mask(df: pd.DataFrame) -> pd.Series:
+    # Cells without an observation. target_value is always gap-filled by cleaning, so gaps come
+    # from impute_method, or from the observed value for features written before it existed.
+    if "impute_method" in df.columns:
+        return df["impute_method"].astype(str) != "observed"
+    if "value" in df.columns:
+        return pd.to_numeric(df["value"], errors="coerce").isna()
+    return pd.Series(False, index=df.index)
+
+
+def series_summary(df: pd.DataFrame) -> pd.DataFrame:
+    # The one grouped pass every rule reads from: one row per (country, indicator_code)
+    frame = pd.DataFrame({
+        "country": df["country"],
+        "indicator_code": df["indicator_code"],
+        "year": pd.to_numeric(df["year"], errors="coerce") if "year" in df.columns else np.nan,
+        "yoy": pd.to_numeric(df["yoy_change"], errors="coerce") if "yoy_change" in df.columns else np.nan,
+        "high": (df["risk_level"] == "high").astype("int64") if "risk_level" in df.columns else 0,
+        "missing": gap_mask(df).astype("int64"),
+    })
+    summary = frame.groupby(SERIES_KEYS, sort=False, observed=True).agg(
+        mean_yoy=("yoy", "mean"),
+        high_count=("high", "sum"),
+        missing_count=("missing", "sum"),
+        n_obs=("missing", "size"),
+        last_year=("year", "max"),
+    ).reset_index()
+    summary["missing_share"] = 100.0 * summary["missing_count"] / summary["n_obs"]
+    summary["years_since_update"] = summary["last_year"].max() - summary["last_year"]
+    summary["sdg"] = summary["indicator_code"].astype(str).map(sdg_lookup()).fillna("unmapped")
+    summary["label"] = (summary["country"].astype(str) + " " + summary["indicator_code"].astype(str)).astype(object)
+    return summary
+
+
+def top_n(key: np.ndarray, n: int) -> np.ndarray:
+    # Positions of the n smallest keys, ordered by (key, position) like a stable sort, but only
+    # the candidates up to the n-th smallest value (ties included) are sorted
+    if len(key) > n:
+        kth = np.partition(key, n - 1)[n - 1]
+        candidates = np.flatnonzero(key <= kth)
+    else:
+        candidates = np.arange(len(key))
+    return candidates[np.argsort(key[candidates], kind="stable")[:n]]
+
+
+def evaluate_rule(rule: InsightRule, summary: pd.DataFrame, labels: np.ndarray,
+                  codes: np.ndarray, names: np.ndarray) -> list:
+    # Top-n per scope by partial selection within each scope; only the selected rows are ever
+    # formatted. Returns (scope, rule, line) tuples.
+    metric = summary[rule.metric].to_numpy(dtype=float, na_value=np.nan)
+    mask = ~np.isnan(metric)
+    if rule.where is not None:
+        mask &= rule.where(summary).fillna(False).to_numpy(dtype=bool)
+    rows = np.flatnonzero(mask)
+    if not len(rows):
+        return []
+    key = -metric[rows] if rule.largest else metric[rows]
+    # Rows of each scope together, in row order within a scope
+    by_scope = np.argsort(codes[rows], kind="stable")
+    scope_codes = codes[rows][by_scope]
+    starts = np.r_[0, np.flatnonzero(scope_codes[1:] != scope_codes[:-1]) + 1, len(by_scope)]
+    picks = [by_scope[a:b][top_n(key[by_scope[a:b]], rule.n)] for a, b in zip(starts[:-1], starts[1:])]
+    keep = rows[np.concatenate(picks)]
+    items = labels[keep]
+    if rule.value_format is not None:
+        items = items + ": " + np.char.mod(rule.value_format, metric[keep]).astype(object)
+    kept_codes = codes[keep]
+    bounds = np.r_[0, np.flatnonzero(kept_codes[1:] != kept_codes[:-1]) + 1, len(keep)]
+    return [
+        (names[kept_codes[a]], rule.name, f"{rule.title}: " + ", ".join(items[a:b]))
+        for a, b in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+def build_reports(df: pd.DataFrame, rules=RULES) -> pd.DataFrame:
+    # All rules x all scopes (global, every country, every SDG) over one shared summary
+    columns = ["scope_type", "scope", "rule", "line"]
+    if not {"country", "indicator_code"} <= set(df.columns) or df.empty:
+        return pd.DataFrame(columns=columns)
+    summary = series_summary(df)
+    labels = summary["label"].to_numpy(dtype=object)
+    records = []
+    for scope_type, scope in (("global", None), ("country", "country"), ("sdg", "sdg")):
+        if scope is None:
+            codes, names = np.zeros(len(summary), dtype=np.intp), np.array(["all"], dtype=object)
+        else:
+            codes, names = pd.factorize(summary[scope].astype(str), sort=True)
+            names = np.asarray(names, dtype=object)
+        for rule in rules:
+            records += [(scope_type, *r) for r in evaluate_rule(rule, summary, labels, codes, names)]
+    return pd.DataFrame(records, columns=columns)
+
+
+def generate_text_insights(df: pd.DataFrame, reports: pd.DataFrame | None = None) -> list:
+    reports = build_reports(df) if reports is None else reports
+    lines = reports.loc[reports["scope_type"] == "global", "line"].tolist()
     if not lines:
         lines.append("No significant trends detected.")
     return lines
 
 
-def main():
+def main(features: pd.DataFrame | None = None):
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    df = load_features()
-    lines = generate_text_insights(df)
+    df = load_features() if features is None else features
+    reports = build_reports(df)
+    lines = generate_text_insights(df, reports)
     with open(INSIGHTS_TXT, 'w', encoding='utf-8') as f:
         f.write("\n".join(lines))
-    df[['country','indicator_code','year','yoy_change','risk_level']].to_csv(INSIGHTS_CSV, index=False)
+    reports.to_csv(INSIGHT_REPORTS, index=False)
+    df[[c for c in CSV_COLUMNS if c in df.columns]].to_csv(INSIGHTS_CSV, index=False)
     print(f"Insights generated: {INSIGHTS_TXT}")
+    return lines
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,253 @@
+from __future__ import annotations
+import argparse
+import json
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sdg_ea_pipeline.logic.storage.artifacts import find_artifact, read_artifact_file
+
+# Read-only JSON API over the STEP 5 feature table for dashboards that poll constantly.
+# The table is loaded into pandas once (a full in-memory copy, whatever the artifact format),
+# indexed by country / indicator_code / series, and responses are LRU-cached until the
+# artifact changes.
+FEATS_PATH = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "fe" / "features"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 256
+SERIES_KEYS = ["country", "indicator_code"]
+AGGREGATE_STATS = ("mean", "median", "min", "max", "sum", "count")
+
+
+class UnknownRoute(LookupError):
+    pass
+
+
+class FeatureIndex:
+    def __init__(self, df: pd.DataFrame, stamp):
+        df = df.sort_values(SERIES_KEYS + ["year"], kind="stable").reset_index(drop=True)
+        self.df = df
+        self.stamp = stamp
+        self.years = pd.to_numeric(df["year"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        # Row positions per key value; lookups never scan the table
+        self.by_country = df.groupby("country", sort=False, observed=True).indices
+        self.by_indicator = df.groupby("indicator_code", sort=False, observed=True).indices
+        self.by_series = df.groupby(SERIES_KEYS, sort=False, observed=True).indices
+        # Last row of each series (rows are sorted by year inside a series)
+        ends = np.zeros(len(df), dtype=bool)
+        for c in SERIES_KEYS:
+            ends |= df[c].ne(df[c].shift(-1)).to_numpy(dtype=bool, na_value=True)
+        self.latest_rows = np.flatnonzero(ends)
+
+    def rows(self, country: Optional[str] = None, indicator: Optional[str] = None,
+             start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        empty = np.array([], dtype=np.intp)
+        if country and indicator:
+            rows = self.by_series.get((country, indicator), empty)
+        elif country:
+            rows = self.by_country.get(country, empty)
+        elif indicator:
+            rows = self.by_indicator.get(indicator, empty)
+        else:
+            rows = np.arange(len(self.df))
+        if start is not None:
+            rows = rows[self.years[rows] >= start]
+        if end is not None:
+            rows = rows[self.years[rows] <= end]
+        return rows
+
+
+def _records(frame: pd.DataFrame) -> list:
+    # JSON-safe records: NaN/NA -> null, numpy scalars -> Python numbers
+    return json.loads(frame.to_json(orient="records"))
+
+
+def _one(params: Dict[str, list], name: str, default=None):
+    values = params.get(name)
+    return values[0] if values else default
+
+
+def _number(params, name, default=None):
+    value = _one(params, name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a number")
+
+
+class QueryService:
+    def __init__(self, features_path: Path = FEATS_PATH, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.features_path = Path(features_path)
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._index: Optional[FeatureIndex] = None
+
+    @staticmethod
+    def _stamp(path: Optional[Path]):
+        if path is None:
+            return None
+        st = path.stat()
+        return str(path), st.st_mtime_ns, st.st_size
+
+    def index(self) -> FeatureIndex:
+        # Reload and drop cached responses whenever the artifact on disk changed
+        path = find_artifact(self.features_path)
+        if path is None:
+            raise FileNotFoundError(f"Features file not found at {self.features_path}. Run STEP 5 first.")
+        stamp = self._stamp(path)
+        with self._lock:
+            if self._index is None or self._index.stamp != stamp:
+                self._index = FeatureIndex(read_artifact_file(path), stamp)
+                self._cache.clear()
+            return self._index
+
+    def handle(self, route: str, params: Dict[str, list]):
+        index = self.index()
+        key = (route, tuple(sorted((k, tuple(v)) for k, v in params.items())))
+        with self._lock:
+            if key in self._cache and self._index is index:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        handler = ROUTES.get(route)
+        if handler is None:
+            raise UnknownRoute(route)
+        body = handler(index, params)
+        with self._lock:
+            if self._index is index:
+                self._cache[key] = body
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return body
+
+
+def route_health(index: FeatureIndex, params) -> dict:
+    return {"rows": int(len(index.df)), "series": len(index.by_series), "artifact": index.stamp[0]}
+
+
+def route_series(index: FeatureIndex, params) -> dict:
+    # /series?country=KEN&indicator_code=I1[&start=2015&end=2022]
+    country, indicator = _one(params, "country"), _one(params, "indicator_code")
+    if not country or not indicator:
+        raise ValueError("'country' and 'indicator_code' are required")
+    rows = index.rows(country, indicator, _number(params, "start"), _number(params, "end"))
+    return {"country": country, "indicator_code": indicator, "points": _records(index.df.iloc[rows])}
+
+
+def route_latest(index: FeatureIndex, params) -> dict:
+    # /latest[?country=KEN][&indicator_code=I1]: most recent observation of each matching series
+    rows = index.latest_rows
+    country, indicator = _one(params, "country"), _one(params, "indicator_code")
+    if country or indicator:
+        rows = np.intersect1d(rows, index.rows(country, indicator), assume_unique=True)
+    return {"latest": _records(index.df.iloc[rows])}
+
+
+def route_movers(index: FeatureIndex, params) -> dict:
+    # /movers?n=10[&year=2022][&indicator_code=I1][&direction=up|down]: top-N by yoy_change
+    if "yoy_change" not in index.df.columns:
+        raise ValueError("features have no yoy_change column")
+    n = int(_number(params, "n", 10))
+    year = _number(params, "year", np.nanmax(index.years) if len(index.years) else None)
+    rows = index.rows(_one(params, "country"), _one(params, "indicator_code"), year, year)
+    subset = index.df.iloc[rows].dropna(subset=["yoy_change"])
+    if _one(params, "direction", "up") == "down":
+        top = subset.nsmallest(n, "yoy_change")
+    else:
+        top = subset.nlargest(n, "yoy_change")
+    return {"year": None if year is None else int(year), "movers": _records(top)}
+
+
+def route_aggregate(index: FeatureIndex, params) -> dict:
+    # /aggregate?by=country|indicator_code[&stat=mean][&column=target_value][&year=][&start=&end=]
+    by = _one(params, "by", "country")
+    stat = _one(params, "stat", "mean")
+    column = _one(params, "column", "target_value")
+    if by not in SERIES_KEYS + ["year"]:
+        raise ValueError(f"'by' must be one of {SERIES_KEYS + ['year']}")
+    if stat not in AGGREGATE_STATS:
+        raise ValueError(f"'stat' must be one of {list(AGGREGATE_STATS)}")
+    if column not in index.df.columns:
+        raise ValueError(f"unknown column '{column}'")
+    if not pd.api.types.is_numeric_dtype(index.df[column].dtype):
+        raise ValueError(f"column '{column}' is not numeric")
+    year = _number(params, "year")
+    start, end = (year, year) if year is not None else (_number(params, "start"), _number(params, "end"))
+    rows = index.rows(_one(params, "country"), _one(params, "indicator_code"), start, end)
+    values = index.df.iloc[rows].groupby(by, sort=True, observed=True)[column].agg(stat)
+    return {"by": by, "stat": stat, "column": column, "values": _records(values.reset_index())}
+
+
+ROUTES = {
+    "/health": route_health,
+    "/series": route_series,
+    "/latest": route_latest,
+    "/movers": route_movers,
+    "/aggregate": route_aggregate,
+}
+
+
+def make_handler(service: QueryService):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            try:
+                status, body = 200, service.handle(url.path, parse_qs(url.query))
+            except UnknownRoute:
+                status, body = 404, {"error": f"unknown route {url.path}", "routes": sorted(ROUTES)}
+            except (ValueError, FileNotFoundError) as e:
+                status, body = 400, {"error": str(e)}
+            except Exception as e:
+                # Any other failure still gets a response instead of a dropped connection
+                status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, cache_size: int = DEFAULT_CACHE_SIZE) -> ThreadingHTTPServer:
+    service = QueryService(cache_size=cache_size)
+    service.index()  # fail fast and pay the load/index cost at startup
+    return ThreadingHTTPServer((host, port), make_handler(service))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the STEP 5 feature table as a local read-only JSON API.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help="Number of cached responses (default: %(default)s).")
+    args = parser.parse_args(argv)
+    server = serve(args.host, args.port, args.cache_size)
+    print(f"Serving features on http://{args.host}:{args.port} (routes: {', '.join(sorted(ROUTES))})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,167 @@
 from __future__ import annotations
+import argparse
 import json
+import os
+import shutil
+import sys
+from datetime import datetime
 from pathlib import Path
+from urllib.parse import quote
+import numpy as np
 import pandas as pd
 
 ROOT = Path(__file__).resolve().parents[3]
-FEATS_PATH = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "fe" / "features.csv"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sdg_ea_pipeline.logic.storage.artifacts import (
+    ARROW_AVAILABLE, DEFAULT_FORMAT, artifact_columns, artifact_exists, artifact_path, read_artifact, supports_tables,
+    write_artifact, write_artifact_table,
+)
+
+if ARROW_AVAILABLE:
+    import pyarrow as pa
+
+FEATS_PATH = ROOT / "sdg_ea_pipeline" / "data" / "processed" / "fe" / "features"
 DASH_OUTPUT_DIR = ROOT / "sdg_ea_pipeline" / "outputs" / "visuals"
 DASHBOARD_CSV = DASH_OUTPUT_DIR / "dashboard_ready.csv"
 DASHBOARD_META = DASH_OUTPUT_DIR / "dashboard_meta.json"
+DASHBOARD_COLUMNS = ["country", "indicator_code", "year", "value_filled", "impute_method", "yoy_change", "rolling_mean_3", "rolling_std_3", "risk_level"]
+# Hive-style layout: partitions/country=<c>/indicator=<i>/part.<parquet|csv>. Partition values live in
+# the directory names only; the manifest lists a checksum per partition so BI refreshes can pick up
+# just the partitions that changed.
+PARTITION_DIR = DASH_OUTPUT_DIR / "partitions"
+PARTITION_MANIFEST = PARTITION_DIR / "_manifest.json"
+PARTITION_COLUMNS = {"country": "country", "indicator_code": "indicator"}
+MANIFEST_VERSION = 1
+
+
+def _partition_name(country, indicator) -> str:
+    return f"country={quote(str(country), safe='')}/indicator={quote(str(indicator), safe='')}"
+
+
+def partition_checksums(df: pd.DataFrame):
+    # One hash pass over the export: rows are hashed once, then folded per partition with an
+    # order-sensitive weighted sum (reduceat over the sorted table)
+    keys = list(PARTITION_COLUMNS)
+    df = df.sort_values(keys + (["year"] if "year" in df.columns else []), kind="stable").reset_index(drop=True)
+    n = len(df)
+    starts = np.zeros(n, dtype=bool)
+    starts[:1] = True
+    for c in keys:
+        starts[1:] |= df[c].ne(df[c].shift()).to_numpy(dtype=bool, na_value=True)[1:]
+    bounds = np.flatnonzero(starts)
+    # Hash a dtype-normalized view so e.g. int64 vs Int64 after an artifact round trip match
+    normalized = pd.DataFrame({
+        c: pd.to_numeric(df[c], errors="coerce").astype("float64") if pd.api.types.is_numeric_dtype(df[c])
+        else df[c].astype("string")
+        for c in df.columns
+    })
+    rows = pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+    pos = np.arange(n, dtype=np.uint64) - np.repeat(bounds, np.diff(np.r_[bounds, n])).astype(np.uint64)
+    with np.errstate(over="ignore"):
+        folded = np.add.reduceat(rows * (np.uint64(2) * pos + np.uint64(1)), bounds) if n else np.array([], np.uint64)
+    first = df.iloc[bounds]
+    names = [_partition_name(c, i) for c, i in zip(first["country"].to_numpy(), first["indicator_code"].to_numpy())]
+    return df, bounds, names, [f"{int(h):016x}" for h in folded]
+
+
+def _load_manifest() -> dict:
+    if not PARTITION_MANIFEST.exists():
+        return {}
+    with open(PARTITION_MANIFEST, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return manifest if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+def _save_manifest(manifest: dict) -> None:
+    tmp = PARTITION_MANIFEST.parent / f".{PARTITION_MANIFEST.name}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, PARTITION_MANIFEST)
+
+
+def export_partitions(df: pd.DataFrame, fmt: str | None = None) -> dict:
+    # Rewrites only partitions whose checksum changed (or whose file is missing) and drops
+    # partitions that no longer exist. Returns counts of written/unchanged/removed partitions.
+    fmt = fmt or DEFAULT_FORMAT
+    columns = [c for c in df.columns if c not in PARTITION_COLUMNS]
+    previous = _load_manifest()
+    old = previous.get("partitions", {})
+    full = previous.get("columns") != columns or previous.get("format") != fmt
+    df, bounds, names, checksums = partition_checksums(df)
+    ends = np.r_[bounds[1:], len(df)]
+    now = datetime.utcnow().isoformat()
+    # Columnar formats: convert once and write zero-copy slices, instead of a pandas -> Arrow
+    # conversion per partition (that dominated exports with thousands of partitions)
+    table = pa.Table.from_pandas(df[columns], preserve_index=False) if supports_tables(fmt) else None
+    partitions, written = {}, 0
+    for name, checksum, a, b in zip(names, checksums, bounds, ends):
+        base = PARTITION_DIR / name / "part"
+        entry = old.get(name)
+        if full or entry is None or entry.get("checksum") != checksum or not artifact_path(base, fmt).exists():
+            if table is not None:
+                write_artifact_table(table.slice(a, b - a), base, fmt)
+            else:
+                write_artifact(df.iloc[a:b][columns], base, fmt)
+            entry = {"checksum": checksum, "rows": int(b - a), "updated_at": now}
+            written += 1
+        partitions[name] = {**entry, "file": artifact_path(base, fmt).relative_to(PARTITION_DIR).as_posix()}
+    removed = sorted(set(old) - set(partitions))
+    for name in removed:
+        shutil.rmtree(PARTITION_DIR / name, ignore_errors=True)
+        country_dir = (PARTITION_DIR / name).parent
+        if country_dir.exists() and not any(country_dir.iterdir()):
+            country_dir.rmdir()
+    if written or removed or not previous:
+        PARTITION_DIR.mkdir(parents=True, exist_ok=True)
+        _save_manifest({
+            "version": MANIFEST_VERSION,
+            "format": fmt,
+            "columns": columns,
+            "partition_keys": list(PARTITION_COLUMNS.values()),
+            "generated_at": now,
+            "partitions": partitions,
+            "removed": removed,
+        })
+    return {"written": written, "unchanged": len(partitions) - written, "removed": len(removed)}
 
 
-def main():
+def main(features: pd.DataFrame | None = None, fmt: str | None = None):
     DASH_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    if not FEATS_PATH.exists():
-        raise FileNotFoundError(f"Features file not found at {FEATS_PATH}. Run STEP 5 first.")
-    df = pd.read_csv(FEATS_PATH)
+    if features is None:
+        if not artifact_exists(FEATS_PATH):
+            raise FileNotFoundError(f"Features file not found at {FEATS_PATH}. Run STEP 5 first.")
+        # Features written before a column existed (e.g. impute_method) simply lack it
+        available = set(artifact_columns(FEATS_PATH))
+        df = read_artifact(FEATS_PATH, columns=[c for c in DASHBOARD_COLUMNS if c in available])
+    else:
+        df = features
     # Build a compact dashboard-ready frame
-    required = ["country", "indicator_code", "year", "value_filled", "yoy_change", "rolling_mean_3", "rolling_std_3", "risk_level"]
-    exist_cols = [c for c in required if c in df.columns]
-    df_out = df[exist_cols].copy()
-    df_out.to_csv(DASHBOARD_CSV, index=False)
+    exist_cols = [c for c in DASHBOARD_COLUMNS if c in df.columns]
+    df_out = df[exist_cols]
+    stats = export_partitions(df_out, fmt)
+    # The single-file export is kept for existing consumers, but only rewritten when a partition changed
+    if stats["written"] or stats["removed"] or not DASHBOARD_CSV.exists():
+        df_out.to_csv(DASHBOARD_CSV, index=False)
 
     meta = {
         "columns": exist_cols,
         "description": "Dashboard-ready export for BI tools. Columns map to policy indicators and recent trends.",
+        "partitions": {
+            "path": PARTITION_DIR.relative_to(DASH_OUTPUT_DIR).as_posix(),
+            "layout": "country=<country>/indicator=<indicator_code>",
+            "manifest": PARTITION_MANIFEST.relative_to(DASH_OUTPUT_DIR).as_posix(),
+        },
     }
     with open(DASHBOARD_META, 'w', encoding='utf-8') as f:
         json.dump(meta, f, indent=2)
-    print(f"Dashboard exports written to {DASHBOARD_CSV}")
+    print(f"Dashboard exports written to {DASHBOARD_CSV} "
+          f"({stats['written']} partition(s) rewritten, {stats['unchanged']} unchanged, {stats['removed']} removed)")
+    return df_out
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Write partitioned dashboard exports (STEP 9).")
+    parser.add_argument("--format", choices=["parquet", "csv", "arrow"], default=None,
+                        help="Partition file format (default: the configured artifact format).")
+    main(fmt=parser.parse_args().format)
@@ -1,66 +1,153 @@
 from __future__ import annotations
-import subprocess
+import argparse
+import os
 import sys
+import traceback
 from pathlib import Path
 
-# End-to-end steps: 3 through 10 (STEP 3 is ingestion; STEP 4 cleaning; STEP 5 FE; STEP 6 baselines; STEP 7-10 validation, insights, visuals, deployment)
+# Make the package importable when invoked as `python sdg_ea_pipeline/run_pipeline.py`
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sdg_ea_pipeline.orchestration.dag import Stage, StageFailed, run_dag
+from sdg_ea_pipeline.orchestration.instrument import RssSampler, RunTrace, instrumented_runner
+from sdg_ea_pipeline.orchestration.stage_cache import cached_runner, resolve
+from sdg_ea_pipeline.logic.storage import memory, partitions
+from sdg_ea_pipeline.logic.storage.artifacts import read_artifact
+from sdg_ea_pipeline.logic.ingestion import fetch, ingest
+from sdg_ea_pipeline.logic.cleaning import clean
+from sdg_ea_pipeline.logic.fe import feature_engineering
+from sdg_ea_pipeline.logic.models import train_baseline
+from sdg_ea_pipeline.logic.validation import validate
+from sdg_ea_pipeline.outputs.insights import insight_generator
+from sdg_ea_pipeline.outputs.visuals import prepare_dashboard_exports
+from sdg_ea_pipeline.deploy import documentation
+
+# End-to-end steps: 3 through 10 (STEP 3 is ingestion, optionally preceded by an API fetch; STEP 4 cleaning; STEP 5 FE; STEP 6 baselines; STEP 7-10 validation, insights, visuals, deployment)
+# Each stage runs in-process and receives its upstream results in memory. Baselines, insights
+# and dashboard exports only depend on the features and run concurrently; validation scores the
+# persisted baseline models, so it waits for them.
+# Stages declaring outputs are skipped when their code, config, inputs and upstream outputs are
+# unchanged since the last run (see orchestration/stage_cache.py); `load` reloads their result.
+def _partition_options() -> dict:
+    return {key: OPTIONS[key] for key in ("memory_budget", "partitioned", "workers") if key in OPTIONS}
+
+
+def _fetch():
+    # Opt-in: without --fetch, ingestion only sees the files already in data/raw/placeholders.
+    # Declares no outputs, so it always runs; unchanged series cost one 304 per page.
+    if not OPTIONS.get("fetch"):
+        print("Upstream fetch not requested (--fetch); using the files in data/raw/placeholders.")
+        return None
+    return fetch.main(base_url=OPTIONS["fetch_url"], connections=OPTIONS["fetch_connections"])
+
+
 STEPS = [
-    {
-        "name": "Ingestion",
-        "cmd": [sys.executable, str(Path(__file__).resolve().parents[0] / "logic" / "ingestion" / "ingest.py")],
-    },
-    {
-        "name": "Cleaning",
-        "cmd": [sys.executable, str(Path(__file__).resolve().parents[0] / "logic" / "cleaning" / "clean.py")],
-    },
-    {
-        "name": "Feature Engineering",
-        "cmd": [sys.executable, str(Path(__file__).resolve().parents[0] / "logic" / "fe" / "feature_engineering.py")],
-    },
-    {
-        "name": "Baseline Models",
-        "cmd": [sys.executable, str(Path(__file__).resolve().parents[0] / "logic" / "models" / "train_baseline.py")],
-    },
-    {
-        "name": "Validation & Trust",
-        "cmd": [sys.executable, str(Path(__file__).resolve().parents[0] / "logic" / "validation" / "validate.py")],
-    },
-    {
-        "name": "Insights",
-        "cmd": [sys.executable, str(Path(__file__).resolve().parents[0] / "outputs" / "insights" / "insight_generator.py")],
-    },
-    {
-        "name": "Dashboard Exports",
-        "cmd": [sys.executable, str(Path(__file__).resolve().parents[0] / "outputs" / "visuals" / "prepare_dashboard_exports.py")],
-    },
-    {
-        "name": "Documentation & Deployment",
-        "cmd": [sys.executable, str(Path(__file__).resolve().parents[0] / "deploy" / "documentation.py")],
-    },
+    Stage("fetch", "Upstream Fetch", lambda r: _fetch(), code=(fetch,)),
+    Stage("ingest", "Ingestion", lambda r: ingest.main(workers=OPTIONS.get("ingest_workers", ingest.DEFAULT_WORKERS),
+                                                      memory_budget=OPTIONS.get("memory_budget")),
+          deps=("fetch",), inputs=(ingest.PLACEHOLDERS_DIR,), outputs=(ingest.INTERIM_DIR,), code=(ingest,)),
+    Stage("clean", "Cleaning", lambda r: clean.main(**_partition_options()), deps=("ingest",),
+          outputs=(clean.CLEANED_OUTPUT, clean.QUALITY_SUMMARY), code=(clean,),
+          load=lambda: read_artifact(clean.CLEANED_OUTPUT)),
+    Stage("features", "Feature Engineering", lambda r: feature_engineering.main(cleaned=r["clean"], **_partition_options()), deps=("clean",),
+          outputs=(feature_engineering.FEATURES_OUTPUT, feature_engineering.FEATURES_LONG_OUTPUT),
+          code=(feature_engineering,), load=lambda: read_artifact(feature_engineering.FEATURES_OUTPUT)),
+    Stage("models", "Baseline Models", lambda r: train_baseline.main(features=r["features"]), deps=("features",),
+          outputs=(train_baseline.OUTPUT_MODELS_DIR, train_baseline.REPORTS_DIR), code=(train_baseline,)),
+    Stage("validation", "Validation & Trust", lambda r: validate.main(features=r["features"]), deps=("features", "models"),
+          outputs=(validate.VALIDATION_OUT,), code=(validate,)),
+    Stage("insights", "Insights", lambda r: insight_generator.main(features=r["features"]), deps=("features",),
+          outputs=(insight_generator.INSIGHTS_TXT, insight_generator.INSIGHTS_CSV, insight_generator.INSIGHT_REPORTS),
+          code=(insight_generator,)),
+    Stage("dashboard", "Dashboard Exports", lambda r: prepare_dashboard_exports.main(features=r["features"]), deps=("features",),
+          outputs=(prepare_dashboard_exports.DASHBOARD_CSV, prepare_dashboard_exports.DASHBOARD_META,
+                   prepare_dashboard_exports.PARTITION_MANIFEST),
+          code=(prepare_dashboard_exports,)),
+    Stage(
+        "docs",
+        "Documentation & Deployment",
+        lambda r: documentation.main(),
+        deps=("models", "validation", "insights", "dashboard"),
+    ),
 ]
 
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+# Command-line options shared with the stage callables
+OPTIONS: dict = {}
+
+
+def run_step(step: Stage, inputs: dict):
+    print(f"[RUN] {step.name}")
+    result = step.func(inputs)
+    print(f"[OK] {step.name} completed.")
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the SDG East Africa pipeline end to end (STEPS 3-10).")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Worker threads for independent stages (default: %(default)s).")
+    parser.add_argument("--ingest-workers", type=int, default=ingest.DEFAULT_WORKERS,
+                        help="Worker processes for multi-file ingestion (default: %(default)s).")
+    parser.add_argument("--fetch", action="store_true",
+                        help="Fetch the configured countries x indicators from the API before ingestion.")
+    parser.add_argument("--fetch-url", default=fetch.DEFAULT_BASE_URL,
+                        help="API root for --fetch (default: %(default)s; env SDG_EA_API_URL).")
+    parser.add_argument("--fetch-connections", type=int, default=fetch.DEFAULT_CONNECTIONS,
+                        help="Concurrent API requests for --fetch (default: %(default)s).")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Run every stage even if its inputs are unchanged since the last run.")
+    parser.add_argument("--memory-budget", default=None, metavar="SIZE",
+                        help="Per-stage memory budget, e.g. 512M or 2G. Ingestion streams CSVs in chunks that fit; "
+                             "cleaning and feature engineering switch to --partitioned when their working set would not.")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="Clean and engineer features out of core, one country partition at a time.")
+    parser.add_argument("--partition-workers", type=int, default=partitions.DEFAULT_WORKERS,
+                        help="Worker processes for partitioned cleaning / features (default: %(default)s).")
+    parser.add_argument("--float32", action="store_true",
+                        help=f"Store values as float32 instead of float64 (same as {memory.FLOAT32_ENV}=1).")
+    parser.add_argument("--trace", default=None,
+                        help="NDJSON run trace path (default: sdg_ea_pipeline/logs/runs/run_<timestamp>.ndjson).")
+    parser.add_argument("--profile", action="append", default=[], choices=[s.key for s in STEPS], metavar="STAGE",
+                        help="Run STAGE under cProfile (bypassing the stage cache); repeatable. "
+                             "Writes <trace>_<stage>.prof and a .txt summary next to the trace. "
+                             "Profiled stages never overlap: one that is ready while another is profiled waits.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    OPTIONS.update(ingest_workers=args.ingest_workers, memory_budget=memory.parse_size(args.memory_budget),
+                   partitioned=args.partitioned, workers=args.partition_workers,
+                   fetch=args.fetch, fetch_url=args.fetch_url, fetch_connections=max(1, args.fetch_connections))
+    if args.float32:
+        os.environ[memory.FLOAT32_ENV] = "1"
 
-def run_step(step):
-    name = step["name"]
-    cmd = step["cmd"]
-    print(f"[RUN] {name}: {' '.join(cmd)}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"[ERROR] {name} failed with code {result.returncode}")
-        print(result.stdout)
-        print(result.stderr)
-        sys.exit(result.returncode)
-    else:
-        print(f"[OK] {name} completed.")
-        if result.stdout:
-            print(result.stdout)
-
-
-def main():
-    root = Path(__file__).resolve().parents[0]
     print("Starting end-to-end pipeline (STEPS 3-10).")
-    for step in STEPS:
-        run_step(step)
+    runner = run_step if args.no_cache else cached_runner(run_step)
+    if args.profile and not args.no_cache:
+        # A profiled stage always runs; the others keep using the cache
+        cached, profiled = runner, set(args.profile)
+        runner = lambda stage, inputs: (run_step(stage, {k: resolve(v) for k, v in inputs.items()})
+                                        if stage.key in profiled else cached(stage, inputs))
+    trace = RunTrace(args.trace)
+    sampler = RssSampler().start()
+    status = "failed"
+    try:
+        run_dag(STEPS, max_workers=max(1, args.workers),
+                runner=instrumented_runner(runner, trace, STEPS, sampler, args.profile))
+        status = "ok"
+    except StageFailed as e:
+        print(f"[ERROR] {e.stage.name} failed: {e.error}")
+        traceback.print_exception(type(e.error), e.error, e.error.__traceback__)
+        sys.exit(1)
+    finally:
+        sampler.stop()
+        summary = trace.close(status)
+        print(f"Run trace: {trace.path} ({summary['wall_s']:.2f}s wall, {summary['cache_hits']} cache hit(s), "
+              f"slowest stage: {summary['slowest']})")
     print("Pipeline complete. Outputs are in the sdg_ea_pipeline/ data/processed/ and models folders as described.")
 
 
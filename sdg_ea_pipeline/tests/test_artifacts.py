@@ -0,0 +1,24 @@
+from __future__ import annotations
+import pandas as pd
+import pytest
+
+from sdg_ea_pipeline.logic.storage.artifacts import FORMATS, ChunkWriter, open_artifact_writer, read_artifact
+
+
+def test_incomplete_chunk_writer_fails_on_creation():
+    class NoWrite(ChunkWriter):
+        pass
+
+    with pytest.raises(TypeError):
+        NoWrite()
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_chunked_write_round_trip(tmp_path, fmt):
+    df = pd.DataFrame({"country": ["KEN", "UGA", "TZA"], "value": [1.5, 2.25, 3.0]})
+    with open_artifact_writer(tmp_path / "table", fmt) as writer:
+        writer.write(df.iloc[:2])
+        writer.write(df.iloc[2:])
+    back = read_artifact(tmp_path / "table")
+    assert back["country"].astype(str).tolist() == df["country"].tolist()
+    assert back["value"].tolist() == df["value"].tolist()
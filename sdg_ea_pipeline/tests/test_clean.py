@@ -0,0 +1,77 @@
+from __future__ import annotations
+import pandas as pd
+import pytest
+
+from sdg_ea_pipeline.logic.cleaning import clean
+from sdg_ea_pipeline.logic.storage.artifacts import artifact_path, write_artifact
+
+COLUMNS = ["source", "year", "country", "indicator_code", "value", "reliability"]
+
+
+def _frame(rows, ingested_at=None) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    if ingested_at is not None:
+        df[clean.INGESTED_AT] = pd.Timestamp(ingested_at)
+    return df
+
+
+def _values(df: pd.DataFrame) -> dict:
+    years = pd.to_numeric(df["year"]).astype(int)
+    return {(c, i, y): v for c, i, y, v in zip(df["country"], df["indicator_code"], years, df["value"])}
+
+
+def test_merge_observations_last_write_wins():
+    old = _frame([["UNSD", 2020, "KEN", "I1", 1.0, "verified"],
+                  ["UNSD", 2021, "KEN", "I1", 2.0, "verified"]], "2024-01-01")
+    # Same key with the year typed differently, ingested later; plus a new observation
+    new = _frame([["UNSD", 2020.0, "KEN", "I1", 5.0, "revised"],
+                  ["UNSD", 2020, "UGA", "I1", 3.0, "verified"]], "2024-02-01")
+    out = clean.merge_observations(new, old)
+    assert _values(out) == {("KEN", "I1", 2020): 5.0, ("KEN", "I1", 2021): 2.0, ("UGA", "I1", 2020): 3.0}
+    assert out.loc[out["value"] == 5.0, "reliability"].item() == "revised"
+
+
+def test_merge_observations_keeps_sources_apart_and_breaks_ties_by_order():
+    a = _frame([["UNSD", 2020, "KEN", "I1", 1.0, "verified"], ["WB", 2020, "KEN", "I1", 9.0, "verified"]], "2024-01-01")
+    b = _frame([["UNSD", 2020, "KEN", "I1", 4.0, "verified"]], "2024-01-01")
+    out = clean.merge_observations(a, b)
+    assert len(out) == 2
+    # Equal ingestion times: the frame passed last wins
+    assert sorted(out["value"]) == [4.0, 9.0]
+
+
+@pytest.fixture
+def interim_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(clean, "INTERIM_DIR", tmp_path / "interim")
+    monkeypatch.setattr(clean, "OBSERVATIONS", tmp_path / "observations")
+    monkeypatch.setattr(clean, "CLEANING_STATE", tmp_path / "cleaning_state.json")
+    monkeypatch.setattr(clean, "record_lineage", lambda *args, **kwargs: None)
+    return tmp_path / "interim"
+
+
+def _write_interim(directory, stamp, rows):
+    base = directory / f"ingested_placeholder_{stamp}"
+    write_artifact(_frame(rows), base)
+    return artifact_path(base)
+
+
+def test_update_observations_merges_only_new_interims(interim_dir):
+    _write_interim(interim_dir, "20240101_000000", [["UNSD", 2020, "KEN", "I1", 1.0, "verified"],
+                                                    ["UNSD", 2021, "KEN", "I1", 2.0, "verified"]])
+    first = clean.update_observations()
+    assert len(first) == 2
+
+    _write_interim(interim_dir, "20240201_000000", [["UNSD", 2021, "KEN", "I1", 7.0, "revised"],
+                                                    ["UNSD", 2022, "KEN", "I1", 3.0, "verified"]])
+    incremental = clean.update_observations()
+    assert _values(incremental) == {("KEN", "I1", 2020): 1.0, ("KEN", "I1", 2021): 7.0, ("KEN", "I1", 2022): 3.0}
+    rebuilt = clean.update_observations(incremental=False)
+    pd.testing.assert_frame_equal(incremental, rebuilt)
+
+
+def test_update_observations_rebuilds_when_a_merged_interim_disappears(interim_dir):
+    _write_interim(interim_dir, "20240101_000000", [["UNSD", 2020, "KEN", "I1", 1.0, "verified"]])
+    revision = _write_interim(interim_dir, "20240201_000000", [["UNSD", 2020, "KEN", "I1", 6.0, "revised"]])
+    assert _values(clean.update_observations()) == {("KEN", "I1", 2020): 6.0}
+    revision.unlink()
+    assert _values(clean.update_observations()) == {("KEN", "I1", 2020): 1.0}
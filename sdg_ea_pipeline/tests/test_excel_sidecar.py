@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from sdg_ea_pipeline.logic.ingestion import excel_sidecar
+
+
+def test_prune_keeps_only_current_digests(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_sidecar, "SIDECAR_DIR", tmp_path)
+    current, stale = "a" * 64, "b" * 64
+    for name in (f"v{excel_sidecar.SIDECAR_VERSION}_{current}.parquet",
+                 f"v{excel_sidecar.SIDECAR_VERSION}_{stale}.parquet",
+                 f"v0_{current}.parquet"):  # an older SIDECAR_VERSION
+        (tmp_path / name).write_bytes(b"")
+    assert excel_sidecar.prune_sidecars([current]) == 2
+    assert [p.name for p in tmp_path.iterdir()] == [f"v{excel_sidecar.SIDECAR_VERSION}_{current}.parquet"]
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+import pytest
+
+from sdg_ea_pipeline.logic.cleaning.clean import clean_dataframe
+from sdg_ea_pipeline.logic.fe import feature_engineering as fe
+
+
+def _cleaned(rows) -> pd.DataFrame:
+    raw = pd.DataFrame(rows, columns=["source", "year", "country", "indicator_code", "value", "reliability"])
+    return fe.harmonize_input(fe.select_target(clean_dataframe(raw, output=None)))
+
+
+def _panel(series=(("KEN", "I1"), ("KEN", "I2"), ("UGA", "I1")), years=range(2010, 2020)):
+    return [["test", y, c, i, 100.0 + 3 * y % 7 + len(c), "verified"] for c, i in series for y in years]
+
+
+def _assert_same_features(actual: pd.DataFrame, expected: pd.DataFrame) -> None:
+    actual, expected = fe.compact_frame(actual), fe.compact_frame(expected)
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True))
+
+
+def test_incremental_matches_full_recompute():
+    rows = _panel()
+    previous = fe.compute_features(_cleaned(rows))
+    # A revised value mid-series, a removed row, and a new series
+    rows[3][4] = 500.0
+    del rows[15]
+    rows += _panel(series=(("TZA", "I2"),), years=range(2015, 2020))
+    new = _cleaned(rows)
+    out, stats = fe.incremental_features(new, previous)
+    assert stats["series_changed"] == 3
+    assert 0 < stats["rows_recomputed"] < len(new)
+    _assert_same_features(out, fe.compute_features(new))
+
+
+def test_incremental_with_empty_previous_is_a_full_compute():
+    new = _cleaned(_panel())
+    previous = fe.compute_features(new).iloc[0:0]
+    out, stats = fe.incremental_features(new, previous)
+    assert stats["rows_recomputed"] == len(new)
+    _assert_same_features(out, fe.compute_features(new))
+
+
+def test_pass_through_change_is_reported():
+    rows = _panel()
+    previous = fe.compute_features(_cleaned(rows))
+    rows[4][5] = "estimated"  # same value, revised reliability
+    out, stats = fe.incremental_features(_cleaned(rows), previous)
+    assert (stats["rows_recomputed"], stats["rows_updated"]) == (0, 1)
+    assert (out["reliability"].astype(str) == "estimated").sum() == 1
+
+
+@pytest.fixture
+def fe_outputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(fe, "FEATURES_OUTPUT", tmp_path / "features")
+    monkeypatch.setattr(fe, "FEATURES_LONG_OUTPUT", tmp_path / "features_long")
+    monkeypatch.setattr(fe, "FEATURES_STATE", tmp_path / "features_state.json")
+    monkeypatch.setattr(fe, "_record_lineage", lambda: None)
+    return tmp_path
+
+
+def test_main_saves_pass_through_only_changes(fe_outputs):
+    rows = _panel()
+    fe.main(cleaned=_cleaned(rows))
+    rows[4][5] = "estimated"
+    fe.main(cleaned=_cleaned(rows))
+    stored = fe.read_artifact(fe.FEATURES_OUTPUT)
+    assert (stored["reliability"].astype(str) == "estimated").sum() == 1
+
+
+def test_main_recomputes_after_an_empty_table(fe_outputs):
+    cleaned = _cleaned(_panel())
+    fe.main(cleaned=cleaned.iloc[0:0])
+    out = fe.main(cleaned=cleaned)
+    assert len(out) == len(cleaned)
+    assert np.isfinite(out["rolling_mean_3"].to_numpy(dtype=float, na_value=np.nan)).any()
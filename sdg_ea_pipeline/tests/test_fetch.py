@@ -0,0 +1,28 @@
+from __future__ import annotations
+import pandas as pd
+
+from sdg_ea_pipeline.logic.ingestion.fetch import OUTPUT_COLUMNS, keep_previous, write_fetched
+
+
+def _rows(country, code, values):
+    return [{"source": "SDG_API", "year": 2020 + i, "country": country, "indicator_code": code,
+             "value": v, "reliability": "verified"} for i, v in enumerate(values)]
+
+
+def test_failed_series_keep_previous_rows(tmp_path):
+    path = tmp_path / "api_fetch.csv"
+    first = pd.DataFrame(_rows("KEN", "I1", [1.5, 2.5]) + _rows("UGA", "I1", [3.5, 4.5]), columns=OUTPUT_COLUMNS)
+    write_fetched(first, path)
+    # KEN/I1 failed this time; UGA/I1 came back revised
+    fetched = pd.DataFrame(_rows("UGA", "I1", [3.5, 5.5]), columns=OUTPUT_COLUMNS)
+    merged, kept = keep_previous(fetched, [("KEN", "I1")], path)
+    assert kept == 2
+    assert merged["value"].tolist() == [1.5, 2.5, 3.5, 5.5]
+
+
+def test_nothing_kept_without_failures_or_file(tmp_path):
+    path = tmp_path / "api_fetch.csv"
+    fetched = pd.DataFrame(_rows("UGA", "I1", [3.5]), columns=OUTPUT_COLUMNS)
+    assert keep_previous(fetched, [("KEN", "I1")], path)[1] == 0
+    write_fetched(fetched, path)
+    assert keep_previous(fetched, [], path)[1] == 0
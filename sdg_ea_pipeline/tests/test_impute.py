@@ -0,0 +1,71 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+import pytest
+
+from sdg_ea_pipeline.logic.cleaning.impute import fill_gaps
+
+NAN = np.nan
+
+
+def _series(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["country", "indicator_code", "year", "target_value"])
+    # Shuffled: results come back in the row order of the input, not series order
+    return df.sample(frac=1.0, random_state=0)
+
+
+def _result(df: pd.DataFrame, **kwargs) -> dict:
+    values, flags = fill_gaps(df, **kwargs)
+    keys = zip(df["country"], df["indicator_code"], df["year"])
+    return {k: (None if np.isnan(v) else v, f) for k, v, f in zip(keys, values, flags)}
+
+
+ROWS = [
+    # KEN/I1: uneven spacing to interpolate over, then a trailing gap longer than FFILL_MAX_GAP
+    ["KEN", "I1", 2010, 1.0],
+    ["KEN", "I1", 2011, NAN],
+    ["KEN", "I1", 2013, 4.0],
+    ["KEN", "I1", 2014, NAN],
+    ["KEN", "I1", 2015, NAN],
+    ["KEN", "I1", 2016, NAN],
+    # UGA/I1: a leading gap has no previous observation; the KEN series must not leak into it
+    ["UGA", "I1", 2010, NAN],
+    ["UGA", "I1", 2011, 9.0],
+    ["UGA", "I1", 2012, 11.0],
+    # TZA/I2: nothing observed for the indicator anywhere, so nothing can fill it
+    ["TZA", "I2", 2010, NAN],
+]
+
+
+def test_fill_chain_and_flags():
+    out = _result(_series(ROWS))
+    # I1 median over every observed value: median(1, 4, 9, 11) = 6.5
+    assert out == {
+        ("KEN", "I1", 2010): (1.0, "observed"),
+        ("KEN", "I1", 2011): (2.0, "interpolated"),
+        ("KEN", "I1", 2013): (4.0, "observed"),
+        ("KEN", "I1", 2014): (4.0, "ffill"),
+        ("KEN", "I1", 2015): (4.0, "ffill"),
+        ("KEN", "I1", 2016): (6.5, "median"),
+        ("UGA", "I1", 2010): (6.5, "median"),
+        ("UGA", "I1", 2011): (9.0, "observed"),
+        ("UGA", "I1", 2012): (11.0, "observed"),
+        ("TZA", "I2", 2010): (None, "unfilled"),
+    }
+
+
+def test_method_subset_gap_limit_and_given_medians():
+    df = _series(ROWS)
+    out = _result(df, methods=("ffill",), max_gap=1)
+    assert out[("KEN", "I1", 2011)] == (1.0, "ffill")
+    assert out[("KEN", "I1", 2014)] == (4.0, "ffill")
+    assert out[("KEN", "I1", 2015)] == (None, "unfilled")
+    # Partitioned cleaning hands in the medians of the whole table
+    out = _result(df, medians=pd.Series({"I1": 100.0, "I2": 50.0}))
+    assert out[("KEN", "I1", 2016)] == (100.0, "median")
+    assert out[("TZA", "I2", 2010)] == (50.0, "median")
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError, match="Unknown imputation method"):
+        fill_gaps(_series(ROWS), methods=("interpolate", "spline"))
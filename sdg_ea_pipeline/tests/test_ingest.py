@@ -0,0 +1,44 @@
+from __future__ import annotations
+import pandas as pd
+import pytest
+
+from sdg_ea_pipeline.logic.cleaning.clean import clean_dataframe
+from sdg_ea_pipeline.logic.ingestion import ingest
+from sdg_ea_pipeline.logic.storage.artifacts import read_artifact_file
+from sdg_ea_pipeline.logic.validation.quality import load_rules, quality_flags
+
+DIRTY_CSV = """source,year,country,indicator_code,value,reliability,notes
+UNSD,2018,KEN,I1,10.5,verified,
+UNSD,2019,KEN,I1,11,verified,
+UNSD,2020,KEN,I1,12,verified,
+UNSD,2018,UGA,I2,7,estimated,
+UNSD,2019,UGA,I2,..,estimated,suppressed
+UNSD,2020,UGA,I2,8.25,estimated,
+UNSD,..,TZA,I1,3,verified,year not reported
+UNSD,2021,TZA,I1,,verified,
+UNSD,2022,TZA,I1,4,verified,revised
+"""
+
+
+@pytest.fixture
+def dirty_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "INTERIM_DIR", tmp_path / "interim")
+    path = tmp_path / "dirty.csv"
+    path.write_text(DIRTY_CSV)
+    return path
+
+
+def test_stream_dirty_csv_matches_non_streamed_read(dirty_csv):
+    # Three chunks: `notes` is empty throughout the first, `..` appears in value and year later
+    interim, summary = ingest.stream_interim(dirty_csv, chunksize=3)
+    streamed = read_artifact_file(interim)
+    direct = ingest.read_dataframe(dirty_csv)
+    assert list(streamed.columns) == list(direct.columns)
+    pd.testing.assert_frame_equal(streamed.astype("string"), direct.astype("string"))
+    assert (summary.rows, summary.year_min, summary.year_max) == (9, 2018, 2022)
+
+    rules = load_rules()
+    assert (quality_flags(streamed, rules) == quality_flags(direct, rules)).all()
+    # Raw text columns may differ only in the string dtype's NA flavour
+    pd.testing.assert_frame_equal(clean_dataframe(streamed, output=None), clean_dataframe(direct, output=None),
+                                  check_dtype=False)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+from sdg_ea_pipeline.logic.cleaning.clean import clean_dataframe
+from sdg_ea_pipeline.outputs.insights.insight_generator import RULES, build_reports, evaluate_rule, top_n
+
+
+def _panel(missing: dict) -> pd.DataFrame:
+    # Two countries x two indicators x ten years; `missing` maps a series to the years it lacks
+    rows = []
+    for country in ("KEN", "UGA"):
+        for code in ("I1", "I2"):
+            for year in range(2010, 2020):
+                value = np.nan if year in missing.get((country, code), ()) else 100.0 + year
+                rows.append({"source": "test", "year": year, "country": country, "indicator_code": code,
+                             "value": value, "reliability": "verified"})
+    return pd.DataFrame(rows)
+
+
+def test_missing_hotspots_fire_on_cleaned_gaps():
+    cleaned = clean_dataframe(_panel({("KEN", "I1"): (2012, 2013, 2019), ("UGA", "I2"): (2015,)}), output=None)
+    # Cleaning fills every gap, so the hotspots have to come from impute_method
+    assert cleaned["target_value"].notna().all()
+    reports = build_reports(cleaned)
+    hotspots = reports[(reports["rule"] == "missing_hotspots") & (reports["scope_type"] == "global")]
+    assert hotspots["line"].tolist() == ["Missing-data hotspots: KEN I1: 30% missing, UGA I2: 10% missing"]
+
+
+def test_missing_hotspots_fall_back_to_observed_values():
+    features = _panel({("UGA", "I1"): (2011,)})
+    lines = build_reports(features).query("rule == 'missing_hotspots' and scope_type == 'global'")["line"].tolist()
+    assert lines == ["Missing-data hotspots: UGA I1: 10% missing"]
+
+
+def test_top_n_matches_a_stable_sort():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        key = rng.integers(0, 5, rng.integers(1, 40)).astype(float)
+        n = int(rng.integers(1, 6))
+        assert top_n(key, n).tolist() == np.argsort(key, kind="stable")[:n].tolist()
+
+
+def test_rules_rank_within_each_scope():
+    summary = pd.DataFrame({"mean_yoy": [5.0, 1.0, 3.0, 4.0, 2.0], "high_count": 0,
+                            "years_since_update": 0, "missing_share": 0.0})
+    labels = np.array(list("abcde"), dtype=object)
+    codes = np.array([0, 1, 0, 1, 0])
+    names = np.array(["X", "Y"], dtype=object)
+    rule = next(r for r in RULES if r.name == "top_growers")
+    lines = evaluate_rule(rule, summary, labels, codes, names)
+    assert lines == [
+        ("X", "top_growers", "Top growing indicators: a: 5.0%, c: 3.0%, e: 2.0%"),
+        ("Y", "top_growers", "Top growing indicators: d: 4.0%, b: 1.0%"),
+    ]
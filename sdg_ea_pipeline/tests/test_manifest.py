@@ -0,0 +1,53 @@
+from __future__ import annotations
+import os
+
+from sdg_ea_pipeline.logic.ingestion.manifest import IngestManifest
+
+
+def _write(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _ingest(manifest, path):
+    changed, digest = manifest.check(path)
+    if changed:
+        manifest.record(path, digest, archived="a", interim="i")
+    return changed
+
+
+def test_unchanged_source_is_skipped(tmp_path):
+    src = tmp_path / "data.csv"
+    _write(src, "a,b\n1,2\n", 1_000_000_000)
+    manifest = IngestManifest(tmp_path / "manifest.json")
+    assert _ingest(manifest, src)
+    assert not _ingest(manifest, src)
+    # Touched without a content change
+    os.utime(src, ns=(2_000_000_000, 2_000_000_000))
+    assert not _ingest(manifest, src)
+
+
+def test_revert_to_earlier_content_is_ingested(tmp_path):
+    src = tmp_path / "data.csv"
+    path = tmp_path / "manifest.json"
+    _write(src, "KEN,I1,2021,1010000\n", 1_000_000_000)
+    manifest = IngestManifest(path)
+    assert _ingest(manifest, src)
+    _write(src, "KEN,I1,2021,9999999\n", 2_000_000_000)
+    assert _ingest(manifest, src)
+    manifest.save()
+    # Back to the first revision: its digest was ingested before, but is not the latest
+    _write(src, "KEN,I1,2021,1010000\n", 3_000_000_000)
+    manifest = IngestManifest.load(path)
+    assert _ingest(manifest, src)
+    assert not _ingest(manifest, src)
+
+
+def test_failed_ingestion_is_retried(tmp_path):
+    src = tmp_path / "data.csv"
+    _write(src, "a,b\n1,2\n", 1_000_000_000)
+    manifest = IngestManifest(tmp_path / "manifest.json")
+    changed, _ = manifest.check(src)
+    assert changed
+    # No record(): the next run must still see the source as changed
+    assert manifest.check(src)[0]
@@ -0,0 +1,61 @@
+from __future__ import annotations
+import json
+
+import pandas as pd
+import pytest
+
+from sdg_ea_pipeline.benchmarks.synthetic import PanelSpec, generate_panel
+from sdg_ea_pipeline.logic.cleaning import clean
+from sdg_ea_pipeline.logic.fe import feature_engineering as fe
+from sdg_ea_pipeline.logic.storage.artifacts import read_artifact, write_artifact
+from sdg_ea_pipeline.logic.validation.quality import apply_quality
+
+
+@pytest.fixture
+def processed(tmp_path, monkeypatch):
+    for name, value in {
+        "INTERIM_DIR": tmp_path / "interim",
+        "OBSERVATIONS": tmp_path / "observations",
+        "CLEANING_STATE": tmp_path / "cleaning_state.json",
+        "CLEANED_OUTPUT": tmp_path / "cleaned",
+        "CLEAN_PARTITIONS": tmp_path / "partitions" / "clean",
+        "QUALITY_SUMMARY": tmp_path / "quality_summary.json",
+    }.items():
+        monkeypatch.setattr(clean, name, value)
+    monkeypatch.setattr(clean, "record_lineage", lambda *args, **kwargs: None)
+    for name, value in {
+        "CLEANED_PATH": tmp_path / "cleaned",
+        "FEATURES_OUTPUT": tmp_path / "features",
+        "FEATURES_LONG_OUTPUT": tmp_path / "features_long",
+        "FEATURES_STATE": tmp_path / "features_state.json",
+        "FE_PARTITIONS": tmp_path / "partitions" / "features",
+    }.items():
+        monkeypatch.setattr(fe, name, value)
+    monkeypatch.setattr(fe, "_record_lineage", lambda: None)
+
+    # Configured countries plus two unknown ones (rejected by validation), and a later
+    # interim revising part of the panel with some lower-cased country codes
+    panel = generate_panel(PanelSpec(countries=10, indicators=3, years=12, missing_rate=0.1))
+    revisions = generate_panel(PanelSpec(countries=6, indicators=3, years=12, seed=3, missing_rate=0.3))
+    revisions = revisions.sample(frac=0.5, random_state=1)
+    revisions.loc[revisions.index[:20], "country"] = revisions.loc[revisions.index[:20], "country"].str.lower()
+    write_artifact(panel, tmp_path / "interim" / "ingested_panel_20240101_000000")
+    write_artifact(revisions, tmp_path / "interim" / "ingested_revisions_20240201_000000")
+    return tmp_path
+
+
+def test_partitioned_cleaning_and_features_match_in_memory(processed):
+    observations = clean.update_observations(incremental=False)
+    validated, summary = apply_quality(observations, summary_path=None)
+    in_memory = clean.clean_dataframe(validated, output=None)
+    features = fe.main(cleaned=in_memory, incremental=False)
+    long = read_artifact(processed / "features_long")
+
+    assert clean.clean_partitioned(workers=2)
+    pd.testing.assert_frame_equal(read_artifact(processed / "cleaned"), in_memory, check_exact=True)
+    assert json.loads((processed / "quality_summary.json").read_text()) == summary
+    assert summary["rejected_rows"] > 0
+
+    assert fe.features_partitioned(workers=2)
+    pd.testing.assert_frame_equal(read_artifact(processed / "features"), features, check_exact=True)
+    pd.testing.assert_frame_equal(read_artifact(processed / "features_long"), long, check_exact=True)
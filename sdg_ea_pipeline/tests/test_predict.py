@@ -0,0 +1,53 @@
+from __future__ import annotations
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from sdg_ea_pipeline.logic.models import design_matrix, predict
+from sdg_ea_pipeline.logic.storage.artifacts import write_artifact
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    features = pd.DataFrame({
+        "country": ["KEN", "KEN", "UGA", "UGA"],
+        "indicator_code": ["I1", "I1", "I1", "I1"],
+        "year": [2020, 2021, 2020, 2021],
+        "target_value": [1.0, 2.0, 3.0, 4.0],
+        "lag_1": [np.nan, 1.0, np.nan, 3.0],
+    })
+    write_artifact(features, tmp_path / "features")
+    vocab, _ = design_matrix.update_vocabulary(features)
+    design_matrix._save_vocabulary(vocab, tmp_path / "vocabulary.json")
+    monkeypatch.setattr(predict, "FEAT_PATH", tmp_path / "features")
+    monkeypatch.setattr(predict, "VOCABULARY_FILE", tmp_path / "vocabulary.json")
+    monkeypatch.setattr(predict, "SERIES_TRENDS", tmp_path / "series_trends")
+    monkeypatch.setattr(predict, "MODELS_DIR", tmp_path / "models")
+    (tmp_path / "models").mkdir()
+    return tmp_path / "models", len(design_matrix.feature_names(vocab))
+
+
+QUERIES = pd.DataFrame({"country": ["KEN", "UGA"], "indicator_code": ["I1", "I1"], "year": [2022, 2022]})
+
+
+def test_absent_models_are_skipped(model_dir):
+    out = predict.predict(QUERIES)
+    assert "predicted_value" not in out.columns
+    assert len(out) == 2
+
+
+def test_model_matching_vocabulary_predicts(model_dir):
+    models, n_features = model_dir
+    joblib.dump(LinearRegression().fit(np.eye(n_features), np.arange(n_features)), models / "linear_regression.joblib")
+    assert predict.predict(QUERIES)["predicted_value"].notna().all()
+
+
+def test_model_vocabulary_mismatch_raises(model_dir):
+    models, n_features = model_dir
+    # Trained before the vocabulary gained a category
+    stale = n_features - 1
+    joblib.dump(LinearRegression().fit(np.eye(stale), np.arange(stale)), models / "linear_regression.joblib")
+    with pytest.raises(ValueError, match=rf"linear_regression.joblib expects {stale} features .* encodes {n_features}.*STEP 6"):
+        predict.predict(QUERIES)
@@ -0,0 +1,59 @@
+from __future__ import annotations
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from sdg_ea_pipeline.logic.storage.artifacts import write_artifact
+from sdg_ea_pipeline.outputs.service import query_service as qs
+
+
+@pytest.fixture
+def base_url(tmp_path, monkeypatch):
+    features = pd.DataFrame({
+        "country": pd.Categorical(["KEN", "KEN", "UGA"]),
+        "indicator_code": pd.Categorical(["I1", "I1", "I1"]),
+        "year": [2020, 2021, 2020],
+        "target_value": [1.0, 2.0, 3.0],
+        "risk_level": pd.Categorical(["low", "high", "low"]),
+    })
+    write_artifact(features, tmp_path / "features")
+    # A route whose handler fails unexpectedly
+    monkeypatch.setitem(qs.ROUTES, "/broken", lambda index, params: {}["missing"])
+    server = ThreadingHTTPServer(("127.0.0.1", 0), qs.make_handler(qs.QueryService(tmp_path / "features")))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=10) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_aggregate_numeric_column(base_url):
+    status, body = _get(f"{base_url}/aggregate?by=country&stat=mean")
+    assert status == 200
+    assert body["values"] == [{"country": "KEN", "target_value": 1.5}, {"country": "UGA", "target_value": 3.0}]
+
+
+def test_aggregate_rejects_non_numeric_column(base_url):
+    status, body = _get(f"{base_url}/aggregate?column=risk_level&stat=mean")
+    assert status == 400
+    assert "not numeric" in body["error"]
+
+
+def test_unknown_route_and_handler_errors(base_url):
+    assert _get(f"{base_url}/nope")[0] == 404
+    # A KeyError inside a handler is a server error, not an unknown route
+    status, body = _get(f"{base_url}/broken")
+    assert status == 500
+    assert "KeyError" in body["error"]
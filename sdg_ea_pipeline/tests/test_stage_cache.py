@@ -0,0 +1,70 @@
+from __future__ import annotations
+import pytest
+
+from sdg_ea_pipeline.orchestration import stage_cache
+from sdg_ea_pipeline.orchestration.dag import Stage
+from sdg_ea_pipeline.orchestration.stage_cache import Deferred, StageCache
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    # source.txt -> stage "a" (writes its stripped length) -> stage "b" (doubles it)
+    monkeypatch.setattr(stage_cache, "config_fingerprint", lambda: "config-1")
+    source, a_out, b_out = tmp_path / "source.txt", tmp_path / "a.txt", tmp_path / "b.txt"
+    source.write_text("abc")
+    ran = []
+
+    def stage_a(results):
+        ran.append("a")
+        a_out.write_text(str(len(source.read_text().strip())))
+        return "a"
+
+    def stage_b(results):
+        ran.append("b")
+        b_out.write_text(str(2 * int(a_out.read_text())))
+        return "b"
+
+    stages = [
+        Stage("a", "A", stage_a, inputs=(source,), outputs=(a_out,), load=lambda: "a loaded"),
+        Stage("b", "B", stage_b, deps=("a",), outputs=(b_out,), load=lambda: "b loaded"),
+    ]
+
+    def run():
+        cache = StageCache(tmp_path / "cache")
+        ran.clear()
+        results = {}
+        for stage in stages:
+            results[stage.key] = cache.run(stage, {}, lambda s, inputs: s.func(inputs))
+        return results, list(ran)
+
+    return run, source, a_out
+
+
+def test_unchanged_stages_are_skipped_and_loaded_lazily(pipeline):
+    run, _, _ = pipeline
+    assert run()[1] == ["a", "b"]
+    results, ran = run()
+    assert ran == []
+    assert isinstance(results["a"], Deferred) and not results["a"].loaded
+    assert results["a"].get() == "a loaded"
+
+
+def test_changed_input_reruns_only_what_changed(pipeline):
+    run, source, _ = pipeline
+    run()
+    # Same stripped length: "a" reruns but writes an identical output, so "b" stays cached.
+    # Every rewrite changes the file size, so a coarse mtime cannot hide it.
+    source.write_text("abc\n")
+    assert run()[1] == ["a"]
+    source.write_text("longer")
+    assert run()[1] == ["a", "b"]
+
+
+def test_modified_output_and_config_invalidate(pipeline, monkeypatch):
+    run, _, a_out = pipeline
+    run()
+    a_out.write_text("tampered")
+    # "a" restores its output, so "b" sees the content it was built from
+    assert run()[1] == ["a"]
+    monkeypatch.setattr(stage_cache, "config_fingerprint", lambda: "config-2")
+    assert run()[1] == ["a", "b"]